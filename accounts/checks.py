@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+PROCESS_LOCAL_CACHE_BACKENDS = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    # Snapshot invalidation (bump_snapshot) cache ke version key se hoti hai; process-local cache par
+    # sirf wahi worker refresh hota hai jisne admin POST sambhala.
+    backend = settings.CACHES.get("default", {}).get("BACKEND", "")
+    if backend not in PROCESS_LOCAL_CACHE_BACKENDS:
+        return []
+    return [
+        Warning(
+            "Default cache process-local hai; admin se badle rules/fields doosre workers me TTL tak purane dikhenge.",
+            hint="REDIS_URL set karo (shared RedisCache), ya ek hi web worker chalao.",
+            id="accounts.W001",
+        )
+    ]
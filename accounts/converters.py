@@ -0,0 +1,603 @@
+import io
+import json
+import math
+import zipfile
+
+from PIL import Image, ImageOps
+
+
+QUALITY_MAX = 96
+QUALITY_MIN = 62
+QUALITY_STEP = 2
+MIN_SIDE_PX = 120
+MAX_SCALE_ROUNDS = 10
+# Estimate thoda neeche rakhte hain taaki downscale ke baad pehli try me hi target fit ho.
+DOWNSCALE_SAFETY = 0.92
+
+
+class ConverterError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def converter_result(body, content_type, headers=None):
+    return {"body": body, "content_type": content_type, "headers": headers or {}}
+
+
+def encode_image(image, mime_type, quality):
+    output = io.BytesIO()
+    save_kwargs = {"optimize": True}
+    if mime_type == "image/jpeg":
+        save_kwargs.update({"format": "JPEG", "quality": quality, "progressive": True})
+    elif mime_type == "image/webp":
+        save_kwargs.update({"format": "WEBP", "quality": quality, "method": 6})
+    else:
+        save_kwargs.update({"format": "PNG", "compress_level": 9})
+    image.save(output, **save_kwargs)
+    return output.getvalue()
+
+
+def _quality_ladder():
+    return list(range(QUALITY_MAX, QUALITY_MIN - 1, -QUALITY_STEP))
+
+
+def _best_quality(image, mime_type, target_bytes, encode):
+    # (bytes, fits): ladder ki sabse oonchi quality jo fit ho; warna sabse neeche wali quality ka output.
+    if mime_type == "image/png":
+        data = encode(image, 100)
+        return data, len(data) <= target_bytes
+    ladder = _quality_ladder()
+    top = encode(image, ladder[0])
+    if len(top) <= target_bytes:
+        return top, True
+    bottom = encode(image, ladder[-1])
+    if len(bottom) > target_bytes:
+        return bottom, False
+    # ladder[lo] fit nahi karta, ladder[hi] karta hai; beech me bisect.
+    lo, hi, best = 0, len(ladder) - 1, bottom
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        data = encode(image, ladder[mid])
+        if len(data) <= target_bytes:
+            hi, best = mid, data
+        else:
+            lo = mid
+    return best, True
+
+
+def _estimated_size(size, encoded_len, target_bytes):
+    # Abhi dekhe gaye bytes-per-pixel se andaza ki kitne pixels target me aayenge.
+    w, h = size
+    bytes_per_pixel = encoded_len / max(w * h, 1)
+    wanted_pixels = (target_bytes * DOWNSCALE_SAFETY) / max(bytes_per_pixel, 1e-9)
+    scale = min(math.sqrt(wanted_pixels / max(w * h, 1)), 0.95)
+    # Ek hi scale dono sides par; chhoti side MIN_SIDE_PX se neeche na jaye (patli scans ka ratio na bigde).
+    scale = max(scale, min(MIN_SIDE_PX / max(min(w, h), 1), 1.0))
+    if scale >= 1.0:
+        return size
+    return max(round(w * scale), 1), max(round(h * scale), 1)
+
+
+def encode_to_target(image, mime_type, target_bytes, strict=True):
+    # Returns (bytes, output_image, encode_count).
+    encodes = 0
+
+    def encode(img, quality):
+        nonlocal encodes
+        encodes += 1
+        return encode_image(img, mime_type, quality)
+
+    work = image
+    best = None
+    for _ in range(MAX_SCALE_ROUNDS):
+        data, fits = _best_quality(work, mime_type, target_bytes, encode)
+        if best is None or len(data) < len(best[0]):
+            best = (data, work)
+        if fits:
+            return data, work, encodes
+        if not strict:
+            break
+        next_size = _estimated_size(work.size, len(data), target_bytes)
+        if next_size == work.size:
+            break
+        # Har round original se resize, taaki baar-baar resample ka blur jama na ho.
+        work = image.resize(next_size, Image.Resampling.LANCZOS)
+    return best[0], best[1], encodes
+
+
+def _target_dimensions(src_w, src_h, req_w, req_h):
+    if req_w and req_h:
+        return max(req_w, 1), max(req_h, 1)
+    if req_w and not req_h:
+        ratio = req_w / max(src_w, 1)
+        return max(req_w, 1), max(int(src_h * ratio), 1)
+    if req_h and not req_w:
+        ratio = req_h / max(src_h, 1)
+        return max(int(src_w * ratio), 1), max(req_h, 1)
+    return src_w, src_h
+
+
+def _flatten_on_white(image):
+    # Keep transparent PNG/WebP background clean in JPEG/WebP output.
+    if image.mode in ("RGBA", "LA"):
+        bg = Image.new("RGB", image.size, (255, 255, 255))
+        alpha = image.getchannel("A")
+        bg.paste(image.convert("RGB"), mask=alpha)
+        return bg
+    if image.mode == "P":
+        if "transparency" in image.info:
+            rgba = image.convert("RGBA")
+            bg = Image.new("RGB", rgba.size, (255, 255, 255))
+            bg.paste(rgba.convert("RGB"), mask=rgba.getchannel("A"))
+            return bg
+        return image.convert("RGB")
+    if image.mode not in ("RGB", "L"):
+        return image.convert("RGB")
+    return image
+
+
+def _resize_no_stretch(image, req_w, req_h):
+    src_w, src_h = image.size
+    out_w, out_h = _target_dimensions(src_w, src_h, req_w, req_h)
+    if (out_w, out_h) == (src_w, src_h):
+        return image
+
+    # If both dimensions are given, fit inside target box and pad on white.
+    if req_w and req_h:
+        scale = min(req_w / max(src_w, 1), req_h / max(src_h, 1))
+        fit_w = max(int(src_w * scale), 1)
+        fit_h = max(int(src_h * scale), 1)
+        fitted = image.resize((fit_w, fit_h), Image.Resampling.LANCZOS)
+        if fitted.mode not in ("RGB", "L"):
+            fitted = _flatten_on_white(fitted)
+        if fitted.mode == "L":
+            canvas = Image.new("L", (req_w, req_h), 255)
+        else:
+            canvas = Image.new("RGB", (req_w, req_h), (255, 255, 255))
+        x = (req_w - fit_w) // 2
+        y = (req_h - fit_h) // 2
+        canvas.paste(fitted, (x, y))
+        return canvas
+
+    # Single-side resize keeps aspect ratio naturally.
+    return image.resize((out_w, out_h), Image.Resampling.LANCZOS)
+
+
+def _clamp_crop_box(img_w, img_h, x, y, w, h):
+    x = max(0, min(x, img_w - 1))
+    y = max(0, min(y, img_h - 1))
+    w = max(1, min(w, img_w - x))
+    h = max(1, min(h, img_h - y))
+    return x, y, w, h
+
+
+def _open_image_from_upload(file_obj):
+    image = Image.open(file_obj)
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ("RGBA", "LA", "P"):
+        bg = Image.new("RGB", image.size, (255, 255, 255))
+        if image.mode == "P":
+            image = image.convert("RGBA")
+        if image.mode in ("RGBA", "LA"):
+            alpha = image.getchannel("A")
+            bg.paste(image.convert("RGB"), mask=alpha)
+        else:
+            bg.paste(image.convert("RGB"))
+        return bg
+    if image.mode != "RGB":
+        return image.convert("RGB")
+    return image
+
+
+def _crop_image(image, options):
+    crop_mode = options.get("crop_mode", "none")
+    crop_x, crop_y = options.get("crop_x", 0), options.get("crop_y", 0)
+    crop_w, crop_h = options.get("crop_w", 0), options.get("crop_h", 0)
+    img_w, img_h = image.size
+    if crop_mode == "center":
+        target_ratio = 1.0
+        if crop_w > 0 and crop_h > 0:
+            target_ratio = crop_w / max(crop_h, 1)
+        src_ratio = img_w / max(img_h, 1)
+        if src_ratio > target_ratio:
+            new_w = int(img_h * target_ratio)
+            new_h = img_h
+        else:
+            new_w = img_w
+            new_h = int(img_w / max(target_ratio, 0.01))
+        start_x = max((img_w - new_w) // 2, 0)
+        start_y = max((img_h - new_h) // 2, 0)
+        return image.crop((start_x, start_y, start_x + new_w, start_y + new_h))
+    if crop_mode == "custom" and crop_w > 0 and crop_h > 0:
+        x, y, w, h = _clamp_crop_box(img_w, img_h, crop_x, crop_y, crop_w, crop_h)
+        return image.crop((x, y, x + w, y + h))
+    return image
+
+
+def convert_image(data, file_name, mime_type, options):
+    target_kb = options.get("target_kb", 200)
+    target_bytes = max((target_kb - 1) * 1024, 1024)
+
+    try:
+        image = Image.open(io.BytesIO(data))
+        image = ImageOps.exif_transpose(image)
+    except Exception:
+        raise ConverterError("Image read nahi hui.")
+    if mime_type in {"image/jpeg", "image/webp"}:
+        image = _flatten_on_white(image)
+    if mime_type == "image/png" and image.mode not in ("RGB", "RGBA", "L", "LA"):
+        image = image.convert("RGBA")
+
+    # Optional crop before resize/compress to preserve quality better.
+    image = _crop_image(image, options)
+    image = _resize_no_stretch(image, options.get("req_w", 0), options.get("req_h", 0))
+
+    best_bytes = b""
+    best_size = None
+    work_image = image
+
+    if options.get("quality_lock", True):
+        # Keep visual quality high and avoid aggressive re-compression/downscale.
+        if mime_type == "image/png":
+            best_bytes = encode_image(work_image, mime_type, 100)
+            best_size = len(best_bytes)
+        else:
+            for q in (98, 96, 94):
+                encoded = encode_image(work_image, mime_type, q)
+                if best_size is None or len(encoded) < best_size:
+                    best_bytes = encoded
+                    best_size = len(encoded)
+                if len(encoded) <= target_bytes:
+                    best_bytes = encoded
+                    best_size = len(encoded)
+                    break
+    else:
+        best_bytes, work_image, _ = encode_to_target(
+            image, mime_type, target_bytes, strict=options.get("strict_kb", True)
+        )
+
+    if not best_bytes:
+        raise ConverterError("Unable to convert image.", status=500)
+
+    ext = "jpg"
+    if mime_type == "image/png":
+        ext = "png"
+    elif mime_type == "image/webp":
+        ext = "webp"
+    base_name = (file_name or "image").rsplit(".", 1)[0]
+    download_name = f"{base_name}_converted.{ext}"
+    return converter_result(
+        best_bytes,
+        mime_type,
+        {
+            "Content-Disposition": f'attachment; filename="{download_name}"',
+            "X-Original-Size": str(len(data)),
+            "X-Converted-Size": str(len(best_bytes)),
+            "X-Output-Width": str(work_image.size[0]),
+            "X-Output-Height": str(work_image.size[1]),
+            "X-Output-Name": download_name,
+        },
+    )
+
+
+A4_POINTS = (595, 842)
+PDF_DEFAULT_DPI = 150
+PDF_JPEG_QUALITY = 85
+
+
+class _StreamingPdfWriter:
+    # Har page ka JPEG turant file me likh dete hain; sirf object offsets memory me rehte hain.
+
+    def __init__(self, fp):
+        self.fp = fp
+        self.offsets = {}
+        self.page_ids = []
+        self.next_id = 3  # 1 = catalog, 2 = pages (close() me likhe jaate hain)
+        self.fp.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def _write_object(self, obj_id, header, stream=None):
+        self.offsets[obj_id] = self.fp.tell()
+        self.fp.write(f"{obj_id} 0 obj\n".encode("ascii") + header)
+        if stream is not None:
+            self.fp.write(b"\nstream\n" + stream + b"\nendstream")
+        self.fp.write(b"\nendobj\n")
+
+    def _reserve(self):
+        obj_id = self.next_id
+        self.next_id += 1
+        return obj_id
+
+    def add_jpeg_page(self, jpeg_bytes, pixel_size, image_mode, page_size, image_box):
+        image_id, content_id, page_id = self._reserve(), self._reserve(), self._reserve()
+        color_space = "/DeviceGray" if image_mode == "L" else "/DeviceRGB"
+        self._write_object(
+            image_id,
+            (
+                f"<< /Type /XObject /Subtype /Image /Width {pixel_size[0]} /Height {pixel_size[1]} "
+                f"/ColorSpace {color_space} /BitsPerComponent 8 /Filter /DCTDecode /Length {len(jpeg_bytes)} >>"
+            ).encode("ascii"),
+            jpeg_bytes,
+        )
+        x, y, w, h = image_box
+        content = f"q {w:.2f} 0 0 {h:.2f} {x:.2f} {y:.2f} cm /Im0 Do Q".encode("ascii")
+        self._write_object(content_id, f"<< /Length {len(content)} >>".encode("ascii"), content)
+        self._write_object(
+            page_id,
+            (
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {page_size[0]:.2f} {page_size[1]:.2f}] "
+                f"/Resources << /XObject << /Im0 {image_id} 0 R >> >> /Contents {content_id} 0 R >>"
+            ).encode("ascii"),
+        )
+        self.page_ids.append(page_id)
+
+    def close(self):
+        kids = " ".join(f"{page_id} 0 R" for page_id in self.page_ids)
+        self._write_object(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.page_ids)} >>".encode("ascii"))
+        self._write_object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        xref_offset = self.fp.tell()
+        total = self.next_id
+        self.fp.write(f"xref\n0 {total}\n0000000000 65535 f \n".encode("ascii"))
+        for obj_id in range(1, total):
+            self.fp.write(f"{self.offsets[obj_id]:010d} 00000 n \n".encode("ascii"))
+        self.fp.write(
+            f"trailer\n<< /Size {total} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode("ascii")
+        )
+
+
+def _pdf_page_image(data, dpi, page_size):
+    # Page ke hisaab se max pixels; JPEG draft() decode ke waqt hi scale kar deta hai.
+    if page_size == "a4":
+        max_px = (int(A4_POINTS[0] / 72 * dpi), int(A4_POINTS[1] / 72 * dpi))
+    else:
+        long_side = int(A4_POINTS[1] / 72 * dpi)
+        max_px = (long_side, long_side)
+    image = Image.open(io.BytesIO(data))
+    if image.format == "JPEG":
+        # EXIF rotation abhi apply nahi hui, isliye dono orientation me jo bada scale chahiye wahi lo.
+        w, h = image.size
+        scale = max(min(max_px[0] / w, max_px[1] / h), min(max_px[1] / w, max_px[0] / h))
+        if scale < 1:
+            image.draft("RGB", (math.ceil(w * scale), math.ceil(h * scale)))
+    image = ImageOps.exif_transpose(image)
+    if page_size == "a4" and image.width > image.height:
+        max_px = (max_px[1], max_px[0])
+    image = _flatten_on_white(image)
+    image.thumbnail(max_px, Image.Resampling.LANCZOS)
+    return image
+
+
+def images_to_pdf(files, dpi=PDF_DEFAULT_DPI, page_size="fit", quality=PDF_JPEG_QUALITY):
+    if not files:
+        raise ConverterError("Valid images nahi mili.")
+
+    pdf_buffer = io.BytesIO()
+    writer = _StreamingPdfWriter(pdf_buffer)
+    for name, data in files:
+        try:
+            image = _pdf_page_image(data, dpi, page_size)
+        except Exception:
+            raise ConverterError(f"{name}: image read nahi hui.")
+        img_w, img_h = image.size
+        img_pt = (img_w / dpi * 72, img_h / dpi * 72)
+        if page_size == "a4":
+            page_pt = A4_POINTS if img_h >= img_w else (A4_POINTS[1], A4_POINTS[0])
+            scale = min(page_pt[0] / img_pt[0], page_pt[1] / img_pt[1], 1.0)
+            box_w, box_h = img_pt[0] * scale, img_pt[1] * scale
+            box = ((page_pt[0] - box_w) / 2, (page_pt[1] - box_h) / 2, box_w, box_h)
+        else:
+            page_pt = img_pt
+            box = (0, 0, img_pt[0], img_pt[1])
+        jpeg_buffer = io.BytesIO()
+        image.save(jpeg_buffer, format="JPEG", quality=quality, optimize=True)
+        writer.add_jpeg_page(jpeg_buffer.getvalue(), image.size, image.mode, page_pt, box)
+        image.close()
+    writer.close()
+    pdf_bytes = pdf_buffer.getvalue()
+
+    return converter_result(
+        pdf_bytes,
+        "application/pdf",
+        {
+            "Content-Disposition": 'attachment; filename="merged_documents.pdf"',
+            "X-Output-Name": "merged_documents.pdf",
+            "X-Output-Size": str(len(pdf_bytes)),
+            "X-Output-Pages": str(len(writer.page_ids)),
+        },
+    )
+
+
+PDF_RENDER_DEFAULT_DPI = 72
+PDF_RENDER_MIN_DPI = 36
+PDF_RENDER_MAX_DPI = 300
+# Chota batch: pehla page jaldi stream hota hai, aur memory me ek waqt kuch hi pages rehte hain.
+PDF_RENDER_CHUNK_PAGES = 4
+
+# Sync request itne pages tak hi; isse bade PDF async=1 job se jayein taaki request thread bandha na rahe.
+SYNC_PDF_MAX_PAGES = 40
+
+
+class ZipStreamBuffer:
+    # Non-seekable sink: zipfile data descriptors likhta hai, aur hum har chunk ke baad drain karte hain.
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip_members(members):
+    # Rendered JPEG/PNG pehle se compressed hain, isliye STORED.
+    buffer = ZipStreamBuffer()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as zf:
+        for arcname, data in members:
+            zf.writestr(arcname, data)
+            chunk = buffer.drain()
+            if chunk:
+                yield chunk
+    chunk = buffer.drain()
+    if chunk:
+        yield chunk
+
+
+def _open_pdf(source):
+    try:
+        import fitz  # PyMuPDF
+    except Exception:
+        raise ConverterError(
+            "PDF to image ke liye server dependency missing hai (PyMuPDF). Install hone ke baad ye feature chalega."
+        )
+    try:
+        if isinstance(source, (bytes, bytearray)):
+            doc = fitz.open(stream=source, filetype="pdf")
+        else:
+            doc = fitz.open(source, filetype="pdf")
+    except Exception:
+        raise ConverterError("PDF read nahi ho payi.")
+    if doc.page_count == 0:
+        raise ConverterError("PDF me pages nahi mile.")
+    return doc
+
+
+def check_sync_page_count(page_count):
+    if page_count > SYNC_PDF_MAX_PAGES:
+        raise ConverterError(
+            f"{SYNC_PDF_MAX_PAGES} se zyada pages ke liye async=1 ke saath bhejo.", status=413
+        )
+
+
+def parse_page_range(spec, page_count):
+    # "1-3,5,8-" jaisa input; khaali spec = saare pages. 0-based sorted indexes return karta hai.
+    spec = (spec or "").replace(" ", "")
+    if not spec:
+        return list(range(page_count))
+    indexes = set()
+    for part in spec.split(","):
+        if not part:
+            continue
+        start_text, sep, end_text = part.partition("-")
+        try:
+            start = int(start_text) if start_text else 1
+            end = (int(end_text) if end_text else page_count) if sep else start
+        except ValueError:
+            raise ConverterError("Page range galat hai. Example: 1-3,5")
+        if start < 1 or end < start or start > page_count:
+            raise ConverterError(f"Page range galat hai. PDF me {page_count} pages hain.")
+        indexes.update(range(start - 1, min(end, page_count)))
+    if not indexes:
+        raise ConverterError("Page range galat hai. Example: 1-3,5")
+    return sorted(indexes)
+
+
+def pdf_page_count(path):
+    doc = _open_pdf(path)
+    try:
+        return doc.page_count
+    finally:
+        doc.close()
+
+
+def _render_page(doc, idx, ext, dpi):
+    pix = doc.load_page(idx).get_pixmap(dpi=dpi, alpha=False)
+    return f"page_{idx + 1}.{ext}", pix.tobytes("jpeg" if ext == "jpg" else "png")
+
+
+def render_pdf_pages(path, page_indexes, ext, dpi):
+    # Har chunk apna handle kholta/band karta hai; spool file delete hone ke baad worker me PDF khula na rahe.
+    doc = _open_pdf(path)
+    try:
+        return [_render_page(doc, idx, ext, dpi) for idx in page_indexes]
+    except ConverterError:
+        raise
+    except Exception:
+        raise ConverterError("PDF page render nahi ho paya.", status=500)
+    finally:
+        doc.close()
+
+
+def pdf_to_images(data, ext, pages="", dpi=PDF_RENDER_DEFAULT_DPI):
+    # Background job wala path: ek hi worker me render, sirf range + dpi apply hota hai.
+    doc = _open_pdf(data)
+    try:
+        page_indexes = parse_page_range(pages, doc.page_count)
+        zip_bytes = b"".join(stream_zip_members(_render_page(doc, idx, ext, dpi) for idx in page_indexes))
+    except ConverterError:
+        raise
+    except Exception:
+        raise ConverterError("PDF page render nahi ho paya.", status=500)
+    finally:
+        doc.close()
+
+    return converter_result(
+        zip_bytes,
+        "application/zip",
+        {
+            "Content-Disposition": 'attachment; filename="pdf_pages_images.zip"',
+            "X-Output-Name": "pdf_pages_images.zip",
+            "X-Output-Size": str(len(zip_bytes)),
+            "X-Output-Pages": str(len(page_indexes)),
+        },
+    )
+
+
+def _ocr_image(image, lang):
+    try:
+        import pytesseract
+    except Exception:
+        raise ConverterError("OCR dependency missing hai (pytesseract). Install hone ke baad OCR chalega.")
+    try:
+        return pytesseract.image_to_string(image, lang=lang) or ""
+    except Exception:
+        raise ConverterError("OCR process fail ho gaya.", status=500)
+
+
+def _ocr_pdf_page(doc, idx, lang):
+    try:
+        pix = doc.load_page(idx).get_pixmap(alpha=False)
+        image = Image.open(io.BytesIO(pix.tobytes("png"))).convert("RGB")
+    except Exception:
+        raise ConverterError("PDF read nahi hui.")
+    return _ocr_image(image, lang)
+
+
+def ocr_result(page_texts):
+    # Single page/image ka response pehle jaisa; multi-page me per-page text bhi milta hai.
+    text = "\n\n".join(page_texts)
+    payload = {"text": text, "chars": len(text)}
+    if len(page_texts) > 1:
+        payload["pages"] = [{"page": idx + 1, "text": page_text} for idx, page_text in enumerate(page_texts)]
+    return converter_result(json.dumps(payload).encode("utf-8"), "application/json")
+
+
+def ocr_pdf_pages(path, page_indexes, lang):
+    doc = _open_pdf(path)
+    try:
+        return [_ocr_pdf_page(doc, idx, lang) for idx in page_indexes]
+    finally:
+        doc.close()
+
+
+def ocr_text(data, content_type, lang, all_pages=False):
+    if content_type.startswith("image/"):
+        try:
+            image = _open_image_from_upload(io.BytesIO(data))
+        except Exception:
+            raise ConverterError("Image read nahi hui.")
+        return ocr_result([_ocr_image(image, lang)])
+
+    doc = _open_pdf(data)
+    try:
+        page_indexes = range(doc.page_count) if all_pages else [0]
+        return ocr_result([_ocr_pdf_page(doc, idx, lang) for idx in page_indexes])
+    finally:
+        doc.close()
@@ -0,0 +1,321 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from django.conf import settings
+
+from .converters import ConverterError, converter_result
+
+
+JOB_RESULT_TTL_SECONDS = 60 * 60
+JOB_SWEEP_INTERVAL_SECONDS = 5 * 60
+JOB_WAIT_TIMEOUT_SECONDS = 120
+# Itni der pending job ka matlab: worker restart/crash me callback kho gaya; status failed dikhayenge.
+JOB_PENDING_DEADLINE_SECONDS = 10 * 60
+RESULT_CACHE_DIRNAME = "cache"
+
+_executor = None
+_executor_lock = threading.Lock()
+_inflight = set()
+_last_sweep = 0.0
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+def _job_dir():
+    path = Path(settings.CONVERTER_JOB_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn: gunicorn/ASGI threads ke beech fork safe nahi; converters module Django-free hai.
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.CONVERTER_POOL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def _discard_broken_executor(exc):
+    # Worker crash (jaise OOM) ke baad pool kaam ka nahi rehta; agli job naya pool banayegi.
+    global _executor
+    if isinstance(exc, BrokenProcessPool):
+        with _executor_lock:
+            _executor = None
+
+
+def _reserve_slot(job_id):
+    with _executor_lock:
+        if len(_inflight) >= settings.CONVERTER_MAX_PENDING_JOBS:
+            raise JobQueueFull()
+        _inflight.add(job_id)
+
+
+def _release_slot(job_id):
+    with _executor_lock:
+        _inflight.discard(job_id)
+
+
+def _release_when_done(job_id, futures):
+    # Timeout ke baad bhi worker process task chalata rehta hai; slot tab tak pakda rehta hai
+    # jab tak sab futures sach me khatam na ho jayen, warna pool queue bina limit ke badhti.
+    remaining = [future for future in futures if not future.done()]
+    if not remaining:
+        _release_slot(job_id)
+        return
+    counter = {"left": len(remaining)}
+    lock = threading.Lock()
+
+    def _done(_future):
+        with lock:
+            counter["left"] -= 1
+            last = counter["left"] == 0
+        if last:
+            _release_slot(job_id)
+
+    for future in remaining:
+        future.add_done_callback(_done)
+
+
+def _write_atomic(path, data):
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+def _write_meta(job_id, meta):
+    _write_atomic(_job_dir() / f"{job_id}.json", json.dumps(meta).encode("utf-8"))
+
+
+def _read_meta(job_id):
+    try:
+        return json.loads((_job_dir() / f"{job_id}.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _sweep_expired():
+    global _last_sweep
+    now = time.time()
+    if now - _last_sweep < JOB_SWEEP_INTERVAL_SECONDS:
+        return
+    _last_sweep = now
+    for path in _job_dir().iterdir():
+        if path.name == RESULT_CACHE_DIRNAME:
+            continue
+        try:
+            if now - path.stat().st_mtime > JOB_RESULT_TTL_SECONDS:
+                path.unlink()
+        except OSError:
+            pass
+
+
+def _cache_dir():
+    path = _job_dir() / RESULT_CACHE_DIRNAME
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def result_cache_key(kind, data, *params):
+    # Input bytes ka SHA-256 + options; same file dobara aaye to naam kuch bhi ho, hit milega.
+    digest = hashlib.sha256(data).hexdigest()
+    options = hashlib.sha256("|".join(str(param) for param in params).encode("utf-8")).hexdigest()[:16]
+    return f"{kind}-{digest}-{options}"
+
+
+def cached_result(cache_key):
+    meta_path = _cache_dir() / f"{cache_key}.json"
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        body = (_cache_dir() / f"{cache_key}.bin").read_bytes()
+        # mtime hi LRU recency hai; hit par touch karte hain.
+        os.utime(meta_path)
+    except (OSError, ValueError):
+        return None
+    headers = {**(meta.get("headers") or {}), "X-Converter-Cache": "hit"}
+    return converter_result(body, meta.get("content_type", ""), headers)
+
+
+def _evict_cache():
+    entries = []
+    total = 0
+    for meta_path in _cache_dir().glob("*.json"):
+        body_path = meta_path.with_suffix(".bin")
+        try:
+            meta_stat = meta_path.stat()
+            size = meta_stat.st_size + body_path.stat().st_size
+        except OSError:
+            continue
+        entries.append((meta_stat.st_mtime, size, meta_path, body_path))
+        total += size
+    if total <= settings.CONVERTER_RESULT_CACHE_MAX_BYTES:
+        return
+    entries.sort(key=lambda entry: entry[0])
+    for _mtime, size, meta_path, body_path in entries:
+        if total <= settings.CONVERTER_RESULT_CACHE_MAX_BYTES:
+            break
+        meta_path.unlink(missing_ok=True)
+        body_path.unlink(missing_ok=True)
+        total -= size
+
+
+def store_cached_result(cache_key, result):
+    try:
+        # Pehle body, phir meta: meta dikhe to body poori likhi ja chuki hoti hai.
+        _write_atomic(_cache_dir() / f"{cache_key}.bin", result["body"])
+        _write_atomic(
+            _cache_dir() / f"{cache_key}.json",
+            json.dumps({"content_type": result["content_type"], "headers": result["headers"]}).encode("utf-8"),
+        )
+        _evict_cache()
+    except OSError:
+        pass
+
+
+def _failure(exc):
+    if isinstance(exc, ConverterError):
+        return {"error": exc.message, "http_status": exc.status}
+    return {"error": "Converter job fail ho gaya.", "http_status": 500}
+
+
+def _store_outcome(job_id, meta, future, cache_key=None):
+    _release_slot(job_id)
+    exc = future.exception()
+    if exc is not None:
+        _discard_broken_executor(exc)
+        _write_meta(job_id, {**meta, "status": "failed", **_failure(exc)})
+        return
+    result = future.result()
+    if cache_key:
+        store_cached_result(cache_key, result)
+    _write_result(job_id, meta, result)
+
+
+def _write_result(job_id, meta, result):
+    _write_atomic(_job_dir() / f"{job_id}.bin", result["body"])
+    _write_meta(
+        job_id,
+        {**meta, "status": "done", "content_type": result["content_type"], "headers": result["headers"]},
+    )
+
+
+def submit_job(owner_id, kind, task, *args, cache_key=None):
+    # Result files job dir me rehte hain, taaki status/result kisi bhi web worker se mil jaye.
+    _sweep_expired()
+    job_id = uuid.uuid4().hex
+    meta = {"id": job_id, "owner": owner_id, "kind": kind, "created": time.time()}
+    cached = cached_result(cache_key) if cache_key else None
+    if cached is not None:
+        # Cache hit par pool tak jaane ki zarurat nahi; job turant done dikhega.
+        _write_result(job_id, meta, cached)
+        return job_id
+    _reserve_slot(job_id)
+    try:
+        _write_meta(job_id, {**meta, "status": "pending"})
+        future = _get_executor().submit(task, *args)
+    except Exception:
+        _release_slot(job_id)
+        raise
+    future.add_done_callback(lambda f: _store_outcome(job_id, meta, f, cache_key))
+    return job_id
+
+
+def run_job(task, *args, cache_key=None):
+    if cache_key:
+        cached = cached_result(cache_key)
+        if cached is not None:
+            return cached
+    job_id = uuid.uuid4().hex
+    _reserve_slot(job_id)
+    try:
+        future = _get_executor().submit(task, *args)
+    except Exception:
+        _release_slot(job_id)
+        raise
+    _release_when_done(job_id, [future])
+    try:
+        result = future.result(timeout=JOB_WAIT_TIMEOUT_SECONDS)
+    except BrokenProcessPool as exc:
+        _discard_broken_executor(exc)
+        raise
+    except FuturesTimeoutError:
+        future.cancel()
+        raise
+    if cache_key:
+        store_cached_result(cache_key, result)
+    return result
+
+
+def map_jobs(task, arg_list):
+    # Pool ke workers jitne hi futures ek saath chalte hain; results order me yield hote hain,
+    # taaki caller stream kar sake aur memory me sirf window bhar ka data rahe.
+    job_id = uuid.uuid4().hex
+    _reserve_slot(job_id)
+    pending = deque()
+    args_iter = iter(arg_list)
+    try:
+        executor = _get_executor()
+        for args in args_iter:
+            pending.append(executor.submit(task, *args))
+            if len(pending) >= settings.CONVERTER_POOL_WORKERS:
+                break
+        while pending:
+            result = pending[0].result(timeout=JOB_WAIT_TIMEOUT_SECONDS)
+            pending.popleft()
+            for args in args_iter:
+                pending.append(executor.submit(task, *args))
+                break
+            yield result
+    except BrokenProcessPool as exc:
+        _discard_broken_executor(exc)
+        raise
+    finally:
+        # Client beech me chala gaya to baaki chunks render karne ka fayda nahi; jo chal rahe hain
+        # unke khatam hone tak slot rehta hai.
+        _release_when_done(job_id, [future for future in pending if not future.cancel()])
+
+
+def spool_input(data, suffix):
+    # Bade input ko har task me pickle karke bhejne ke bajaye ek baar disk pe likhte hain; workers path se kholte hain.
+    _sweep_expired()
+    path = _job_dir() / f"{uuid.uuid4().hex}.in.{suffix}"
+    _write_atomic(path, data)
+    return path
+
+
+def job_status(job_id, owner_id):
+    if not str(job_id).isalnum():
+        return None
+    meta = _read_meta(job_id)
+    if not meta or meta.get("owner") != owner_id:
+        return None
+    if meta.get("status") == "pending" and time.time() - meta.get("created", 0) > JOB_PENDING_DEADLINE_SECONDS:
+        meta = {**meta, "status": "failed", "error": "Conversion me zyada time lag gaya.", "http_status": 504}
+        _write_meta(job_id, meta)
+    return meta
+
+
+def job_result(job_id, owner_id):
+    meta = job_status(job_id, owner_id)
+    if not meta or meta.get("status") != "done":
+        return meta, None
+    try:
+        body = (_job_dir() / f"{job_id}.bin").read_bytes()
+    except OSError:
+        return meta, None
+    return meta, {"body": body, "content_type": meta.get("content_type", ""), "headers": meta.get("headers") or {}}
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import FILE_META_KEYS, ChatMessage, UserDocument, UserProfile, read_file_meta
+
+
+class Command(BaseCommand):
+    help = "Purane photo/signature/documents/chat attachments ka size, dimensions, MIME aur SHA-256 storage se padh kar save karta hai (ek baar chalao)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Jinka metadata pehle se hai unhe bhi dobara padho.")
+        parser.add_argument("--batch-size", type=int, default=200)
+
+    def _backfill(self, queryset, field_name, force, batch_size):
+        if not force:
+            queryset = queryset.filter(**{f"{field_name}_sha256": ""})
+        queryset = queryset.exclude(**{f"{field_name}__isnull": True}).exclude(**{field_name: ""})
+        done = failed = 0
+        for obj in queryset.only("id", field_name).iterator(chunk_size=batch_size):
+            file_field = getattr(obj, field_name)
+            try:
+                meta = read_file_meta(file_field)
+            except Exception as exc:
+                failed += 1
+                self.stderr.write(f"{queryset.model.__name__} #{obj.pk} {field_name}: {file_field.name} ({exc})")
+                continue
+            finally:
+                try:
+                    file_field.close()
+                except Exception:
+                    pass
+            # update() se save() ke side effects (search tokens, chat thread) nahi chalte.
+            queryset.model.objects.filter(pk=obj.pk).update(
+                **{f"{field_name}_{key}": meta[key] for key in FILE_META_KEYS}
+            )
+            done += 1
+        return done, failed
+
+    def handle(self, *args, **options):
+        targets = (
+            (UserProfile.objects.all(), "photo"),
+            (UserProfile.objects.all(), "signature"),
+            (UserDocument.objects.all(), "file"),
+            (ChatMessage.objects.all(), "attachment"),
+        )
+        for queryset, field_name in targets:
+            done, failed = self._backfill(queryset, field_name, options["force"], options["batch_size"])
+            self.stdout.write(
+                self.style.SUCCESS(f"{queryset.model.__name__}.{field_name}: {done} updated, {failed} failed.")
+            )
@@ -0,0 +1,111 @@
+import random
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from PIL import Image, ImageDraw, ImageFilter, ImageOps
+
+from accounts.converters import QUALITY_MIN, encode_image, encode_to_target
+
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp"}
+
+
+def _legacy_encode(image, mime_type, target_bytes, strict=True):
+    # Purana converter loop (96..62 step 2, phir 5% downscale) sirf comparison ke liye.
+    encodes = 0
+    best_bytes, best_size, work = b"", None, image
+    for _ in range(10):
+        local_best = None
+        for q in range(96, QUALITY_MIN - 1, -2):
+            encoded = encode_image(work, mime_type, q)
+            encodes += 1
+            if local_best is None or len(encoded) < len(local_best):
+                local_best = encoded
+            if len(encoded) <= target_bytes:
+                local_best = encoded
+                break
+        if best_size is None or len(local_best) < best_size:
+            best_bytes, best_size = local_best, len(local_best)
+        if len(local_best) <= target_bytes:
+            return local_best, work, encodes
+        if not strict:
+            break
+        w, h = work.size
+        next_size = (max(int(w * 0.95), 120), max(int(h * 0.95), 120))
+        if next_size == work.size:
+            break
+        work = work.resize(next_size, Image.Resampling.LANCZOS)
+    return best_bytes, work, encodes
+
+
+def _synthetic_photo(seed, size=(4000, 3000)):
+    # Phone photo jaisa content: gradient + shapes + sensor noise.
+    rng = random.Random(seed)
+    base = Image.linear_gradient("L").resize(size).convert("RGB")
+    draw = ImageDraw.Draw(base)
+    for _ in range(60):
+        x, y = rng.randrange(size[0]), rng.randrange(size[1])
+        r = rng.randrange(40, 600)
+        color = tuple(rng.randrange(256) for _ in range(3))
+        draw.ellipse((x - r, y - r, x + r, y + r), fill=color)
+    base = base.filter(ImageFilter.GaussianBlur(3))
+    noise = Image.effect_noise(size, 24).convert("RGB")
+    return Image.blend(base, noise, 0.18)
+
+
+class Command(BaseCommand):
+    help = "Document converter ka target-size encoder benchmark: purana ladder vs bisection (encode count + latency)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="*", help="Photo files ya folders. Khali ho to synthetic 12MP corpus.")
+        parser.add_argument("--target-kb", type=int, nargs="+", default=[50, 100, 200])
+        parser.add_argument("--format", choices=["jpeg", "webp"], default="jpeg")
+        parser.add_argument("--synthetic", type=int, default=3, help="Synthetic images jab paths na diye ho.")
+
+    def _corpus(self, options):
+        files = []
+        for raw in options["paths"]:
+            path = Path(raw)
+            if path.is_dir():
+                files.extend(sorted(p for p in path.rglob("*") if p.suffix.lower() in IMAGE_SUFFIXES))
+            elif path.is_file():
+                files.append(path)
+        if not files:
+            for idx in range(options["synthetic"]):
+                yield f"synthetic_{idx}", _synthetic_photo(idx)
+            return
+        for path in files:
+            with Image.open(path) as image:
+                yield path.name, ImageOps.exif_transpose(image).convert("RGB")
+
+    def handle(self, *args, **options):
+        mime_type = f"image/{options['format']}"
+        totals = {"legacy": [0, 0.0], "bisect": [0, 0.0]}
+        row = "{:<22} {:>6} {:>8} {:>9} {:>8} {:>9} {:>9} {:>9}"
+        self.stdout.write(row.format("image", "kb", "old enc", "old ms", "new enc", "new ms", "old kb", "new kb"))
+        for name, image in self._corpus(options):
+            for target_kb in options["target_kb"]:
+                target_bytes = max((target_kb - 1) * 1024, 1024)
+                started = time.perf_counter()
+                old_bytes, _, old_count = _legacy_encode(image, mime_type, target_bytes)
+                old_ms = (time.perf_counter() - started) * 1000
+                started = time.perf_counter()
+                new_bytes, _, new_count = encode_to_target(image, mime_type, target_bytes)
+                new_ms = (time.perf_counter() - started) * 1000
+                totals["legacy"][0] += old_count
+                totals["legacy"][1] += old_ms
+                totals["bisect"][0] += new_count
+                totals["bisect"][1] += new_ms
+                self.stdout.write(
+                    row.format(
+                        name[:22], target_kb, old_count, f"{old_ms:.0f}", new_count, f"{new_ms:.0f}",
+                        len(old_bytes) // 1024, len(new_bytes) // 1024,
+                    )
+                )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Total encodes {totals['legacy'][0]} -> {totals['bisect'][0]}, "
+                f"time {totals['legacy'][1]:.0f}ms -> {totals['bisect'][1]:.0f}ms"
+            )
+        )
@@ -0,0 +1,98 @@
+import os
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+
+from accounts.media import delete_stored_file
+from accounts.models import BLOB_PREFIX, ChatMessage, StoredBlob, UserDocument, blob_storage_name
+
+
+FILE_FIELDS = ((UserDocument, "file"), (ChatMessage, "attachment"))
+
+
+class Command(BaseCommand):
+    help = (
+        "Purane documents/chat attachments ko content hash ke blobs me register karta hai; same content ki "
+        "baaki copies pehli copy par point karke delete hoti hain, aur blobs neutral blobs/<sha256>.<ext> "
+        "naam par move hote hain. Pehle backfill_file_metadata chalao."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Sirf batao kitni copies hatengi, kuch change mat karo.")
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        blob_names = {}
+        registered = repointed = reclaimed = 0
+        for model, field_name in FILE_FIELDS:
+            rows = (
+                model.objects.exclude(**{f"{field_name}_sha256": ""})
+                .exclude(**{f"{field_name}__isnull": True})
+                .exclude(**{field_name: ""})
+                .order_by("id")
+                .values_list("id", field_name, f"{field_name}_sha256", f"{field_name}_size", f"{field_name}_original_name")
+            )
+            for pk, name, sha256, size, original_name in rows.iterator(chunk_size=500):
+                if sha256 not in blob_names:
+                    blob_names[sha256] = StoredBlob.objects.filter(sha256=sha256).values_list("name", flat=True).first()
+                blob_name = blob_names[sha256]
+                if blob_name is None:
+                    # Is content ki pehli copy hi blob ban jati hai.
+                    if not dry_run:
+                        StoredBlob.objects.create(sha256=sha256, name=name, size=size, ref_count=1)
+                    blob_names[sha256] = name
+                    registered += 1
+                    continue
+                if blob_name == name:
+                    continue
+                if not dry_run:
+                    # Apni copy ka naam is row ka asli naam hai; repoint se pehle sambhal lo.
+                    changes = {field_name: blob_name}
+                    if not original_name:
+                        changes[f"{field_name}_original_name"] = os.path.basename(name)[:255]
+                    with transaction.atomic():
+                        model.objects.filter(pk=pk).update(**changes)
+                        StoredBlob.objects.filter(sha256=sha256).update(ref_count=F("ref_count") + 1)
+                        transaction.on_commit(lambda duplicate=name: delete_stored_file(duplicate))
+                repointed += 1
+                reclaimed += size
+        renamed = self._rename_blobs(dry_run)
+        prefix = "[dry-run] " if dry_run else ""
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{prefix}{registered} blobs registered, {repointed} duplicate copies "
+                f"{'would be ' if dry_run else ''}removed ({round(reclaimed / (1024 * 1024), 2)} MB), "
+                f"{renamed} blobs {'would be ' if dry_run else ''}renamed."
+            )
+        )
+
+    def _rename_blobs(self, dry_run):
+        # Purane blob path me pehle uploader ka file naam hai; hash wale naam par copy karke rows repoint karo.
+        renamed = 0
+        blobs = StoredBlob.objects.exclude(name__startswith=f"{BLOB_PREFIX}/").order_by("id")
+        for blob_id, sha256, old_name in blobs.values_list("id", "sha256", "name").iterator(chunk_size=500):
+            new_name = blob_storage_name(sha256, old_name)
+            renamed += 1
+            if dry_run:
+                continue
+            if not default_storage.exists(new_name):
+                try:
+                    with default_storage.open(old_name, "rb") as source:
+                        saved_name = default_storage.save(new_name, source)
+                except OSError:
+                    self.stderr.write(f"Skipped missing blob file: {old_name}")
+                    renamed -= 1
+                    continue
+                if saved_name != new_name:
+                    default_storage.delete(saved_name)
+                    self.stderr.write(f"Skipped blob, could not write {new_name}")
+                    renamed -= 1
+                    continue
+            with transaction.atomic():
+                for model, field_name in FILE_FIELDS:
+                    model.objects.filter(**{field_name: old_name}).update(**{field_name: new_name})
+                StoredBlob.objects.filter(pk=blob_id).update(name=new_name)
+                transaction.on_commit(lambda old=old_name: delete_stored_file(old))
+        return renamed
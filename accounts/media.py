@@ -0,0 +1,254 @@
+import hashlib
+import io
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseRedirect, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date
+from PIL import Image, ImageOps
+
+
+MEDIA_URL_CACHE_SECONDS = 10 * 60
+# Missing file ka result chhota rakhte hain, taaki der se aaya upload jaldi dikhe.
+MEDIA_MISSING_CACHE_SECONDS = 60
+
+# Listing/chat ke liye chhota thumb, preview page ke liye medium; dono original ke bagal me WebP.
+DERIVATIVE_SIZES = {"thumb": 480, "preview": 1280}
+DERIVATIVE_QUALITY = 78
+DERIVATIVE_SOURCE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp")
+DERIVATIVE_SOURCE_PREFIXES = (
+    "blobs/", "profile_documents/", "profile_photos/", "profile_signatures/", "chat_attachments/",
+)
+
+# Ye folders public pages (vacancy/news/payment) par dikhte hain; baaki media sirf owner ya staff ko milta hai.
+PUBLIC_MEDIA_PREFIXES = ("vacancy_images/", "news_images/", "news_pdfs/", "payment_qr/")
+
+MEDIA_RANGE_CHUNK_SIZE = 64 * 1024
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _media_url_key(name):
+    return "portal:media-url:" + hashlib.sha1(name.encode("utf-8")).hexdigest()
+
+
+def forget_media_url(name):
+    if not name:
+        return
+    try:
+        cache.delete(_media_url_key(name))
+    except Exception:
+        pass
+
+
+def storage_url(name, missing_timeout=MEDIA_MISSING_CACHE_SECONDS):
+    # Cloudinary par exists() har baar HTTP call hai; name -> url (missing ho to "") cache me rakhte hain.
+    if not name:
+        return ""
+    key = _media_url_key(name)
+    try:
+        cached = cache.get(key)
+    except Exception:
+        cached = None
+    if cached is not None:
+        return cached
+    try:
+        url = default_storage.url(name) if default_storage.exists(name) else ""
+    except Exception:
+        # Storage error transient ho sakta hai; cache nahi karte.
+        return ""
+    try:
+        cache.set(key, url, MEDIA_URL_CACHE_SECONDS if url else missing_timeout)
+    except Exception:
+        pass
+    return url
+
+
+def safe_media_url(file_field):
+    if not file_field:
+        return ""
+    return storage_url(getattr(file_field, "name", "") or "")
+
+
+def derivative_name(name, size):
+    return f"{name}.{size}.webp"
+
+
+def derivative_source_name(name):
+    # "<original>.thumb.webp" -> "<original>"; derivative ka access original ke owner se tay hota hai.
+    for size in DERIVATIVE_SIZES:
+        suffix = f".{size}.webp"
+        if name.endswith(suffix):
+            return name[: -len(suffix)]
+    return name
+
+
+def supports_derivatives(name):
+    lower_name = (name or "").lower()
+    return (
+        lower_name.startswith(DERIVATIVE_SOURCE_PREFIXES)
+        and lower_name.endswith(DERIVATIVE_SOURCE_EXTENSIONS)
+        and ".." not in lower_name
+    )
+
+
+def _render_derivative(image, max_side):
+    work = image.copy()
+    work.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+    if work.mode not in {"RGB", "RGBA"}:
+        work = work.convert("RGBA" if "transparency" in work.info or work.mode in {"LA", "PA"} else "RGB")
+    output = io.BytesIO()
+    work.save(output, format="WEBP", quality=DERIVATIVE_QUALITY, method=4)
+    return output.getvalue()
+
+
+def build_derivatives(name, source):
+    # Upload par original abhi local memory/temp file me khula hota hai; lazy path storage se kholta hai.
+    if not supports_derivatives(name):
+        return
+    source.seek(0)
+    with Image.open(source) as image:
+        # JPEG ko decode karte waqt hi chhota karwa lete hain; 12MP photo poora decode nahi hota.
+        image.draft("RGB", (max(DERIVATIVE_SIZES.values()),) * 2)
+        image = ImageOps.exif_transpose(image)
+        for size, max_side in DERIVATIVE_SIZES.items():
+            target = derivative_name(name, size)
+            data = _render_derivative(image, max_side)
+            if default_storage.exists(target):
+                default_storage.delete(target)
+            default_storage.save(target, ContentFile(data))
+            forget_media_url(target)
+    source.seek(0)
+
+
+def derivative_url(name, size):
+    # Derivative pata ho to seedha storage URL, warna lazy endpoint jo pehli request par bana deta hai.
+    if not name or size not in DERIVATIVE_SIZES or not supports_derivatives(name):
+        return ""
+    # Missing derivative tab tak missing hi rehta hai jab tak build_derivatives use bana kar forget na kare;
+    # isliye miss bhi bina expiry cache hota hai, warna purane uploads par har page load exists() karta.
+    url = storage_url(derivative_name(name, size), missing_timeout=None)
+    return url or reverse("media_derivative", args=[size, name])
+
+
+def delete_stored_file(name):
+    # Blob ka aakhri reference gaya: original ke saath uske derivatives bhi hatao.
+    if not name:
+        return
+    for target in [name] + [derivative_name(name, size) for size in DERIVATIVE_SIZES]:
+        try:
+            default_storage.delete(target)
+        except Exception:
+            pass
+        forget_media_url(target)
+
+
+def _local_media_path(name):
+    try:
+        return default_storage.path(name)
+    except NotImplementedError:
+        return None
+    except SuspiciousFileOperation:
+        raise Http404
+
+
+def _parse_range(header, size):
+    # Sirf single range; multi-range (comma wala) par poori file bhejte hain, jo spec me allowed hai.
+    match = _RANGE_RE.match(header.replace(" ", ""))
+    if not match or not any(match.groups()):
+        return None
+    start_text, end_text = match.groups()
+    if start_text:
+        start = int(start_text)
+        end = min(int(end_text), size - 1) if end_text else size - 1
+    else:
+        start = max(size - int(end_text), 0)
+        end = size - 1
+    if start > end or start >= size:
+        return False
+    return start, end
+
+
+def _file_range_iter(path, start, length):
+    with open(path, "rb") as handle:
+        handle.seek(start)
+        while length > 0:
+            chunk = handle.read(min(MEDIA_RANGE_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def _ranged_file_response(request, path, content_type, download_name, as_attachment):
+    stat = os.stat(path)
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    last_modified = int(stat.st_mtime)
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    size = stat.st_size
+    byte_range = None
+    if request.headers.get("Range") and request.headers.get("If-Range", etag) == etag:
+        byte_range = _parse_range(request.headers["Range"], size)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+    if byte_range:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            _file_range_iter(path, start, end - start + 1), status=206, content_type=content_type
+        )
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = str(end - start + 1)
+        if download_name or as_attachment:
+            response["Content-Disposition"] = content_disposition_header(
+                as_attachment, download_name or os.path.basename(path)
+            )
+    else:
+        response = FileResponse(
+            open(path, "rb"), content_type=content_type, as_attachment=as_attachment, filename=download_name or ""
+        )
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    return response
+
+
+def media_file_response(request, name, download_name="", as_attachment=False):
+    # Permission check caller (view) karta hai; yahan sirf transfer kisko dena hai wo decide hota hai.
+    path = _local_media_path(name)
+    if path is None:
+        # Remote storage (Cloudinary): Python se proxy karne ke bajaye seedha CDN par bhejo.
+        url = storage_url(name)
+        if not url:
+            raise Http404
+        return HttpResponseRedirect(url)
+    if not os.path.isfile(path):
+        raise Http404
+    content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    backend = settings.MEDIA_DELIVERY
+    if backend == "django":
+        return _ranged_file_response(request, path, content_type, download_name, as_attachment)
+
+    # Front server (nginx/apache) file bhejta hai, Range/304 bhi wahi sambhalta hai; worker turant free.
+    response = HttpResponse(content_type=content_type)
+    if backend == "x-accel":
+        response["X-Accel-Redirect"] = settings.MEDIA_ACCEL_PREFIX.rstrip("/") + "/" + quote(name)
+    else:
+        response["X-Sendfile"] = path
+    if download_name or as_attachment:
+        response["Content-Disposition"] = content_disposition_header(
+            as_attachment, download_name or os.path.basename(path)
+        )
+    return response
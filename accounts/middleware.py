@@ -1,18 +1,61 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.conf import settings
+from django.contrib import messages
 from django.contrib.auth.views import redirect_to_login
-from django.http import Http404
+from django.http import Http404, HttpResponse, JsonResponse
+from django.shortcuts import redirect
+from django.utils.deprecation import MiddlewareMixin
+
+from .models import MobileAlreadyRegistered
+
+
+def _is_admin_path(path):
+    return path == "/admin" or path.startswith("/admin/")
 
 
 class AdminAccessMiddleware:
+    # Async bhi: ASGI par sync middleware har request (chat long-poll bhi) ke liye thread pakad leta.
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _check(self, request, user):
+        if not user or not user.is_authenticated:
+            return redirect_to_login(request.get_full_path(), settings.LOGIN_URL)
+        if not (user.is_staff or user.is_superuser):
+            raise Http404("Page not found")
+        return None
 
     def __call__(self, request):
-        path = request.path or ""
-        if path == "/admin" or path.startswith("/admin/"):
-            user = getattr(request, "user", None)
-            if not user or not user.is_authenticated:
-                return redirect_to_login(request.get_full_path(), settings.LOGIN_URL)
-            if not (user.is_staff or user.is_superuser):
-                raise Http404("Page not found")
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if _is_admin_path(request.path or ""):
+            denied = self._check(request, getattr(request, "user", None))
+            if denied is not None:
+                return denied
         return self.get_response(request)
+
+    async def __acall__(self, request):
+        if _is_admin_path(request.path or ""):
+            denied = self._check(request, await request.auser())
+            if denied is not None:
+                return denied
+        return await self.get_response(request)
+
+
+class MobileConflictMiddleware(MiddlewareMixin):
+    # Mobile ka unique index kisi bhi save path (wizard, admin, API) par takraye to 500 ke bajaye message.
+    def process_exception(self, request, exception):
+        if not isinstance(exception, MobileAlreadyRegistered):
+            return None
+        message = str(exception)
+        if request.headers.get("x-requested-with") == "XMLHttpRequest":
+            return JsonResponse({"ok": False, "error": message}, status=409)
+        if request.method != "POST":
+            return HttpResponse(message, status=409)
+        messages.error(request, message)
+        return redirect(request.get_full_path())
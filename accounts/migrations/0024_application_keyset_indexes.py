@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0023_userprofile_apply_draft_data"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="application",
+            index=models.Index(fields=["applied_at", "id"], name="application_applied_keyset"),
+        ),
+        migrations.AddIndex(
+            model_name="application",
+            index=models.Index(fields=["status", "applied_at", "id"], name="application_status_keyset"),
+        ),
+    ]
@@ -0,0 +1,64 @@
+import json
+
+from django.db import migrations, models
+
+
+PAYLOAD_MARKER = "Payload JSON:"
+GIN_INDEX_NAME = "application_payload_gin"
+
+
+def backfill_payload(apps, schema_editor):
+    Application = apps.get_model("accounts", "Application")
+    qs = Application.objects.filter(remarks__contains=PAYLOAD_MARKER).only("id", "remarks")
+    for app in qs.iterator(chunk_size=500):
+        idx = app.remarks.find(PAYLOAD_MARKER)
+        json_text = app.remarks[idx + len(PAYLOAD_MARKER):].strip()
+        try:
+            parsed = json.loads(json_text)
+        except (TypeError, ValueError):
+            # 4000 char truncation wale rows parse nahi hote; unka remarks as-is rehne do.
+            continue
+        if not isinstance(parsed, dict):
+            continue
+        Application.objects.filter(id=app.id).update(
+            payload=parsed,
+            remarks=app.remarks[:idx].strip(),
+        )
+
+
+def restore_remarks(apps, schema_editor):
+    Application = apps.get_model("accounts", "Application")
+    for app in Application.objects.exclude(payload={}).only("id", "remarks", "payload").iterator(chunk_size=500):
+        payload_line = PAYLOAD_MARKER + " " + json.dumps(app.payload, ensure_ascii=True)
+        Application.objects.filter(id=app.id).update(remarks=(app.remarks + "\n" + payload_line)[:4000])
+
+
+def create_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {GIN_INDEX_NAME} ON accounts_application USING gin (payload jsonb_path_ops)"
+    )
+
+
+def drop_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {GIN_INDEX_NAME}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0024_application_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="application",
+            name="payload",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.RunPython(backfill_payload, restore_remarks),
+        migrations.RunPython(create_gin_index, drop_gin_index),
+    ]
@@ -0,0 +1,116 @@
+import django.db.models.deletion
+from django.db import DatabaseError, migrations, models, transaction
+
+TRGM_INDEX_NAME = "userprofile_search_trgm"
+BACKFILL_BATCH_SIZE = 1000
+SEARCH_TOKEN_MAX_LENGTH = 64
+
+
+# Helpers is migration ke waqt jaise the waise hi copy kiye hain; models.py badle to bhi backfill same rahe.
+def normalize_mobile(value):
+    return "".join(ch for ch in str(value or "") if ch.isdigit())
+
+
+def normalize_search_text(value):
+    text = str(value or "").lower()
+    return " ".join("".join(ch if ch.isalnum() else " " for ch in text).split())
+
+
+def profile_search_tokens(full_name, username, mobile):
+    tokens = set()
+    for source in (full_name, username):
+        words = normalize_search_text(source).split()
+        tokens.update(words)
+        for start in range(len(words)):
+            tokens.add("".join(words[start:]))
+    digits = normalize_mobile(mobile)
+    if digits:
+        tokens.add(digits)
+        tokens.add(digits[-10:])
+    return {token[:SEARCH_TOKEN_MAX_LENGTH] for token in tokens if token}
+
+
+def profile_search_text(full_name, username, mobile):
+    digits = normalize_mobile(mobile)
+    return " ".join(
+        part for part in (normalize_search_text(full_name), normalize_search_text(username), digits) if part
+    )[:255]
+
+
+def backfill_search(apps, schema_editor):
+    UserProfile = apps.get_model("accounts", "UserProfile")
+    ProfileSearchToken = apps.get_model("accounts", "ProfileSearchToken")
+    rows = UserProfile.objects.values_list("id", "full_name", "user__username", "mobile").order_by("id")
+    profiles, tokens = [], []
+    for profile_id, full_name, username, mobile in rows.iterator(chunk_size=BACKFILL_BATCH_SIZE):
+        profiles.append(UserProfile(id=profile_id, search_text=profile_search_text(full_name, username, mobile)))
+        tokens.extend(
+            ProfileSearchToken(profile_id=profile_id, token=token)
+            for token in profile_search_tokens(full_name, username, mobile)
+        )
+        if len(profiles) >= BACKFILL_BATCH_SIZE:
+            UserProfile.objects.bulk_update(profiles, ["search_text"])
+            ProfileSearchToken.objects.bulk_create(tokens, ignore_conflicts=True)
+            profiles, tokens = [], []
+    if profiles:
+        UserProfile.objects.bulk_update(profiles, ["search_text"])
+        ProfileSearchToken.objects.bulk_create(tokens, ignore_conflicts=True)
+
+
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    # pg_trgm ke liye extension permission chahiye; na mile to token index se kaam chalega.
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            schema_editor.execute(
+                f"CREATE INDEX IF NOT EXISTS {TRGM_INDEX_NAME} "
+                "ON accounts_userprofile USING gin (search_text gin_trgm_ops)"
+            )
+    except DatabaseError:
+        pass
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {TRGM_INDEX_NAME}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0025_application_payload"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userprofile",
+            name="search_text",
+            field=models.CharField(blank=True, default="", max_length=255),
+        ),
+        migrations.CreateModel(
+            name="ProfileSearchToken",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("token", models.CharField(max_length=64)),
+                (
+                    "profile",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="search_tokens",
+                        to="accounts.userprofile",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [models.Index(fields=["token"], name="profile_search_token_idx")],
+                "constraints": [
+                    models.UniqueConstraint(fields=("profile", "token"), name="unique_profile_search_token")
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_search, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,79 @@
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Q
+
+
+def backfill_threads(apps, schema_editor):
+    ChatMessage = apps.get_model("accounts", "ChatMessage")
+    ChatThread = apps.get_model("accounts", "ChatThread")
+    summary = (
+        ChatMessage.objects.values("profile_id")
+        .annotate(
+            last_id=Max("id"),
+            message_count=Count("id"),
+            last_admin_id=Max("id", filter=Q(from_admin=True)),
+        )
+        .order_by()
+    )
+    threads = []
+    for row in summary.iterator(chunk_size=1000):
+        # Purane threads me admin ka last reply tak sab "read" maana hai.
+        read_id = row["last_admin_id"] or 0
+        last = ChatMessage.objects.only("id", "created_at").get(id=row["last_id"])
+        threads.append(
+            ChatThread(
+                profile_id=row["profile_id"],
+                last_message_id=last.id,
+                last_message_at=last.created_at,
+                message_count=row["message_count"],
+                admin_read_id=read_id,
+                unread_count=ChatMessage.objects.filter(
+                    profile_id=row["profile_id"], from_admin=False, id__gt=read_id
+                ).count(),
+            )
+        )
+        if len(threads) >= 500:
+            ChatThread.objects.bulk_create(threads, ignore_conflicts=True)
+            threads = []
+    if threads:
+        ChatThread.objects.bulk_create(threads, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0026_profile_search"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChatThread",
+            fields=[
+                (
+                    "profile",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="chat_thread",
+                        serialize=False,
+                        to="accounts.userprofile",
+                    ),
+                ),
+                ("last_message_at", models.DateTimeField(blank=True, null=True)),
+                ("message_count", models.PositiveIntegerField(default=0)),
+                ("unread_count", models.PositiveIntegerField(default=0)),
+                ("admin_read_id", models.PositiveBigIntegerField(default=0)),
+                (
+                    "last_message",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="accounts.chatmessage",
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunPython(backfill_threads, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+from django.db import migrations, models
+
+
+def normalize_mobile(value):
+    # accounts.models.normalize_mobile ki copy; migration ka behaviour live code se na badle.
+    return "".join(ch for ch in str(value or "") if ch.isdigit())
+
+
+def backfill_mobile_key(apps, schema_editor):
+    UserProfile = apps.get_model("accounts", "UserProfile")
+    seen = set()
+    batch = []
+    rows = UserProfile.objects.exclude(mobile="").values_list("id", "mobile").order_by("id")
+    for profile_id, mobile in rows.iterator(chunk_size=1000):
+        key = normalize_mobile(mobile)
+        # Duplicate number par pehla (sabse purana) profile hi key rakhta hai,
+        # wahi profile purana lookup bhi lauta raha tha.
+        if not key or key in seen:
+            continue
+        seen.add(key)
+        batch.append(UserProfile(id=profile_id, mobile_key=key))
+        if len(batch) >= 1000:
+            UserProfile.objects.bulk_update(batch, ["mobile_key"])
+            batch = []
+    if batch:
+        UserProfile.objects.bulk_update(batch, ["mobile_key"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0027_chat_thread"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userprofile",
+            name="mobile_key",
+            field=models.CharField(blank=True, editable=False, max_length=15, null=True),
+        ),
+        migrations.RunPython(backfill_mobile_key, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="userprofile",
+            name="mobile_key",
+            field=models.CharField(blank=True, editable=False, max_length=15, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,88 @@
+from django.db import migrations, models
+
+
+# Purane files ka metadata `manage.py backfill_file_metadata` se bharta hai (storage se padhna padta hai,
+# isliye migration me nahi).
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0028_userprofile_mobile_key"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userprofile",
+            name="photo_size",
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="userprofile",
+            name="photo_width",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="userprofile",
+            name="photo_height",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="userprofile",
+            name="photo_mime",
+            field=models.CharField(blank=True, default="", editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name="userprofile",
+            name="photo_sha256",
+            field=models.CharField(blank=True, default="", editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="userprofile",
+            name="signature_size",
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="userprofile",
+            name="signature_width",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="userprofile",
+            name="signature_height",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="userprofile",
+            name="signature_mime",
+            field=models.CharField(blank=True, default="", editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name="userprofile",
+            name="signature_sha256",
+            field=models.CharField(blank=True, default="", editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="userdocument",
+            name="file_size",
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="userdocument",
+            name="file_width",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="userdocument",
+            name="file_height",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="userdocument",
+            name="file_mime",
+            field=models.CharField(blank=True, default="", editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name="userdocument",
+            name="file_sha256",
+            field=models.CharField(blank=True, default="", editable=False, max_length=64),
+        ),
+    ]
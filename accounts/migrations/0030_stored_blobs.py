@@ -0,0 +1,61 @@
+import accounts.models
+from django.db import migrations, models
+
+
+# Purane files `manage.py backfill_file_metadata` aur phir `manage.py dedupe_media_blobs` se blobs me aate hain.
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0029_file_metadata"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StoredBlob",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("sha256", models.CharField(max_length=64, unique=True)),
+                ("name", models.CharField(max_length=255)),
+                ("size", models.PositiveBigIntegerField(default=0)),
+                ("ref_count", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="chatmessage",
+            name="attachment_size",
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="chatmessage",
+            name="attachment_width",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="chatmessage",
+            name="attachment_height",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="chatmessage",
+            name="attachment_mime",
+            field=models.CharField(blank=True, default="", editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name="chatmessage",
+            name="attachment_sha256",
+            field=models.CharField(blank=True, default="", editable=False, max_length=64),
+        ),
+        migrations.AlterField(
+            model_name="chatmessage",
+            name="attachment",
+            field=models.FileField(
+                blank=True, max_length=255, null=True, upload_to=accounts.models.chat_attachment_upload_to
+            ),
+        ),
+        migrations.AlterField(
+            model_name="userdocument",
+            name="file",
+            field=models.FileField(max_length=255, upload_to=accounts.models.document_upload_to),
+        ),
+    ]
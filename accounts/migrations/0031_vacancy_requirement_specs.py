@@ -0,0 +1,51 @@
+from django.db import migrations, models
+
+
+# accounts.models ke parser ki copy; baad me live parser badle to bhi ye migration wahi specs banaye.
+REQUIREMENT_KIND_PREFIXES = (("DATA|", "Data"), ("PHOTO|", "Photo"), ("DOC|", "Document"))
+
+
+def parse_requirement(raw_value):
+    value = str(raw_value or "").strip()
+    for prefix, kind in REQUIREMENT_KIND_PREFIXES:
+        if value.startswith(prefix):
+            return kind, value[len(prefix):].strip()
+    return "Document", value
+
+
+def build_requirement_specs(required_documents):
+    specs = []
+    for idx, raw_value in enumerate(required_documents or []):
+        kind, name = parse_requirement(raw_value)
+        if name:
+            specs.append({"idx": idx, "kind": kind, "name": name, "key": name.lower()})
+    return specs
+
+
+def backfill_requirement_specs(apps, schema_editor):
+    Vacancy = apps.get_model("accounts", "Vacancy")
+    batch = []
+    for vacancy in Vacancy.objects.only("id", "required_documents").iterator(chunk_size=500):
+        vacancy.required_document_specs = build_requirement_specs(vacancy.required_documents)
+        batch.append(vacancy)
+        if len(batch) >= 500:
+            Vacancy.objects.bulk_update(batch, ["required_document_specs"])
+            batch = []
+    if batch:
+        Vacancy.objects.bulk_update(batch, ["required_document_specs"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0030_stored_blobs"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="vacancy",
+            name="required_document_specs",
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.RunPython(backfill_requirement_specs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+import os
+
+from django.db import migrations, models
+
+
+FILE_FIELDS = (("UserDocument", "file"), ("ChatMessage", "attachment"))
+
+
+def backfill_original_names(apps, schema_editor):
+    # Jis path par ek se zyada rows hain (0030 dedupe), uska naam pehle uploader ka hai; baaki rows ka
+    # asli naam ab pata nahi, isliye unhe khali chhodte hain (display neutral naam dikhata hai).
+    seen = set()
+    for model_name, field_name in FILE_FIELDS:
+        Model = apps.get_model("accounts", model_name)
+        target = f"{field_name}_original_name"
+        rows = (
+            Model.objects.exclude(**{f"{field_name}__isnull": True})
+            .exclude(**{field_name: ""})
+            .order_by("id")
+            .values_list("id", field_name)
+        )
+        batch = []
+        for pk, name in rows.iterator(chunk_size=500):
+            if name in seen:
+                continue
+            seen.add(name)
+            batch.append(Model(id=pk, **{target: os.path.basename(name)[:255]}))
+            if len(batch) >= 500:
+                Model.objects.bulk_update(batch, [target])
+                batch = []
+        if batch:
+            Model.objects.bulk_update(batch, [target])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0031_vacancy_requirement_specs"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userdocument",
+            name="file_original_name",
+            field=models.CharField(blank=True, default="", editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name="chatmessage",
+            name="attachment_original_name",
+            field=models.CharField(blank=True, default="", editable=False, max_length=255),
+        ),
+        migrations.RunPython(backfill_original_names, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0032_stored_file_original_names"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="chatthread",
+            index=models.Index(fields=["-last_message_at", "-profile"], name="chat_thread_inbox_idx"),
+        ),
+    ]
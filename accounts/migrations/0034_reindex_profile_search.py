@@ -0,0 +1,73 @@
+import unicodedata
+
+from django.db import migrations
+
+BACKFILL_BATCH_SIZE = 1000
+SEARCH_TOKEN_MAX_LENGTH = 64
+
+
+# 0026 ke tokens isalnum() se bane the, jo Devanagari matra par naam tod deta tha; yahan nayi
+# tokenizer ki copy se search_text aur tokens dobara banate hain.
+def normalize_mobile(value):
+    return "".join(ch for ch in str(value or "") if ch.isdigit())
+
+
+def normalize_search_text(value):
+    text = str(value or "").lower()
+    return " ".join("".join(ch if unicodedata.category(ch)[0] in "LMN" else " " for ch in text).split())
+
+
+def profile_search_tokens(full_name, username, mobile):
+    tokens = set()
+    for source in (full_name, username):
+        words = normalize_search_text(source).split()
+        tokens.update(words)
+        for start in range(len(words)):
+            tokens.add("".join(words[start:]))
+    digits = normalize_mobile(mobile)
+    if digits:
+        tokens.add(digits)
+        tokens.add(digits[-10:])
+    return {token[:SEARCH_TOKEN_MAX_LENGTH] for token in tokens if token}
+
+
+def profile_search_text(full_name, username, mobile):
+    digits = normalize_mobile(mobile)
+    return " ".join(
+        part for part in (normalize_search_text(full_name), normalize_search_text(username), digits) if part
+    )[:255]
+
+
+def _flush(UserProfile, ProfileSearchToken, profiles, tokens):
+    UserProfile.objects.bulk_update(profiles, ["search_text"])
+    ProfileSearchToken.objects.filter(profile_id__in=[profile.id for profile in profiles]).delete()
+    ProfileSearchToken.objects.bulk_create(tokens, ignore_conflicts=True)
+
+
+def reindex_search(apps, schema_editor):
+    UserProfile = apps.get_model("accounts", "UserProfile")
+    ProfileSearchToken = apps.get_model("accounts", "ProfileSearchToken")
+    rows = UserProfile.objects.values_list("id", "full_name", "user__username", "mobile").order_by("id")
+    profiles, tokens = [], []
+    for profile_id, full_name, username, mobile in rows.iterator(chunk_size=BACKFILL_BATCH_SIZE):
+        profiles.append(UserProfile(id=profile_id, search_text=profile_search_text(full_name, username, mobile)))
+        tokens.extend(
+            ProfileSearchToken(profile_id=profile_id, token=token)
+            for token in profile_search_tokens(full_name, username, mobile)
+        )
+        if len(profiles) >= BACKFILL_BATCH_SIZE:
+            _flush(UserProfile, ProfileSearchToken, profiles, tokens)
+            profiles, tokens = [], []
+    if profiles:
+        _flush(UserProfile, ProfileSearchToken, profiles, tokens)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0033_chat_thread_inbox_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(reindex_search, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,225 @@
-from django.db import models
+import hashlib
+import mimetypes
+import os
+import unicodedata
+
+from django.db import IntegrityError, models, transaction
 from django.contrib.auth.models import User
-from django.db.models import Sum
+from django.db.models import F, Sum
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from PIL import Image
+
+from .media import build_derivatives, delete_stored_file, forget_media_url
+from .snapshots import bump_snapshot, cached_snapshot
+
+
+SEARCH_SOURCE_FIELDS = {"full_name", "mobile"}
+SEARCH_TOKEN_MAX_LENGTH = 64
+
+
+def normalize_mobile(value):
+    return "".join(ch for ch in str(value or "") if ch.isdigit())
+
+
+class MobileAlreadyRegistered(IntegrityError):
+    pass
+
+
+_MOBILE_DEFERRED = object()
+
+
+REQUIREMENT_KIND_PREFIXES = (("DATA|", "Data"), ("PHOTO|", "Photo"), ("DOC|", "Document"))
+
+
+def parse_requirement(raw_value):
+    value = str(raw_value or "").strip()
+    for prefix, kind in REQUIREMENT_KIND_PREFIXES:
+        if value.startswith(prefix):
+            return kind, value[len(prefix):].strip()
+    return "Document", value
+
+
+def build_requirement_specs(required_documents):
+    # "DOC|Marksheet" jaise strings save ke waqt hi parse: idx (form input names), kind, display name, match key.
+    specs = []
+    for idx, raw_value in enumerate(required_documents or []):
+        kind, name = parse_requirement(raw_value)
+        if name:
+            specs.append({"idx": idx, "kind": kind, "name": name, "key": name.lower()})
+    return specs
+
+
+VACANCY_CATALOG_SNAPSHOT = "vacancy_catalog"
+DOCUMENT_RULES_SNAPSHOT = "document_rules"
+MASTER_FIELDS_SNAPSHOT = "master_data_fields"
+DOCUMENT_RULE_MATCH_CACHE_SIZE = 2048
+
+
+def normalize_doc_name(value):
+    return str(value or "").strip().lower()
+
+
+FILE_META_KEYS = ("size", "width", "height", "mime", "sha256")
+EMPTY_FILE_META = {"size": 0, "width": None, "height": None, "mime": "", "sha256": ""}
+
+
+def read_file_meta(file_field):
+    # Ek pass me hash + size, phir header se dimensions; naya upload ho to local temp/memory se hi padhta hai.
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in file_field.chunks():
+        digest.update(chunk)
+        size += len(chunk)
+    meta = {**EMPTY_FILE_META, "size": size, "sha256": digest.hexdigest()}
+    try:
+        file_field.seek(0)
+        with Image.open(file_field) as img:
+            meta.update(width=img.width, height=img.height, mime=Image.MIME.get(img.format, ""))
+    except Exception:
+        pass
+    finally:
+        file_field.seek(0)
+    if not meta["mime"]:
+        meta["mime"] = (
+            getattr(file_field.file, "content_type", "")
+            or mimetypes.guess_type(file_field.name or "")[0]
+            or "application/octet-stream"
+        )[:100]
+    return meta
+
+
+def file_replaced(instance, field_name):
+    # Naya assign hua file abhi storage me commit nahi hua hota (FileField.pre_save bhi yahi dekhta hai).
+    file_field = getattr(instance, field_name)
+    if file_field:
+        return not file_field._committed
+    # Khaali field tabhi "replace" hai jab row par purane file ka metadata baaki ho (file hataya gaya);
+    # bina attachment wale har save par previous value ki query aur atomic block nahi chahiye.
+    return bool(getattr(instance, f"{field_name}_sha256") or getattr(instance, f"{field_name}_size"))
+
+
+def after_file_commit(file_field):
+    # Naya file storage me pahunch gaya: purana cached URL hatao aur thumb/preview abhi local copy se bana lo.
+    if not file_field:
+        return
+    forget_media_url(file_field.name)
+    try:
+        build_derivatives(file_field.name, file_field)
+    except Exception:
+        # Upload fail nahi hona chahiye; lazy derivative endpoint baad me bana lega.
+        pass
+
+
+def apply_file_meta(instance, field_name, update_fields):
+    # Sirf naye assign hue file par metadata nikalta hai.
+    if not file_replaced(instance, field_name):
+        return update_fields
+    file_field = getattr(instance, field_name)
+    meta = read_file_meta(file_field) if file_field else EMPTY_FILE_META
+    for key in FILE_META_KEYS:
+        setattr(instance, f"{field_name}_{key}", meta[key])
+    if update_fields is not None and field_name in update_fields:
+        update_fields = set(update_fields) | {f"{field_name}_{key}" for key in FILE_META_KEYS}
+    return update_fields
+
+
+BLOB_PREFIX = "blobs"
+
+
+def blob_storage_name(sha256, filename):
+    # Storage path me sirf hash + extension: dedupe hone par bhi kisi uploader ka file naam bahar na jaye.
+    ext = os.path.splitext(filename or "")[1].lower().lstrip(".")
+    ext = "".join(ch for ch in ext if ch.isalnum())[:10]
+    return f"{BLOB_PREFIX}/{sha256}.{ext}" if ext else f"{BLOB_PREFIX}/{sha256}"
+
+
+def _blob_upload_name(prefix, sha256, filename):
+    if sha256:
+        return blob_storage_name(sha256, filename)
+    return f"{prefix}/{os.path.basename(filename or '') or 'file'}"
+
+
+def document_upload_to(instance, filename):
+    return _blob_upload_name("profile_documents", instance.file_sha256, filename)
+
+
+def chat_attachment_upload_to(instance, filename):
+    return _blob_upload_name("chat_attachments", instance.attachment_sha256, filename)
+
+
+def stored_file_display_name(instance, field_name):
+    # Download/display ke liye is row ka apna naam; blob path (hash) kabhi user ko nahi dikhta.
+    original = getattr(instance, f"{field_name}_original_name", "")
+    if original:
+        return original
+    ext = os.path.splitext(getattr(instance, field_name).name or "")[1]
+    return f"{field_name}{ext}"
+
+
+def save_blob_file(instance, field_name, save, *args, **kwargs):
+    # Same content pehle se stored ho to storage write skip karke usi blob ka refcount badhate hain.
+    replaced = file_replaced(instance, field_name)
+    previous = None
+    if replaced and not instance._state.adding:
+        previous = type(instance).objects.filter(pk=instance.pk).values_list(field_name, f"{field_name}_sha256").first()
+    update_fields = apply_file_meta(instance, field_name, kwargs.get("update_fields"))
+    if replaced:
+        file_field = getattr(instance, field_name)
+        setattr(instance, f"{field_name}_original_name", os.path.basename(file_field.name or "")[:255] if file_field else "")
+        if update_fields is not None and field_name in update_fields:
+            update_fields = set(update_fields) | {f"{field_name}_original_name"}
+    if update_fields is not None:
+        kwargs["update_fields"] = update_fields
+    if not replaced:
+        save(*args, **kwargs)
+        return
+    file_field = getattr(instance, field_name)
+    with transaction.atomic():
+        reused_name = StoredBlob.claim(getattr(instance, f"{field_name}_sha256")) if file_field else ""
+        if reused_name:
+            file_field.name = reused_name
+            file_field._committed = True
+        save(*args, **kwargs)
+        if file_field and not reused_name:
+            StoredBlob.register(instance, field_name)
+        if previous:
+            StoredBlob.release(previous[1], previous[0])
+    if file_field and not reused_name:
+        after_file_commit(file_field)
+
+
+def _is_search_char(ch):
+    # Letter/mark/number: Devanagari matra (Mc/Mn) isalnum() nahi hote, unpar todne se "अमित" -> "अम त" ban jata.
+    return unicodedata.category(ch)[0] in "LMN"
+
+
+def normalize_search_text(value):
+    text = str(value or "").lower()
+    return " ".join("".join(ch if _is_search_char(ch) else " " for ch in text).split())
+
+
+def profile_search_tokens(full_name, username, mobile):
+    tokens = set()
+    for source in (full_name, username):
+        words = normalize_search_text(source).split()
+        tokens.update(words)
+        # "kumar verma" ke liye "kumarverma" bhi, taaki bina space wala prefix bhi mile.
+        for start in range(len(words)):
+            tokens.add("".join(words[start:]))
+    digits = normalize_mobile(mobile)
+    if digits:
+        tokens.add(digits)
+        tokens.add(digits[-10:])
+    return {token[:SEARCH_TOKEN_MAX_LENGTH] for token in tokens if token}
+
+
+def profile_search_text(full_name, username, mobile):
+    digits = normalize_mobile(mobile)
+    return " ".join(
+        part for part in (normalize_search_text(full_name), normalize_search_text(username), digits) if part
+    )[:255]
 
 
 class UserProfile(models.Model):
@@ -14,6 +233,7 @@ class UserProfile(models.Model):
     CATEGORY_CHOICES = [('General','General'),('OBC','OBC'),('SC','SC'),('ST','ST')]
     category      = models.CharField(max_length=20, choices=CATEGORY_CHOICES, blank=True)
     mobile        = models.CharField(max_length=15, blank=True)
+    mobile_key    = models.CharField(max_length=15, unique=True, null=True, blank=True, editable=False)
     email         = models.EmailField(blank=True)
 
     # Address details
@@ -69,6 +289,17 @@ class UserProfile(models.Model):
 
     photo         = models.ImageField(upload_to='profile_photos/', null=True, blank=True)
     signature     = models.ImageField(upload_to='profile_signatures/', null=True, blank=True)
+    # Upload ke waqt bhara jata hai (save() dekho), taaki metadata dikhane ke liye storage se file na padhni pade.
+    photo_size = models.PositiveBigIntegerField(default=0, editable=False)
+    photo_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    photo_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    photo_mime = models.CharField(max_length=100, blank=True, default="", editable=False)
+    photo_sha256 = models.CharField(max_length=64, blank=True, default="", editable=False)
+    signature_size = models.PositiveBigIntegerField(default=0, editable=False)
+    signature_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    signature_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    signature_mime = models.CharField(max_length=100, blank=True, default="", editable=False)
+    signature_sha256 = models.CharField(max_length=64, blank=True, default="", editable=False)
     chat_enabled  = models.BooleanField(default=False)
     master_data_last_saved_at = models.DateTimeField(null=True, blank=True)
     master_data_unmask_until = models.DateTimeField(null=True, blank=True)
@@ -81,10 +312,75 @@ class UserProfile(models.Model):
     apply_profile_unmask_date = models.DateField(null=True, blank=True)
     apply_profile_unmask_count = models.PositiveSmallIntegerField(default=0)
     apply_draft_data = models.JSONField(default=dict, blank=True)
+    search_text = models.CharField(max_length=255, blank=True, default="")
+
+    _loaded_mobile = None
 
     def __str__(self):
         return f"{self.full_name} ({self.user.username})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_mobile = instance.__dict__.get("mobile", _MOBILE_DEFERRED)
+        return instance
+
+    def _mobile_changed(self, update_fields):
+        if update_fields is not None and "mobile" not in update_fields:
+            return False
+        if self._state.adding:
+            return True
+        if self._loaded_mobile is _MOBILE_DEFERRED:
+            return update_fields is not None
+        return self.mobile != self._loaded_mobile
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        # Key sirf tab banti hai jab mobile sach me badla ho. 0028 backfill ne duplicate number wale
+        # purane profiles ki key NULL chhodi hai; unke baaki saves unique index se nahi takrane chahiye.
+        mobile_changed = self._mobile_changed(update_fields)
+        if mobile_changed:
+            # Empty mobile par NULL, taaki unique index sirf bhare hue numbers par lage.
+            self.mobile_key = normalize_mobile(self.mobile) or None
+            if update_fields is not None:
+                update_fields = kwargs["update_fields"] = set(update_fields) | {"mobile_key"}
+        replaced = [name for name in ("photo", "signature") if file_replaced(self, name)]
+        for field_name in replaced:
+            update_fields = apply_file_meta(self, field_name, update_fields)
+        if update_fields is not None:
+            kwargs["update_fields"] = update_fields
+        sync_search = update_fields is None or bool(SEARCH_SOURCE_FIELDS.intersection(update_fields))
+        tokens_stale = False
+        if sync_search:
+            new_text = profile_search_text(self.full_name, self.user.username, self.mobile)
+            tokens_stale = self._state.adding or new_text != self.search_text
+            self.search_text = new_text
+            if update_fields is not None:
+                kwargs["update_fields"] = set(update_fields) | {"search_text"}
+        try:
+            super().save(*args, **kwargs)
+        except IntegrityError as exc:
+            if mobile_changed and self.mobile_key and "mobile_key" in str(exc):
+                raise MobileAlreadyRegistered("Ye mobile number kisi aur account se registered hai.") from exc
+            raise
+        if mobile_changed:
+            self._loaded_mobile = self.mobile
+        for field_name in replaced:
+            after_file_commit(getattr(self, field_name))
+        if tokens_stale:
+            self.sync_search_tokens()
+
+    def sync_search_tokens(self):
+        wanted = profile_search_tokens(self.full_name, self.user.username, self.mobile)
+        existing = set(self.search_tokens.values_list("token", flat=True))
+        if existing - wanted:
+            self.search_tokens.filter(token__in=existing - wanted).delete()
+        if wanted - existing:
+            ProfileSearchToken.objects.bulk_create(
+                [ProfileSearchToken(profile=self, token=token) for token in wanted - existing],
+                ignore_conflicts=True,
+            )
+
     @property
     def completion_percent(self):
         fields = ['full_name','father_name','mother_name','dob','gender',
@@ -94,14 +390,56 @@ class UserProfile(models.Model):
         return int((filled / len(fields)) * 100)
 
 
+@receiver(post_save, sender=User)
+def resync_profile_search(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    # Username bhi search text/tokens me hai; login (sirf last_login) jaise saves ko skip karte hain.
+    if created or raw or (update_fields is not None and "username" not in update_fields):
+        return
+    profile = UserProfile.objects.filter(user=instance).only("id", "full_name", "mobile", "search_text").first()
+    if profile is None:
+        return
+    profile.user = instance
+    new_text = profile_search_text(profile.full_name, instance.username, profile.mobile)
+    if new_text == profile.search_text:
+        return
+    UserProfile.objects.filter(pk=profile.pk).update(search_text=new_text)
+    profile.search_text = new_text
+    profile.sync_search_tokens()
+
+
+class ProfileSearchToken(models.Model):
+    profile = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name="search_tokens")
+    token = models.CharField(max_length=SEARCH_TOKEN_MAX_LENGTH)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["profile", "token"], name="unique_profile_search_token"),
+        ]
+        indexes = [
+            models.Index(fields=["token"], name="profile_search_token_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.profile_id}: {self.token}"
+
+
 class UserDocument(models.Model):
     profile = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name='documents')
     title   = models.CharField(max_length=120, blank=True)
-    file    = models.FileField(upload_to='profile_documents/')
+    file    = models.FileField(upload_to=document_upload_to, max_length=255)
+    file_size = models.PositiveBigIntegerField(default=0, editable=False)
+    file_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    file_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    file_mime = models.CharField(max_length=100, blank=True, default="", editable=False)
+    file_sha256 = models.CharField(max_length=64, blank=True, default="", editable=False)
+    file_original_name = models.CharField(max_length=255, blank=True, default="", editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return self.title or self.file.name
+        return self.title or self.file_original_name or self.file.name
+
+    def save(self, *args, **kwargs):
+        save_blob_file(self, "file", super().save, *args, **kwargs)
 
 
 class Vacancy(models.Model):
@@ -121,6 +459,7 @@ class Vacancy(models.Model):
     display_order = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True)
     required_documents = models.JSONField(default=list, blank=True)
+    required_document_specs = models.JSONField(default=list, blank=True, editable=False)
     required_profile_fields = models.JSONField(default=list, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -130,6 +469,19 @@ class Vacancy(models.Model):
     def __str__(self):
         return f"{self.get_category_display()} - {self.title}"
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        self.required_document_specs = build_requirement_specs(self.required_documents)
+        if update_fields is not None and "required_documents" in update_fields:
+            kwargs["update_fields"] = set(update_fields) | {"required_document_specs"}
+        super().save(*args, **kwargs)
+
+
+@receiver([post_save, post_delete], sender=Vacancy)
+def invalidate_vacancy_catalog(sender, **kwargs):
+    # Django admin (VacancyAdmin), custom admin views, seed command: har save/delete par dashboard catalog refresh.
+    transaction.on_commit(lambda: bump_snapshot(VACANCY_CATALOG_SNAPSHOT))
+
 
 class Application(models.Model):
     STATUS_PENDING = "pending"
@@ -150,6 +502,7 @@ class Application(models.Model):
     vacancy = models.ForeignKey(Vacancy, on_delete=models.CASCADE, related_name="applications")
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
     remarks = models.TextField(blank=True)
+    payload = models.JSONField(default=dict, blank=True)
     applied_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     cancelled_at = models.DateTimeField(null=True, blank=True)
@@ -159,6 +512,10 @@ class Application(models.Model):
         constraints = [
             models.UniqueConstraint(fields=["profile", "vacancy"], name="unique_application_per_profile_vacancy"),
         ]
+        indexes = [
+            models.Index(fields=["applied_at", "id"], name="application_applied_keyset"),
+            models.Index(fields=["status", "applied_at", "id"], name="application_status_keyset"),
+        ]
 
     def __str__(self):
         return f"{self.profile.full_name or self.profile.user.username} - {self.vacancy.title}"
@@ -168,7 +525,13 @@ class ChatMessage(models.Model):
     profile = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name="chat_messages")
     from_admin = models.BooleanField(default=False)
     message = models.TextField(blank=True)
-    attachment = models.FileField(upload_to="chat_attachments/", null=True, blank=True)
+    attachment = models.FileField(upload_to=chat_attachment_upload_to, max_length=255, null=True, blank=True)
+    attachment_size = models.PositiveBigIntegerField(default=0, editable=False)
+    attachment_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    attachment_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    attachment_mime = models.CharField(max_length=100, blank=True, default="", editable=False)
+    attachment_sha256 = models.CharField(max_length=64, blank=True, default="", editable=False)
+    attachment_original_name = models.CharField(max_length=255, blank=True, default="", editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -178,6 +541,159 @@ class ChatMessage(models.Model):
         who = "Admin" if self.from_admin else (self.profile.full_name or self.profile.user.username)
         return f"{who} - {self.created_at:%Y-%m-%d %H:%M}"
 
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        save_blob_file(self, "attachment", super().save, *args, **kwargs)
+        if adding:
+            ChatThread.record_message(self)
+
+
+class StoredBlob(models.Model):
+    # Ek unique content = ek stored file; UserDocument/ChatMessage rows isse refer karte hain.
+    sha256 = models.CharField(max_length=64, unique=True)
+    name = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count})"
+
+    @classmethod
+    def claim(cls, sha256):
+        # Row hai tabhi +1; filtered UPDATE atomic hai, isliye release ke saath race me blob delete nahi hota.
+        if not sha256 or not cls.objects.filter(sha256=sha256).update(ref_count=F("ref_count") + 1):
+            return ""
+        return cls.objects.filter(sha256=sha256).values_list("name", flat=True).first() or ""
+
+    @classmethod
+    def register(cls, instance, field_name):
+        file_field = getattr(instance, field_name)
+        blob, created = cls.objects.get_or_create(
+            sha256=getattr(instance, f"{field_name}_sha256"),
+            defaults={"name": file_field.name, "size": getattr(instance, f"{field_name}_size"), "ref_count": 1},
+        )
+        if created:
+            return
+        cls.objects.filter(pk=blob.pk).update(ref_count=F("ref_count") + 1)
+        if blob.name != file_field.name:
+            # Same file do requests me ek saath aaya; apni copy hata kar pehle wale blob par point karo.
+            duplicate = file_field.name
+            type(instance).objects.filter(pk=instance.pk).update(**{field_name: blob.name})
+            file_field.name = blob.name
+            transaction.on_commit(lambda: delete_stored_file(duplicate))
+
+    @classmethod
+    def release(cls, sha256, name):
+        # Name match zaroori hai: purane (dedupe se pehle ke) files isi hash ke blob me count nahi hote.
+        if not sha256 or not name:
+            return
+        cls.objects.filter(sha256=sha256, name=name, ref_count__gt=0).update(ref_count=F("ref_count") - 1)
+        if cls.objects.filter(sha256=sha256, name=name, ref_count=0).delete()[0]:
+            transaction.on_commit(lambda: delete_stored_file(name))
+
+
+@receiver(post_delete, sender=UserDocument)
+def release_document_blob(sender, instance, **kwargs):
+    StoredBlob.release(instance.file_sha256, instance.file.name)
+
+
+@receiver(post_delete, sender=ChatMessage)
+def release_chat_attachment_blob(sender, instance, **kwargs):
+    StoredBlob.release(instance.attachment_sha256, instance.attachment.name)
+
+
+class ChatThread(models.Model):
+    # Admin inbox ke liye per-profile summary; har message par update hota hai
+    # taaki inbox ko poori chat_messages table scan na karni pade.
+    profile = models.OneToOneField(
+        UserProfile, on_delete=models.CASCADE, primary_key=True, related_name="chat_thread"
+    )
+    last_message = models.ForeignKey(
+        ChatMessage, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    message_count = models.PositiveIntegerField(default=0)
+    unread_count = models.PositiveIntegerField(default=0)
+    admin_read_id = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        # Admin inbox ka order: latest message wala thread upar.
+        indexes = [models.Index(fields=["-last_message_at", "-profile"], name="chat_thread_inbox_idx")]
+
+    def __str__(self):
+        return f"Thread #{self.profile_id} ({self.message_count})"
+
+    @classmethod
+    def record_message(cls, message):
+        changes = {
+            "last_message": message,
+            "last_message_at": message.created_at,
+            "message_count": models.F("message_count") + 1,
+        }
+        if message.from_admin:
+            # Admin ne reply kiya matlab thread padh liya.
+            changes.update(unread_count=0, admin_read_id=message.id)
+        else:
+            changes["unread_count"] = models.F("unread_count") + 1
+        updated = cls.objects.filter(profile_id=message.profile_id).update(**changes)
+        if not updated:
+            cls.rebuild(message.profile_id)
+
+    @classmethod
+    def rebuild(cls, profile_id):
+        msgs = ChatMessage.objects.filter(profile_id=profile_id)
+        thread, _ = cls.objects.get_or_create(profile_id=profile_id)
+        last = msgs.order_by("-id").only("id", "created_at").first()
+        thread.last_message = last
+        thread.last_message_at = last.created_at if last else None
+        thread.message_count = msgs.count()
+        thread.unread_count = msgs.filter(from_admin=False, id__gt=thread.admin_read_id).count()
+        thread.save()
+        return thread
+
+    @classmethod
+    def mark_read(cls, profile_id):
+        cls.objects.filter(profile_id=profile_id, unread_count__gt=0).update(
+            unread_count=0, admin_read_id=Coalesce("last_message", 0)
+        )
+
+
+def _schedule_thread_rebuild(profile_id):
+    # Queryset/cascade delete har message par signal bhejta hai; ek transaction me ek profile ka rebuild ek hi baar.
+    connection = transaction.get_connection()
+    pending = connection.__dict__.setdefault("_chat_thread_rebuilds", {})
+    scheduled = pending.get(profile_id)
+    if scheduled is not None and any(entry[1] is scheduled for entry in connection.run_on_commit):
+        return
+
+    def _rebuild():
+        pending.pop(profile_id, None)
+        # Profile hi delete hua ho (cascade) to thread bhi ja chuka hai.
+        if UserProfile.objects.filter(pk=profile_id).exists():
+            ChatThread.rebuild(profile_id)
+
+    pending[profile_id] = _rebuild
+    transaction.on_commit(_rebuild)
+
+
+@receiver(post_delete, sender=ChatMessage)
+def rebuild_chat_thread(sender, instance, **kwargs):
+    # Django admin, queryset delete ya view, kahin se bhi message hate to summary sahi rahe.
+    _schedule_thread_rebuild(instance.profile_id)
+
+
+def chat_snapshot_name(profile_id):
+    return f"chat_thread:{profile_id}"
+
+
+@receiver(post_save, sender=ChatMessage)
+def bump_chat_version(sender, instance, created, **kwargs):
+    # Chat long-poll isi version ko dekhta hai; message commit hote hi ruka hua poll DB tak jaata hai.
+    if created:
+        name = chat_snapshot_name(instance.profile_id)
+        transaction.on_commit(lambda: bump_snapshot(name))
+
 
 class DocumentRule(models.Model):
     KIND_ANY = "any"
@@ -205,6 +721,47 @@ class DocumentRule(models.Model):
     def __str__(self):
         return f"{self.name} ({self.min_kb}-{self.max_kb} KB)"
 
+    @classmethod
+    def compiled(cls):
+        # Har worker me active rules ek baar compile; save/delete signal version bump karta hai.
+        return cached_snapshot(DOCUMENT_RULES_SNAPSHOT, lambda: DocumentRuleSet(cls.objects.filter(is_active=True)))
+
+    @classmethod
+    def invalidate_compiled(cls):
+        bump_snapshot(DOCUMENT_RULES_SNAPSHOT)
+
+
+class DocumentRuleSet:
+    def __init__(self, rules):
+        self.exact = {}
+        for rule in rules:
+            self.exact[normalize_doc_name(rule.name)] = rule
+        self._ordered = tuple(self.exact.items())
+        self._matches = {}
+
+    def match(self, title):
+        key = normalize_doc_name(title)
+        if not key:
+            return None
+        rule = self.exact.get(key)
+        if rule is not None:
+            return rule
+        # Substring fallback ("sign" -> "signature") word boundary nahi maanta, isliye title-wise result memo karte hain.
+        if key in self._matches:
+            return self._matches[key]
+        rule = next((rule for name_key, rule in self._ordered if key in name_key or name_key in key), None)
+        if len(self._matches) >= DOCUMENT_RULE_MATCH_CACHE_SIZE:
+            self._matches.clear()
+        self._matches[key] = rule
+        return rule
+
+
+@receiver([post_save, post_delete], sender=DocumentRule)
+def invalidate_document_rules(sender, **kwargs):
+    # Django admin, admin_documents ya shell, har save/delete par; commit ke baad, taaki doosra worker
+    # naya version dekh kar purana data load na kar le.
+    transaction.on_commit(DocumentRule.invalidate_compiled)
+
 
 class PortalNews(models.Model):
     TYPE_VACANCY = "vacancy"
@@ -359,3 +916,24 @@ class MasterDataField(models.Model):
 
     def __str__(self):
         return f"{self.get_step_display()} - {self.label}"
+
+    @classmethod
+    def registry(cls):
+        # (step, kind) -> active fields; har save/delete signal version bump karta hai.
+        def _load():
+            grouped = {}
+            for field in cls.objects.filter(is_active=True).order_by("display_order", "label", "id"):
+                grouped.setdefault((field.step, field.field_kind), []).append(field)
+            return {key: tuple(fields) for key, fields in grouped.items()}
+
+        return cached_snapshot(MASTER_FIELDS_SNAPSHOT, _load)
+
+    @classmethod
+    def invalidate_registry(cls):
+        bump_snapshot(MASTER_FIELDS_SNAPSHOT)
+
+
+@receiver([post_save, post_delete], sender=MasterDataField)
+def invalidate_master_data_fields(sender, **kwargs):
+    # Django admin me bhi MasterDataField registered hai; isliye view ke bajaye model signal se.
+    transaction.on_commit(MasterDataField.invalidate_registry)
@@ -0,0 +1,55 @@
+from django.db import connection
+from django.db.models import Case, Exists, IntegerField, OuterRef, Q, Value, When
+
+from .models import ProfileSearchToken, UserProfile, normalize_search_text
+
+
+SEARCH_MAX_TERMS = 5
+
+
+def search_terms(query):
+    return normalize_search_text(query).split()[:SEARCH_MAX_TERMS]
+
+
+def _prefix_upper_bound(term):
+    return term[:-1] + chr(ord(term[-1]) + 1)
+
+
+def _term_filter(term):
+    # Token index par range probe (token >= term AND token < next) har DB par B-tree se chalta hai.
+    matches = ProfileSearchToken.objects.filter(token__gte=term, token__lt=_prefix_upper_bound(term))
+    condition = Q(pk__in=matches.values("profile_id"))
+    if connection.vendor == "postgresql":
+        # Postgres par pg_trgm GIN index substring match bhi cover karta hai.
+        condition |= Q(search_text__contains=term)
+    elif term.isdigit():
+        # SQLite/MySQL par trigram index nahi: naam sirf prefix se milte hain, lekin mobile ka beech ka
+        # hissa (jaise last 4 digits) pehle jaisa substring scan se milta rahe.
+        condition |= Q(search_text__contains=term)
+    return condition
+
+
+def matching_profiles(query, queryset=None):
+    terms = search_terms(query)
+    qs = queryset if queryset is not None else UserProfile.objects.all()
+    if not terms:
+        return qs.none()
+    for term in terms:
+        qs = qs.filter(_term_filter(term))
+    return qs
+
+
+def rank_profiles(queryset, query):
+    # Poora token match (2) prefix match (1) se upar; barabar rank par naya profile pehle.
+    terms = search_terms(query)
+    if not terms:
+        return queryset
+    rank = Value(0, output_field=IntegerField())
+    for term in terms:
+        exact = Exists(ProfileSearchToken.objects.filter(profile=OuterRef("pk"), token=term))
+        rank = rank + Case(When(exact, then=Value(2)), default=Value(1), output_field=IntegerField())
+    return queryset.annotate(search_rank=rank).order_by("-search_rank", "-id")
+
+
+def search_profiles(query, queryset=None):
+    return rank_profiles(matching_profiles(query, queryset=queryset), query)
@@ -0,0 +1,46 @@
+import threading
+import time
+
+from django.core.cache import cache
+
+
+SNAPSHOT_TTL_SECONDS = 300
+
+_snapshots = {}
+_snapshot_lock = threading.Lock()
+
+
+def _version_key(name):
+    return f"portal:snapshot-version:{name}"
+
+
+def snapshot_version(name):
+    try:
+        return cache.get(_version_key(name), 0) or 0
+    except Exception:
+        return 0
+
+
+def bump_snapshot(name):
+    # Version shared cache me rakha hai, taaki shared backend (redis/memcached) par
+    # sab workers ka snapshot ek saath stale ho jaye. LocMem par TTL fallback hai.
+    key = _version_key(name)
+    try:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+    except Exception:
+        pass
+    with _snapshot_lock:
+        _snapshots.pop(name, None)
+
+
+def cached_snapshot(name, loader, ttl=SNAPSHOT_TTL_SECONDS):
+    version = snapshot_version(name)
+    now = time.monotonic()
+    entry = _snapshots.get(name)
+    if entry and entry[0] == version and entry[1] > now:
+        return entry[2]
+    value = loader()
+    with _snapshot_lock:
+        _snapshots[name] = (version, now + ttl, value)
+    return value
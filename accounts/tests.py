@@ -1,3 +1,914 @@
-from django.test import TestCase
+import asyncio
+import csv
+import hashlib
+import importlib
+import io
+import tempfile
+import time
+import uuid
+import zipfile
+from datetime import date, timedelta
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from . import jobs
+from . import converters
+from .converters import MIN_SIDE_PX, ConverterError, encode_to_target, images_to_pdf, ocr_result, parse_page_range
+from .media import DERIVATIVE_SIZES, delete_stored_file, derivative_name, derivative_url, forget_media_url, storage_url
+from .checks import check_shared_cache
+from .middleware import MobileConflictMiddleware
+from .search import search_profiles
+from .snapshots import snapshot_version
+from core import context_processors
+from core import views as core_views
+
+from .models import (
+    Application,
+    ChatMessage,
+    ChatThread,
+    DocumentRule,
+    MasterDataField,
+    MobileAlreadyRegistered,
+    ProfileSearchToken,
+    StoredBlob,
+    UserDocument,
+    UserProfile,
+    Vacancy,
+    chat_snapshot_name,
+    normalize_search_text,
+    profile_search_tokens,
+    stored_file_display_name,
+)
+
+
+def make_profile(username, mobile="", **extra):
+    user = User.objects.create_user(username=username, password="pass12345")
+    return UserProfile.objects.create(user=user, mobile=mobile, **extra)
+
+
+class DuplicateMobileSaveTests(TestCase):
+    def setUp(self):
+        self.owner = make_profile("owner", "9876543210")
+        self.duplicate = make_profile("duplicate", "")
+        # 0028 backfill jaisi state: same number, lekin key NULL.
+        UserProfile.objects.filter(pk=self.duplicate.pk).update(mobile="98765-43210", mobile_key=None)
+
+    def test_full_save_keeps_backfilled_null_key(self):
+        profile = UserProfile.objects.get(pk=self.duplicate.pk)
+        profile.full_name = "Duplicate User"
+        profile.save()
+        profile.refresh_from_db()
+        self.assertEqual(profile.full_name, "Duplicate User")
+        self.assertIsNone(profile.mobile_key)
+
+    def test_changing_to_taken_mobile_raises(self):
+        other = make_profile("other", "9000000001")
+        other = UserProfile.objects.get(pk=other.pk)
+        other.mobile = "98765 43210"
+        with self.assertRaises(MobileAlreadyRegistered):
+            other.save()
+
+    def test_update_fields_save_adds_key(self):
+        profile = UserProfile.objects.get(pk=self.duplicate.pk)
+        profile.mobile = "9111111111"
+        profile.save(update_fields=["mobile"])
+        profile.refresh_from_db()
+        self.assertEqual(profile.mobile_key, "9111111111")
+
+    def test_personal_step_save_for_duplicate_profile(self):
+        self.client.login(username="duplicate", password="pass12345")
+        response = self.client.post(reverse("master_data_personal"), {
+            "full_name": "Duplicate User",
+            "mobile": "98765-43210",
+        })
+        self.assertRedirects(response, reverse("master_data_address"), fetch_redirect_response=False)
+        profile = UserProfile.objects.get(pk=self.duplicate.pk)
+        self.assertEqual(profile.full_name, "Duplicate User")
+        self.assertIsNone(profile.mobile_key)
+
+    def test_middleware_turns_conflict_into_message(self):
+        middleware = MobileConflictMiddleware(lambda request: None)
+        request = RequestFactory().post("/accounts/master-data/personal/")
+        request.session = self.client.session
+        request._messages = FallbackStorage(request)
+        response = middleware.process_exception(request, MobileAlreadyRegistered("taken"))
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual([str(m) for m in request._messages], ["taken"])
+
+        ajax = RequestFactory().post("/x/", headers={"x-requested-with": "XMLHttpRequest"})
+        self.assertEqual(middleware.process_exception(ajax, MobileAlreadyRegistered("taken")).status_code, 409)
+
+
+@override_settings(CONVERTER_JOB_DIR=tempfile.mkdtemp(prefix="portal-jobs-test-"), CONVERTER_POOL_WORKERS=1)
+class ConverterJobTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="converter", password="pass12345")
+
+    def test_orphaned_pending_job_fails_after_deadline(self):
+        job_id = uuid.uuid4().hex
+        created = time.time() - jobs.JOB_PENDING_DEADLINE_SECONDS - 1
+        jobs._write_meta(job_id, {"id": job_id, "owner": self.user.id, "kind": "ocr", "created": created, "status": "pending"})
+        self.client.login(username="converter", password="pass12345")
+        response = self.client.get(reverse("document_converter_job_status", args=[job_id]))
+        self.assertEqual(response.json()["status"], "failed")
+        meta, result = jobs.job_result(job_id, self.user.id)
+        self.assertEqual(meta["http_status"], 504)
+        self.assertIsNone(result)
+
+    def test_fresh_pending_job_stays_pending(self):
+        job_id = uuid.uuid4().hex
+        jobs._write_meta(job_id, {"id": job_id, "owner": self.user.id, "created": time.time(), "status": "pending"})
+        self.assertEqual(jobs.job_status(job_id, self.user.id)["status"], "pending")
+        self.assertIsNone(jobs.job_status(job_id, self.user.id + 1))
+
+    def test_timed_out_job_keeps_slot_until_worker_finishes(self):
+        with mock.patch.object(jobs, "JOB_WAIT_TIMEOUT_SECONDS", 0.2):
+            jobs.run_job(time.sleep, 0)  # pool warm-up: spawn startup timeout me na gine.
+            with self.assertRaises(FuturesTimeoutError):
+                jobs.run_job(time.sleep, 1.5)
+        self.assertEqual(len(jobs._inflight), 1)
+        deadline = time.time() + 10
+        while jobs._inflight and time.time() < deadline:
+            time.sleep(0.1)
+        self.assertEqual(len(jobs._inflight), 0)
+
+    def test_repeat_ocr_request_is_cache_hit(self):
+        self.client.login(username="converter", password="pass12345")
+        data = uuid.uuid4().bytes  # har run me naya content, purane cache se takkar na ho
+
+        def post(lang="hin", **extra):
+            upload = SimpleUploadedFile("scan.png", data, content_type="image/png")
+            return self.client.post(reverse("document_converter_ocr"), {"file": upload, "lang": lang, **extra})
+
+        fake_ocr = mock.Mock(return_value=ocr_result(["Naam: Asha"]))
+        # Thread pool: mock worker process tak pickle nahi hota.
+        with ThreadPoolExecutor(max_workers=1) as executor, mock.patch.object(
+            jobs, "_get_executor", return_value=executor
+        ), mock.patch("accounts.views.ocr_text", fake_ocr):
+            first, second = post(), post()
+            queued = post(**{"async": "1"})
+            other_lang = post(lang="eng")
+        self.assertEqual(first.json()["text"], "Naam: Asha")
+        self.assertNotIn("X-Converter-Cache", first)
+        self.assertEqual(second["X-Converter-Cache"], "hit")
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(jobs.job_status(queued.json()["job_id"], self.user.id)["status"], "done")
+        self.assertNotIn("X-Converter-Cache", other_lang)
+        self.assertEqual(fake_ocr.call_count, 2)
+
+    def post_pdf(self, page_count, **extra):
+        buffer = io.BytesIO()
+        Image.new("RGB", (60, 80), "white").save(buffer, format="PNG")
+        pages = [(f"p{idx}.png", buffer.getvalue()) for idx in range(page_count)]
+        pdf = SimpleUploadedFile("scan.pdf", images_to_pdf(pages)["body"], content_type="application/pdf")
+        self.client.login(username="converter", password="pass12345")
+        return self.client.post(reverse("document_converter_pdf_to_images"), {"pdf": pdf, **extra})
+
+    def spooled_inputs(self):
+        return list(jobs._job_dir().glob("*.in.pdf"))
+
+    def test_sync_pdf_to_images_streams_pages_within_cap(self):
+        response = self.post_pdf(3)
+        self.assertEqual(response.status_code, 200)
+        with zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content))) as zf:
+            self.assertEqual(zf.namelist(), ["page_1.jpg", "page_2.jpg", "page_3.jpg"])
+        response.close()
+        self.assertEqual(self.spooled_inputs(), [])
+
+    def test_sync_pdf_over_page_cap_asks_for_async(self):
+        with mock.patch.object(converters, "SYNC_PDF_MAX_PAGES", 2):
+            response = self.post_pdf(3)
+            self.assertEqual(response.status_code, 413)
+            self.assertIn("async=1", response.json()["error"])
+            self.assertEqual(self.spooled_inputs(), [])
+            # Range cap ke andar ho to sync hi chalta hai.
+            response = self.post_pdf(3, pages="1-2")
+            self.assertEqual(response.status_code, 200)
+            response.close()
+
+
+class ImagesToPdfTests(SimpleTestCase):
+    def encode(self, mode, size, fmt):
+        buffer = io.BytesIO()
+        Image.new(mode, size, "white").save(buffer, format=fmt)
+        return buffer.getvalue()
+
+    def pages(self):
+        return [
+            ("scan.png", self.encode("RGB", (300, 450), "PNG")),
+            ("gray.jpg", self.encode("L", (600, 150), "JPEG")),
+            ("logo.png", self.encode("RGBA", (150, 150), "PNG")),
+        ]
+
+    def open_pdf(self, body):
+        import fitz  # PyMuPDF
+
+        self.assertTrue(body.startswith(b"%PDF-1.4"))
+        return fitz.open(stream=body, filetype="pdf")
+
+    def test_fit_pages_match_image_size(self):
+        with self.open_pdf(images_to_pdf(self.pages(), dpi=150)["body"]) as doc:
+            self.assertEqual(doc.page_count, 3)
+            # 150 dpi par 300px = 144pt.
+            sizes = [(round(page.rect.width), round(page.rect.height)) for page in doc]
+            self.assertEqual(sizes, [(144, 216), (288, 72), (72, 72)])
+            self.assertEqual([len(page.get_images()) for page in doc], [1, 1, 1])
+
+    def test_a4_pages_follow_orientation(self):
+        with self.open_pdf(images_to_pdf(self.pages(), page_size="a4")["body"]) as doc:
+            self.assertEqual(doc.page_count, 3)
+            sizes = [(round(page.rect.width), round(page.rect.height)) for page in doc]
+            self.assertEqual(sizes, [(595, 842), (842, 595), (595, 842)])
+
+
+class PageRangeTests(SimpleTestCase):
+    def test_valid_ranges(self):
+        cases = {
+            "": [0, 1, 2, 3, 4],
+            "3-": [2, 3, 4],
+            "-2": [0, 1],
+            " 1 - 2 , 5 ": [0, 1, 4],
+            "1,,3,": [0, 2],
+            "2,1-2": [0, 1],
+            "4-9": [3, 4],
+            "-": [0, 1, 2, 3, 4],
+        }
+        for spec, expected in cases.items():
+            self.assertEqual(parse_page_range(spec, 5), expected, spec)
+
+    def test_invalid_ranges(self):
+        for spec in ("0", "5-3", "6", "7-8", "abc", "1-x", ",", "-0"):
+            with self.assertRaises(ConverterError, msg=spec):
+                parse_page_range(spec, 5)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(prefix="portal-media-test-"))
+class StoredBlobRefcountTests(TestCase):
+    def setUp(self):
+        self.alice = make_profile("alice")
+        self.bob = make_profile("bob")
+
+    def upload(self, profile, filename, data=b"same document bytes"):
+        with self.captureOnCommitCallbacks(execute=True):
+            return UserDocument.objects.create(profile=profile, title="Aadhar", file=SimpleUploadedFile(filename, data))
+
+    def test_duplicate_upload_claims_neutral_blob(self):
+        first = self.upload(self.alice, "alice-aadhar.pdf")
+        second = self.upload(self.bob, "bob-aadhar.pdf")
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertTrue(first.file.name.startswith(f"blobs/{first.file_sha256}"))
+        self.assertNotIn("alice", first.file.name)
+        self.assertEqual(StoredBlob.objects.get(sha256=first.file_sha256).ref_count, 2)
+        self.assertEqual(stored_file_display_name(UserDocument.objects.get(pk=second.pk), "file"), "bob-aadhar.pdf")
+
+    def test_replace_and_delete_release_blob(self):
+        first = self.upload(self.alice, "alice-aadhar.pdf")
+        second = self.upload(self.bob, "bob-aadhar.pdf")
+        shared_name, sha256 = first.file.name, first.file_sha256
+        with self.captureOnCommitCallbacks(execute=True):
+            second.file = SimpleUploadedFile("bob-new.pdf", b"different bytes")
+            second.save()
+        self.assertEqual(StoredBlob.objects.get(sha256=sha256).ref_count, 1)
+        self.assertTrue(default_storage.exists(shared_name))
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertFalse(StoredBlob.objects.filter(sha256=sha256).exists())
+        self.assertFalse(default_storage.exists(shared_name))
+        self.assertEqual(StoredBlob.objects.get(sha256=second.file_sha256).ref_count, 1)
+
+    def test_chat_download_uses_own_filename(self):
+        self.upload(self.alice, "alice-aadhar.pdf")
+        with self.captureOnCommitCallbacks(execute=True):
+            msg = ChatMessage.objects.create(profile=self.bob, attachment=SimpleUploadedFile("bob-aadhar.pdf", b"same document bytes"))
+        self.client.login(username="bob", password="pass12345")
+        response = self.client.get(reverse("chat_attachment_download", args=[msg.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("bob-aadhar.pdf", response["Content-Disposition"])
+        self.assertNotIn("alice", response["Content-Disposition"])
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(prefix="portal-media-test-"))
+class FileMetadataTests(TestCase):
+    def setUp(self):
+        self.profile = make_profile("uploader")
+        buffer = io.BytesIO()
+        Image.new("RGB", (30, 20), "white").save(buffer, format="PNG")
+        self.png = buffer.getvalue()
+
+    def send_attachment(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return ChatMessage.objects.create(profile=self.profile, attachment=SimpleUploadedFile("scan.png", self.png))
+
+    def test_upload_fills_metadata(self):
+        msg = ChatMessage.objects.get(pk=self.send_attachment().pk)
+        self.assertEqual(
+            (msg.attachment_size, msg.attachment_width, msg.attachment_height, msg.attachment_mime, msg.attachment_sha256),
+            (len(self.png), 30, 20, "image/png", hashlib.sha256(self.png).hexdigest()),
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            doc = UserDocument.objects.create(profile=self.profile, title="Marksheet", file=SimpleUploadedFile("marks.pdf", b"%PDF-1.4 marks", content_type="application/pdf"))
+        self.assertEqual((doc.file_size, doc.file_width, doc.file_mime), (14, None, "application/pdf"))
+
+    def test_save_without_new_file_skips_previous_lookup(self):
+        msg = ChatMessage.objects.create(profile=self.profile, message="bina attachment")
+        msg.message = "edited"
+        with self.assertNumQueries(1):
+            msg.save()
+        doc = UserDocument.objects.get(pk=UserDocument.objects.create(profile=self.profile, file=SimpleUploadedFile("a.pdf", b"a")).pk)
+        doc.title = "Renamed"
+        with self.assertNumQueries(1):
+            doc.save()
+
+    def test_clearing_attachment_releases_blob(self):
+        msg = self.send_attachment()
+        sha256 = msg.attachment_sha256
+        msg.attachment = None
+        with self.captureOnCommitCallbacks(execute=True):
+            msg.save()
+        msg.refresh_from_db()
+        self.assertEqual((msg.attachment_sha256, msg.attachment_size, msg.attachment_original_name), ("", 0, ""))
+        self.assertFalse(StoredBlob.objects.filter(sha256=sha256).exists())
+
+    def test_backfill_command_fills_missing_metadata(self):
+        msg = self.send_attachment()
+        ChatMessage.objects.filter(pk=msg.pk).update(attachment_size=0, attachment_width=None, attachment_mime="", attachment_sha256="")
+        out = io.StringIO()
+        call_command("backfill_file_metadata", stdout=out)
+        msg.refresh_from_db()
+        self.assertEqual(
+            (msg.attachment_size, msg.attachment_width, msg.attachment_mime, msg.attachment_sha256),
+            (len(self.png), 30, "image/png", hashlib.sha256(self.png).hexdigest()),
+        )
+        self.assertIn("ChatMessage.attachment: 1 updated, 0 failed.", out.getvalue())
+        self.assertIn("UserDocument.file: 0 updated, 0 failed.", out.getvalue())
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(prefix="portal-media-test-"), MEDIA_DELIVERY="django")
+class MediaAccessTests(TestCase):
+    def setUp(self):
+        self.owner = make_profile("owner")
+        self.stranger = make_profile("stranger")
+        User.objects.create_user(username="staff", password="pass12345", is_staff=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.doc = UserDocument.objects.create(
+                profile=self.owner, title="Marksheet", file=SimpleUploadedFile("marksheet.pdf", b"%PDF-1.4 owner only")
+            )
+        self.url = f"/media/{self.doc.file.name}"
+
+    def test_anonymous_is_sent_to_login(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(reverse("login"), response["Location"])
+
+    def test_other_user_gets_404(self):
+        self.client.login(username="stranger", password="pass12345")
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.assertEqual(self.client.get(f"/media/vacancy_images/../{self.doc.file.name}").status_code, 404)
+
+    def test_owner_and_staff_can_read(self):
+        for username in ("owner", "staff"):
+            self.client.login(username=username, password="pass12345")
+            response = self.client.get(self.url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(b"".join(response.streaming_content), b"%PDF-1.4 owner only")
+
+
+class StorageUrlCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.name = f"blobs/{uuid.uuid4().hex}.pdf"
+        patcher = mock.patch("accounts.media.default_storage")
+        self.storage = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.storage.url.side_effect = lambda name: f"/media/{name}"
+
+    def test_existence_checked_once_per_ttl(self):
+        self.storage.exists.return_value = True
+        self.assertEqual([storage_url(self.name) for _ in range(3)], [f"/media/{self.name}"] * 3)
+        self.assertEqual(self.storage.exists.call_count, 1)
+        forget_media_url(self.name)
+        storage_url(self.name)
+        self.assertEqual(self.storage.exists.call_count, 2)
+
+    def test_missing_file_cached_for_its_own_timeout(self):
+        self.storage.exists.return_value = False
+        self.assertEqual((storage_url(self.name), storage_url(self.name)), ("", ""))
+        self.assertEqual(self.storage.exists.call_count, 1)
+        other = f"{self.name}.thumb.webp"
+        storage_url(other, missing_timeout=0)
+        storage_url(other, missing_timeout=0)
+        self.assertEqual(self.storage.exists.call_count, 3)
+
+    def test_storage_error_is_not_cached(self):
+        self.storage.exists.side_effect = [OSError("cloud down"), True]
+        self.assertEqual(storage_url(self.name), "")
+        self.assertEqual(storage_url(self.name), f"/media/{self.name}")
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(prefix="portal-media-test-"))
+class MediaDerivativeTests(TestCase):
+    def setUp(self):
+        self.owner = make_profile("owner")
+        make_profile("stranger")
+        buffer = io.BytesIO()
+        Image.new("RGB", (40, 30), "red").save(buffer, format="JPEG")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.msg = ChatMessage.objects.create(
+                profile=self.owner, attachment=SimpleUploadedFile("photo.jpg", buffer.getvalue())
+            )
+        self.name = self.msg.attachment.name
+        # Purana upload: derivatives abhi bane nahi.
+        for size in DERIVATIVE_SIZES:
+            delete_stored_file(derivative_name(self.name, size))
+            forget_media_url(derivative_name(self.name, size))
+
+    def test_missing_derivative_is_probed_once(self):
+        lazy_url = reverse("media_derivative", args=["thumb", self.name])
+        with mock.patch.object(default_storage, "exists", wraps=default_storage.exists) as exists:
+            self.assertEqual(derivative_url(self.name, "thumb"), lazy_url)
+            self.assertEqual(derivative_url(self.name, "thumb"), lazy_url)
+        self.assertEqual(exists.call_count, 1)
+
+    def test_lazy_build_requires_owner(self):
+        lazy_url = reverse("media_derivative", args=["thumb", self.name])
+        self.client.login(username="stranger", password="pass12345")
+        self.assertEqual(self.client.get(lazy_url).status_code, 404)
+        self.assertFalse(default_storage.exists(derivative_name(self.name, "thumb")))
+
+        self.client.login(username="owner", password="pass12345")
+        self.assertEqual(self.client.get(lazy_url).status_code, 302)
+        self.assertTrue(default_storage.exists(derivative_name(self.name, "thumb")))
+        self.assertNotEqual(derivative_url(self.name, "thumb"), lazy_url)
+
+
+class SnapshotInvalidationTests(TestCase):
+    def test_document_rule_changes_refresh_compiled_rules(self):
+        self.assertIsNone(DocumentRule.compiled().match("Caste Certificate"))
+        with self.captureOnCommitCallbacks(execute=True):
+            rule = DocumentRule.objects.create(name="Caste Certificate", max_kb=300)
+        self.assertEqual(DocumentRule.compiled().match("caste certificate").max_kb, 300)
+        with self.captureOnCommitCallbacks(execute=True):
+            rule.max_kb = 200
+            rule.save()
+        self.assertEqual(DocumentRule.compiled().match("Caste Certificate").max_kb, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            DocumentRule.objects.filter(pk=rule.pk).delete()
+        self.assertIsNone(DocumentRule.compiled().match("Caste Certificate"))
+
+    def test_master_data_field_changes_refresh_registry(self):
+        key = (MasterDataField.STEP_BANK, MasterDataField.KIND_TEXT)
+        self.assertEqual(MasterDataField.registry().get(key, ()), ())
+        with self.captureOnCommitCallbacks(execute=True):
+            field = MasterDataField.objects.create(step=key[0], field_kind=key[1], label="IFSC Branch")
+        self.assertEqual([f.label for f in MasterDataField.registry()[key]], ["IFSC Branch"])
+        with self.captureOnCommitCallbacks(execute=True):
+            field.is_active = False
+            field.save(update_fields=["is_active"])
+        self.assertEqual(MasterDataField.registry().get(key, ()), ())
+        with self.captureOnCommitCallbacks(execute=True):
+            field.delete()
+        self.assertFalse(MasterDataField.objects.exists())
+
+    def test_process_local_cache_is_flagged(self):
+        locmem = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+        redis = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": "redis://cache:6379"}}
+        with self.settings(CACHES=locmem):
+            self.assertEqual([w.id for w in check_shared_cache(None)], ["accounts.W001"])
+        with self.settings(CACHES=redis):
+            self.assertEqual(check_shared_cache(None), [])
+
+
+class ChatThreadTests(TestCase):
+    def setUp(self):
+        self.profile = make_profile("chatter")
+
+    def thread(self):
+        return ChatThread.objects.get(profile=self.profile)
+
+    def test_record_message_and_mark_read(self):
+        ChatMessage.objects.create(profile=self.profile, message="hello")
+        ChatMessage.objects.create(profile=self.profile, message="anyone?")
+        thread = self.thread()
+        self.assertEqual((thread.message_count, thread.unread_count), (2, 2))
+        ChatThread.mark_read(self.profile.id)
+        latest = ChatMessage.objects.create(profile=self.profile, message="ping")
+        thread = self.thread()
+        self.assertEqual((thread.message_count, thread.unread_count, thread.last_message_id), (3, 1, latest.id))
+        reply = ChatMessage.objects.create(profile=self.profile, from_admin=True, message="haan")
+        thread = self.thread()
+        self.assertEqual((thread.unread_count, thread.admin_read_id), (0, reply.id))
+
+    def test_any_delete_rebuilds_summary(self):
+        first = ChatMessage.objects.create(profile=self.profile, message="one")
+        second = ChatMessage.objects.create(profile=self.profile, message="two")
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            ChatMessage.objects.filter(pk=second.pk).delete()
+        self.assertEqual(len(callbacks), 1)
+        thread = self.thread()
+        self.assertEqual((thread.message_count, thread.unread_count, thread.last_message_id), (1, 1, first.id))
+        ChatMessage.objects.create(profile=self.profile, message="three")
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.profile.chat_messages.all().delete()
+        self.assertEqual(len(callbacks), 1)
+        thread = self.thread()
+        self.assertEqual((thread.message_count, thread.unread_count, thread.last_message_id), (0, 0, None))
+
+
+@mock.patch("core.views.CHAT_POLL_INTERVAL_SECONDS", 0.05)
+class ChatPollTests(TestCase):
+    def setUp(self):
+        self.profile = make_profile("poller", chat_enabled=True)
+        self.first = ChatMessage.objects.create(profile=self.profile, message="hello")
+
+    async def poll(self, since_id):
+        await self.async_client.aforce_login(self.profile.user)
+        response = await self.async_client.get(reverse("user_chat_poll"), {"since_id": since_id})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    async def test_returns_pending_messages_immediately(self):
+        data = await self.poll(0)
+        self.assertEqual([msg["id"] for msg in data["messages"]], [self.first.id])
+        self.assertEqual((data["last_id"], data["next_poll_ms"]), (self.first.id, 0))
+
+    @mock.patch("core.views.CHAT_POLL_TIMEOUT_SECONDS", 0.3)
+    async def test_times_out_with_empty_batch(self):
+        started = time.monotonic()
+        data = await self.poll(self.first.id)
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual((data["messages"], data["last_id"]), ([], self.first.id))
+
+    @mock.patch("core.views.CHAT_POLL_TIMEOUT_SECONDS", 5)
+    async def test_wakes_up_when_reply_is_committed(self):
+        def send_reply():
+            with self.captureOnCommitCallbacks(execute=True):
+                return ChatMessage.objects.create(profile=self.profile, from_admin=True, message="reply")
+
+        async def reply_later():
+            await asyncio.sleep(0.2)
+            return await sync_to_async(send_reply)()
+
+        version = await sync_to_async(snapshot_version)(chat_snapshot_name(self.profile.id))
+        data, reply = await asyncio.gather(self.poll(self.first.id), reply_later())
+        self.assertEqual([msg["id"] for msg in data["messages"]], [reply.id])
+        self.assertEqual(await sync_to_async(snapshot_version)(chat_snapshot_name(self.profile.id)), version + 1)
+
+
+class AdminChatInboxTests(TestCase):
+    def setUp(self):
+        User.objects.create_user(username="staff", password="pass12345", is_staff=True)
+        self.client.login(username="staff", password="pass12345")
+        self.old, self.middle, self.quiet, self.fresh = (make_profile(name) for name in ("old", "middle", "quiet", "fresh"))
+        now = timezone.now()
+        for offset, profile in ((1, self.fresh), (2, self.middle), (3, self.old)):
+            ChatMessage.objects.create(profile=profile, message="hi")
+            ChatThread.objects.filter(profile=profile).update(last_message_at=now - timedelta(minutes=offset))
+        # Sabse purane profile par naya message: inbox me upar aana chahiye.
+        ChatMessage.objects.create(profile=self.old, message="new question")
+
+    def test_latest_thread_first_and_keyset_pages(self):
+        with mock.patch("core.views.CHAT_INBOX_PAGE_SIZE", 2):
+            first = self.client.get(reverse("admin_chat"))
+            self.assertEqual([p.id for p in first.context["profiles"]], [self.old.id, self.fresh.id])
+            self.assertIn("before=", first.context["next_page_url"])
+            second = self.client.get(first.context["next_page_url"])
+        self.assertEqual([p.id for p in second.context["profiles"]], [self.middle.id, self.quiet.id])
+        self.assertEqual(second.context["next_page_url"], "")
+        unread = {item["profile"].id: item["unread_count"] for item in first.context["thread_items"]}
+        # Pehla thread select hokar read ho jata hai; baaki ka badge dikhta hai.
+        self.assertEqual(unread, {self.old.id: 0, self.fresh.id: 1})
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        response = self.client.get(reverse("admin_chat"), {"before": "garbage"})
+        self.assertEqual(response.context["profiles"][0].id, self.old.id)
+
+
+def make_vacancy(title="Patwari Bharti", **extra):
+    return Vacancy.objects.create(title=title, organization="CG Vyapam", last_date=date(2030, 1, 1), **extra)
+
+
+class ApplicantPayloadFilterTests(TestCase):
+    def setUp(self):
+        vacancy = make_vacancy()
+        self.obc = Application.objects.create(
+            profile=make_profile("obc"), vacancy=vacancy,
+            payload={"personal": [{"label": "Category", "value": "OBC"}, {"label": "Caste", "value": "SC"}]},
+        )
+        self.mixed = Application.objects.create(
+            profile=make_profile("mixed"), vacancy=vacancy,
+            payload={"personal": [{"label": "Category", "value": "SC"}, {"label": "Remarks", "value": "OBC"}]},
+        )
+
+    def filtered(self, label, value):
+        return set(core_views._filtered_applications("", "all", field_label=label, field_value=value).values_list("id", flat=True))
+
+    def test_label_and_value_must_match_same_row(self):
+        self.assertEqual(self.filtered("Category", "OBC"), {self.obc.id})
+        self.assertEqual(self.filtered("Category", "SC"), {self.mixed.id})
+
+    def test_match_is_exact_and_case_sensitive(self):
+        self.assertEqual(self.filtered("Category", "obc"), set())
+        self.assertEqual(self.filtered("Categ", "OBC"), set())
+        self.assertEqual(self.filtered("", "OBC"), {self.obc.id, self.mixed.id})
+
+
+class ApplicantKeysetPageTests(TestCase):
+    def setUp(self):
+        vacancy = make_vacancy()
+        base = timezone.now().replace(microsecond=123456)
+        # Do jode same applied_at par: tie id se tootna chahiye.
+        offsets = (0, 0, 1, 2, 2)
+        self.apps = []
+        for idx, offset in enumerate(offsets):
+            app = Application.objects.create(profile=make_profile(f"applicant{idx}"), vacancy=vacancy)
+            Application.objects.filter(pk=app.pk).update(applied_at=base + timedelta(minutes=offset))
+            self.apps.append(app.id)
+
+    def page(self, after=None, before=None):
+        rows, next_cursor, prev_cursor = core_views._keyset_application_page(
+            Application.objects.all(), 2,
+            after=core_views._decode_keyset_cursor(after) if after else None,
+            before=core_views._decode_keyset_cursor(before) if before else None,
+        )
+        return [row.id for row in rows], next_cursor, prev_cursor
+
+    def test_cursor_round_trip(self):
+        app = Application.objects.get(pk=self.apps[0])
+        cursor = core_views._encode_keyset_cursor(app.applied_at, app.id)
+        self.assertEqual(core_views._decode_keyset_cursor(cursor), (app.applied_at, app.id))
+
+    def test_invalid_cursor_decodes_to_none(self):
+        for raw in (None, "", "abc", "123", "x_1", "1_y", "9" * 40 + "_1"):
+            self.assertIsNone(core_views._decode_keyset_cursor(raw), raw)
+
+    def test_next_and_previous_pages_with_ties(self):
+        first, next_cursor, prev_cursor = self.page()
+        self.assertEqual((first, prev_cursor), (self.apps[:2], ""))
+        second, next_cursor, prev_cursor = self.page(after=next_cursor)
+        self.assertEqual(second, self.apps[2:4])
+        third, last_next, third_prev = self.page(after=next_cursor)
+        self.assertEqual((third, last_next), (self.apps[4:], ""))
+        self.assertEqual(self.page(before=third_prev)[0], self.apps[2:4])
+        back, _, back_prev = self.page(before=prev_cursor)
+        self.assertEqual((back, back_prev), (self.apps[:2], ""))
+
+    def test_tampered_cursor_falls_back_to_first_page(self):
+        User.objects.create_user(username="staff", password="pass12345", is_staff=True)
+        self.client.login(username="staff", password="pass12345")
+        for params in ({"after": "not-a-cursor"}, {"before": "12_abc"}):
+            response = self.client.get(reverse("admin_applicants"), {**params, "per_page": 10})
+            self.assertEqual([app.id for app in response.context["applications"]], self.apps)
+            self.assertEqual(response.context["prev_page_url"], "")
+
+
+class ApplicantCsvExportTests(TestCase):
+    def setUp(self):
+        User.objects.create_user(username="staff", password="pass12345", is_staff=True)
+        self.client.login(username="staff", password="pass12345")
+        vacancy = make_vacancy()
+        self.first = Application.objects.create(
+            profile=make_profile("asha", "9876500001", full_name="Asha Verma", category="OBC"), vacancy=vacancy
+        )
+        self.second = Application.objects.create(
+            profile=make_profile("ravi", full_name="Ravi, \"Jr\""), vacancy=vacancy, status=Application.STATUS_APPROVED
+        )
+
+    def export(self, url, params=None):
+        response = self.client.get(url, params or {})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        return response, list(csv.DictReader(io.StringIO(b"".join(response.streaming_content).decode())))
+
+    def test_bulk_export_streams_rows(self):
+        response, rows = self.export(reverse("admin_export_csv"))
+        self.assertIn('filename="applicants_export.csv"', response["Content-Disposition"])
+        self.assertEqual([row["Application ID"] for row in rows], [str(self.first.id), str(self.second.id)])
+        self.assertEqual(
+            (rows[0]["Full Name"], rows[0]["Mobile"], rows[0]["Category"], rows[0]["Vacancy"], rows[0]["Status"]),
+            ("Asha Verma", "9876500001", "OBC", "Patwari Bharti", "Pending"),
+        )
+        # Comma/quote wala naam CSV quoting se ek hi column me rehta hai.
+        self.assertEqual(rows[1]["Full Name"], 'Ravi, "Jr"')
+
+    def test_status_filter_and_empty_export(self):
+        _, rows = self.export(reverse("admin_export_csv"), {"status": Application.STATUS_APPROVED})
+        self.assertEqual([row["Username"] for row in rows], ["ravi"])
+        _, rows = self.export(reverse("admin_export_csv"), {"status": Application.STATUS_REJECTED})
+        self.assertEqual(rows, [{"No Data": "No matching records"}])
+
+    def test_single_export_matches_bulk_columns(self):
+        response, rows = self.export(reverse("admin_export_single_csv", args=[self.first.id]))
+        self.assertIn(f'filename="applicant_{self.first.id}.csv"', response["Content-Disposition"])
+        _, bulk = self.export(reverse("admin_export_csv"))
+        self.assertEqual(rows, bulk[:1])
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(prefix="portal-media-test-"))
+class ApplicantDocumentZipTests(TestCase):
+    def setUp(self):
+        User.objects.create_user(username="staff", password="pass12345", is_staff=True)
+        self.client.login(username="staff", password="pass12345")
+        buffer = io.BytesIO()
+        Image.new("RGB", (40, 50), "white").save(buffer, format="PNG")
+        self.png = buffer.getvalue()
+        self.profile = make_profile("asha", full_name="Asha Verma")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.photo = SimpleUploadedFile("photo.png", self.png)
+            self.profile.save()
+            UserDocument.objects.create(profile=self.profile, title="Marksheet", file=SimpleUploadedFile("marks.pdf", b"%PDF-1.4 " * 200))
+            UserDocument.objects.create(profile=self.profile, title="Notes", file=SimpleUploadedFile("notes.txt", b"likha hua " * 200))
+        self.application = Application.objects.create(profile=self.profile, vacancy=make_vacancy())
+
+    def test_zip_streams_all_documents(self):
+        response = self.client.get(reverse("admin_download_all_documents", args=[self.application.id]))
+        self.assertTrue(response.streaming)
+        self.assertIn('filename="asha_verma_documents.zip"', response["Content-Disposition"].lower())
+        with zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content))) as zf:
+            self.assertIsNone(zf.testzip())
+            infos = {info.filename: info for info in zf.infolist()}
+            self.assertEqual(list(infos), ["01_passport_photo.png", "02_marksheet_marks.pdf", "03_notes_notes.txt"])
+            self.assertEqual(zf.read("01_passport_photo.png"), self.png)
+            self.assertEqual(zf.read("03_notes_notes.txt"), b"likha hua " * 200)
+        # PNG/PDF pehle se compressed: STORED; text deflate hota hai.
+        self.assertEqual(infos["01_passport_photo.png"].compress_type, zipfile.ZIP_STORED)
+        self.assertEqual(infos["02_marksheet_marks.pdf"].compress_type, zipfile.ZIP_STORED)
+        self.assertEqual(infos["03_notes_notes.txt"].compress_type, zipfile.ZIP_DEFLATED)
+        self.assertLess(infos["03_notes_notes.txt"].compress_size, infos["03_notes_notes.txt"].file_size)
+
+
+class BreadcrumbTests(SimpleTestCase):
+    def setUp(self):
+        context_processors._route_labels.cache_clear()
+
+    def crumbs(self, path):
+        return [(crumb["label"], crumb["url"]) for crumb in context_processors.breadcrumbs(RequestFactory().get(path))["breadcrumbs"]]
+
+    def test_numeric_ids_share_one_cache_entry(self):
+        self.assertEqual(self.crumbs("/news/1/"), [("Home", "/"), ("News", "/news/"), ("News Detail", "/news/1/")])
+        self.assertEqual(self.crumbs("/news/2/"), [("Home", "/"), ("News", "/news/"), ("News Detail", "/news/2/")])
+        info = context_processors._route_labels.cache_info()
+        self.assertEqual((info.currsize, info.misses, info.hits), (1, 1, 1))
+
+    def test_root_urlconf_change_clears_cache(self):
+        self.crumbs("/news/1/")
+        with override_settings(ROOT_URLCONF="accounts.urls"):
+            self.assertEqual(context_processors._route_labels.cache_info().currsize, 0)
+            # Naye urlconf me /news/ route nahi hai: labels slug se bante hain.
+            self.assertEqual(self.crumbs("/news/1/"), [("Home", "/"), ("News", "/news/"), ("#1", "/news/1/")])
+        self.assertEqual(context_processors._route_labels.cache_info().currsize, 0)
+        self.assertEqual(self.crumbs("/news/1/")[-1], ("News Detail", "/news/1/"))
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(prefix="portal-media-test-"))
+class ApplyFlowQueryTests(TestCase):
+    def setUp(self):
+        self.profile = make_profile("applicant", full_name="Asha Verma")
+        self.vacancy = make_vacancy(required_documents=["Aadhar Card", "10th Marksheet"])
+        self.client.login(username="applicant", password="pass12345")
+        session = self.client.session
+        session["pending_form_apply"] = {"vacancy_id": self.vacancy.id}
+        session.save()
+
+    def add_documents(self, titles):
+        with self.captureOnCommitCallbacks(execute=True):
+            for title in titles:
+                UserDocument.objects.create(profile=self.profile, title=title, file=SimpleUploadedFile(f"{title}.pdf", title.encode()))
+
+    def page_queries(self, url_name):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse(url_name))
+        self.assertEqual(response.status_code, 200)
+        document_reads = [q["sql"] for q in ctx.captured_queries if 'FROM "accounts_userdocument"' in q["sql"]]
+        return len(ctx.captured_queries), len(document_reads)
+
+    def test_documents_read_once_regardless_of_count(self):
+        url_names = ("confirm_send_to_admin", "apply_profile_preview")
+        self.add_documents(["Aadhar Card"])
+        few = [self.page_queries(url_name) for url_name in url_names]
+        self.add_documents(["10th Marksheet", "Caste Certificate", "Income Certificate"])
+        many = [self.page_queries(url_name) for url_name in url_names]
+        # Documents table ek hi baar padha jata hai, aur query count documents ki ginti se nahi badhta.
+        self.assertEqual([doc_reads for _, doc_reads in few + many], [1, 1, 1, 1])
+        self.assertEqual(many, few)
+
+
+class VacancyCatalogTests(TestCase):
+    def test_django_admin_edit_reaches_dashboard(self):
+        vacancy = make_vacancy("Patwari Bharti 2030")
+        User.objects.create_superuser(username="root", password="pass12345")
+        self.client.login(username="root", password="pass12345")
+        self.assertContains(self.client.get(reverse("dashboard")), "Patwari Bharti 2030")
+
+        change_url = reverse("admin:accounts_vacancy_change", args=[vacancy.pk])
+        form = self.client.get(change_url).context["adminform"].form
+        data = {name: form[name].value() for name in form.fields}
+        data = {name: "" if value is None else value for name, value in data.items() if name != "image"}
+        data["title"] = "Revenue Inspector 2030"
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(change_url, data)
+        self.assertEqual(response.status_code, 302)
+
+        dashboard = self.client.get(reverse("dashboard"))
+        self.assertContains(dashboard, "Revenue Inspector 2030")
+        self.assertNotContains(dashboard, "Patwari Bharti 2030")
+
+
+class VacancyRequirementSpecsTests(TestCase):
+    def test_save_stores_parsed_specs(self):
+        vacancy = make_vacancy(required_documents=["DOC|10th Marksheet", "PHOTO| Passport Photo", "", "Aadhar Card", "DATA|Category"])
+        vacancy.refresh_from_db()
+        self.assertEqual(
+            vacancy.required_document_specs,
+            [
+                {"idx": 0, "kind": "Document", "name": "10th Marksheet", "key": "10th marksheet"},
+                {"idx": 1, "kind": "Photo", "name": "Passport Photo", "key": "passport photo"},
+                {"idx": 3, "kind": "Document", "name": "Aadhar Card", "key": "aadhar card"},
+                {"idx": 4, "kind": "Data", "name": "Category", "key": "category"},
+            ],
+        )
+
+    def test_update_fields_save_refreshes_specs(self):
+        vacancy = make_vacancy(required_documents=["Aadhar Card"])
+        vacancy.required_documents = ["DOC|Caste Certificate"]
+        vacancy.save(update_fields=["required_documents"])
+        self.assertEqual(
+            Vacancy.objects.values_list("required_document_specs", flat=True).get(pk=vacancy.pk),
+            [{"idx": 0, "kind": "Document", "name": "Caste Certificate", "key": "caste certificate"}],
+        )
+
+
+class ProfileSearchTests(TestCase):
+    def setUp(self):
+        self.amit = make_profile("amit01", "9876504321", full_name="अमित कुमार")
+        self.amita = make_profile("amita02", "9123456789", full_name="अमिता वर्मा")
+
+    def test_devanagari_names_keep_vowel_signs(self):
+        self.assertEqual(normalize_search_text("अमित, कुमार!"), "अमित कुमार")
+        self.assertEqual(
+            profile_search_tokens("अमित कुमार", "Amit01", ""),
+            {"अमित", "कुमार", "अमितकुमार", "amit01"},
+        )
+
+    def test_prefix_search_and_exact_rank(self):
+        self.assertEqual([p.id for p in search_profiles("अमि")], [self.amita.id, self.amit.id])
+        self.assertEqual([p.id for p in search_profiles("अमित")], [self.amit.id, self.amita.id])
+        self.assertEqual([p.id for p in search_profiles("कुमार")], [self.amit.id])
+
+    def test_mobile_substring_search(self):
+        self.assertEqual([p.id for p in search_profiles("4321")], [self.amit.id])
+
+    def test_reindex_migration_rebuilds_tokens(self):
+        UserProfile.objects.filter(pk=self.amit.pk).update(search_text="अम त क म र")
+        ProfileSearchToken.objects.filter(profile=self.amit).delete()
+        ProfileSearchToken.objects.create(profile=self.amit, token="अम")
+        migration = importlib.import_module("accounts.migrations.0034_reindex_profile_search")
+        migration.reindex_search(apps, None)
+        self.assertEqual(UserProfile.objects.get(pk=self.amit.pk).search_text, "अमित कुमार amit01 9876504321")
+        tokens = set(ProfileSearchToken.objects.filter(profile=self.amit).values_list("token", flat=True))
+        self.assertNotIn("अम", tokens)
+        self.assertIn("अमितकुमार", tokens)
+
+
+class RequestedFieldResolutionTests(TestCase):
+    def test_empty_alias_does_not_claim_a_field(self):
+        candidates = ("fullname", "fathername", "category")
+        self.assertEqual(core_views._resolve_requested_fields(("", "category"), candidates), (None, 2))
+        self.assertEqual(core_views._resolve_requested_fields(("fathername",), candidates), (1,))
+
+
+def scan_image(size):
+    noise = Image.effect_noise(size, 40).convert("RGB")
+    return Image.blend(Image.linear_gradient("L").resize(size).convert("RGB"), noise, 0.5)
+
+
+class EncodeToTargetTests(SimpleTestCase):
+    ENCODE_BUDGET = 12
+
+    def assert_fits(self, size, target):
+        data, output, encodes = encode_to_target(scan_image(size), "image/jpeg", target)
+        self.assertLessEqual(len(data), target)
+        self.assertAlmostEqual(output.width / output.height, size[0] / size[1], delta=size[0] / size[1] * 0.01)
+        self.assertGreaterEqual(min(output.size), MIN_SIDE_PX)
+        self.assertLessEqual(encodes, self.ENCODE_BUDGET)
+        return output
+
+    def test_photo_downscaled_to_target(self):
+        output = self.assert_fits((2400, 1800), 60_000)
+        self.assertLess(output.width, 2400)
+
+    def test_thin_scan_keeps_aspect_ratio_at_floor(self):
+        output = self.assert_fits((4000, 300), 20_000)
+        self.assertEqual(output.height, MIN_SIDE_PX)
@@ -14,6 +14,9 @@ urlpatterns = [
     path('document-converter/images-to-pdf/', views.document_converter_images_to_pdf_view, name='document_converter_images_to_pdf'),
     path('document-converter/pdf-to-images/', views.document_converter_pdf_to_images_view, name='document_converter_pdf_to_images'),
     path('document-converter/ocr/', views.document_converter_ocr_view, name='document_converter_ocr'),
+    path('document-converter/jobs/<str:job_id>/', views.document_converter_job_status_view, name='document_converter_job_status'),
+    path('document-converter/jobs/<str:job_id>/result/', views.document_converter_job_result_view, name='document_converter_job_result'),
+    path('media/derivative/<str:size>/<path:name>', views.media_derivative_view, name='media_derivative'),
     path('master-data/', views.master_data_view, name='master_data'),
     path('master-data/personal/', views.master_data_personal_view, name='master_data_personal'),
     path('master-data/address/', views.master_data_address_view, name='master_data_address'),
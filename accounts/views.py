@@ -2,20 +2,76 @@ from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
+from django.contrib.auth.views import redirect_to_login
 from django.core.files.storage import default_storage
-from django.db import OperationalError, ProgrammingError
+from django.db import IntegrityError, OperationalError, ProgrammingError, transaction
 from django.db.models import Q
-from django.http import HttpResponse, JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import redirect, render
+from django.urls import reverse
 from django.utils import timezone
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_POST, require_safe
 from datetime import date, timedelta
 from decimal import Decimal, InvalidOperation
-import io
-import zipfile
-
-from .models import DocumentRule, MasterDataField, PortalNews, UserDocument, UserProfile, WalletTransaction
-from PIL import Image, ImageOps
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from itertools import chain
+
+from .converters import (
+    PDF_DEFAULT_DPI,
+    PDF_RENDER_CHUNK_PAGES,
+    PDF_RENDER_DEFAULT_DPI,
+    PDF_RENDER_MAX_DPI,
+    PDF_RENDER_MIN_DPI,
+    ConverterError,
+    check_sync_page_count,
+    convert_image,
+    images_to_pdf,
+    ocr_pdf_pages,
+    ocr_result,
+    ocr_text,
+    parse_page_range,
+    pdf_page_count,
+    pdf_to_images,
+    render_pdf_pages,
+    stream_zip_members,
+)
+from .jobs import (
+    JOB_PENDING_DEADLINE_SECONDS,
+    JobQueueFull,
+    cached_result,
+    job_result,
+    job_status,
+    map_jobs,
+    result_cache_key,
+    run_job,
+    spool_input,
+    store_cached_result,
+    submit_job,
+)
+from .media import (
+    DERIVATIVE_SIZES,
+    PUBLIC_MEDIA_PREFIXES,
+    build_derivatives,
+    derivative_name,
+    derivative_source_name,
+    forget_media_url,
+    media_file_response,
+    safe_media_url as _safe_media_url,
+    storage_url,
+    supports_derivatives,
+)
+from .models import (
+    ChatMessage,
+    DocumentRule,
+    MasterDataField,
+    PortalNews,
+    UserDocument,
+    UserProfile,
+    WalletTransaction,
+    normalize_mobile,
+    stored_file_display_name,
+)
+from PIL import Image
 
 
 STEPS = [
@@ -133,13 +189,7 @@ def _norm_label(value):
 
 
 def _active_master_fields(step_key, field_kind):
-    return list(
-        MasterDataField.objects.filter(
-            step=step_key,
-            field_kind=field_kind,
-            is_active=True,
-        ).order_by("display_order", "label", "id")
-    )
+    return list(MasterDataField.registry().get((step_key, field_kind), ()))
 
 
 def _step_extra_values_map(profile_rows):
@@ -213,24 +263,8 @@ def _document_specs_for_profile(profile):
     return specs
 
 
-def _normalize_doc_name(value):
-    return str(value or "").strip().lower()
-
-
-def _find_rule_for_title(title, rules):
-    key = _normalize_doc_name(title)
-    if not key:
-        return None
-    if key in rules:
-        return rules[key]
-    for name_key, rule in rules.items():
-        if key in name_key or name_key in key:
-            return rule
-    return None
-
-
 def _validate_file_rule(title, file_obj, rules):
-    rule = _find_rule_for_title(title, rules)
+    rule = rules.match(title)
     if not rule or not file_obj:
         return None
     size_kb = max(int(file_obj.size / 1024), 1)
@@ -349,18 +383,11 @@ def _news_for_master_page():
         return PortalNews.objects.none()
 
 
-def _mobile_key(value):
-    return "".join(ch for ch in str(value or "") if ch.isdigit())
-
-
 def _find_profile_by_mobile(raw_mobile):
-    key = _mobile_key(raw_mobile)
+    key = normalize_mobile(raw_mobile)
     if not key:
         return None
-    for profile in UserProfile.objects.select_related("user").exclude(mobile=""):
-        if _mobile_key(profile.mobile) == key:
-            return profile
-    return None
+    return UserProfile.objects.select_related("user").filter(mobile_key=key).first()
 
 
 def _build_extra_rows(labels, values, permanents=None):
@@ -377,20 +404,6 @@ def _build_extra_rows(labels, values, permanents=None):
     return output
 
 
-def _safe_media_url(file_field):
-    if not file_field:
-        return ""
-    name = getattr(file_field, "name", "") or ""
-    if not name:
-        return ""
-    try:
-        if not default_storage.exists(name):
-            return ""
-        return file_field.url
-    except Exception:
-        return ""
-
-
 def _profile_image_url(profile, title, profile_field):
     direct = _safe_media_url(profile_field)
     if direct:
@@ -408,8 +421,7 @@ def _document_file_info(profile, title):
     url = _safe_media_url(doc.file)
     if not url:
         return {"uploaded": False, "url": "", "name": ""}
-    name = (doc.file.name or "").split("/")[-1]
-    return {"uploaded": True, "url": url, "name": name}
+    return {"uploaded": True, "url": url, "name": stored_file_display_name(doc, "file")}
 
 
 def login_view(request):
@@ -440,7 +452,7 @@ def register_view(request):
         mobile = request.POST.get("mobile", "").strip()
         password = request.POST.get("password", "")
         confirm = request.POST.get("confirm", "")
-        mobile_norm = _mobile_key(mobile)
+        mobile_norm = normalize_mobile(mobile)
         if not username or not mobile_norm or not password:
             messages.error(request, "Username, mobile number aur password required hai.")
         elif password != confirm:
@@ -450,8 +462,14 @@ def register_view(request):
         elif _find_profile_by_mobile(mobile_norm):
             messages.error(request, "Ye mobile number already registered hai.")
         else:
-            user = User.objects.create_user(username=username, password=password)
-            UserProfile.objects.create(user=user, mobile=mobile_norm)
+            try:
+                # Parallel registrations me duplicate mobile/username ko DB ka unique index rokta hai.
+                with transaction.atomic():
+                    user = User.objects.create_user(username=username, password=password)
+                    UserProfile.objects.create(user=user, mobile=mobile_norm)
+            except IntegrityError:
+                messages.error(request, "Ye username ya mobile number already registered hai.")
+                return render(request, "accounts/register.html")
             login(request, user)
             messages.success(request, "Account ban gaya! Ab Master Data bharo.")
             return redirect("master_data_option")
@@ -552,101 +570,85 @@ def document_converter_view(request):
     return render(request, "accounts/document_converter.html")
 
 
-def _encode_with_pillow(image, mime_type, quality):
-    output = io.BytesIO()
-    save_kwargs = {"optimize": True}
-    if mime_type == "image/jpeg":
-        save_kwargs.update({"format": "JPEG", "quality": quality, "progressive": True})
-    elif mime_type == "image/webp":
-        save_kwargs.update({"format": "WEBP", "quality": quality, "method": 6})
-    else:
-        save_kwargs.update({"format": "PNG", "compress_level": 9})
-    image.save(output, **save_kwargs)
-    return output.getvalue()
-
-
-def _target_dimensions(src_w, src_h, req_w, req_h):
-    if req_w and req_h:
-        return max(req_w, 1), max(req_h, 1)
-    if req_w and not req_h:
-        ratio = req_w / max(src_w, 1)
-        return max(req_w, 1), max(int(src_h * ratio), 1)
-    if req_h and not req_w:
-        ratio = req_h / max(src_h, 1)
-        return max(int(src_w * ratio), 1), max(req_h, 1)
-    return src_w, src_h
-
-
-def _flatten_on_white(image):
-    # Keep transparent PNG/WebP background clean in JPEG/WebP output.
-    if image.mode in ("RGBA", "LA"):
-        bg = Image.new("RGB", image.size, (255, 255, 255))
-        alpha = image.getchannel("A")
-        bg.paste(image.convert("RGB"), mask=alpha)
-        return bg
-    if image.mode == "P":
-        if "transparency" in image.info:
-            rgba = image.convert("RGBA")
-            bg = Image.new("RGB", rgba.size, (255, 255, 255))
-            bg.paste(rgba.convert("RGB"), mask=rgba.getchannel("A"))
-            return bg
-        return image.convert("RGB")
-    if image.mode not in ("RGB", "L"):
-        return image.convert("RGB")
-    return image
-
-
-def _resize_no_stretch(image, req_w, req_h):
-    src_w, src_h = image.size
-    out_w, out_h = _target_dimensions(src_w, src_h, req_w, req_h)
-    if (out_w, out_h) == (src_w, src_h):
-        return image
-
-    # If both dimensions are given, fit inside target box and pad on white.
-    if req_w and req_h:
-        scale = min(req_w / max(src_w, 1), req_h / max(src_h, 1))
-        fit_w = max(int(src_w * scale), 1)
-        fit_h = max(int(src_h * scale), 1)
-        fitted = image.resize((fit_w, fit_h), Image.Resampling.LANCZOS)
-        if fitted.mode not in ("RGB", "L"):
-            fitted = _flatten_on_white(fitted)
-        if fitted.mode == "L":
-            canvas = Image.new("L", (req_w, req_h), 255)
-        else:
-            canvas = Image.new("RGB", (req_w, req_h), (255, 255, 255))
-        x = (req_w - fit_w) // 2
-        y = (req_h - fit_h) // 2
-        canvas.paste(fitted, (x, y))
-        return canvas
-
-    # Single-side resize keeps aspect ratio naturally.
-    return image.resize((out_w, out_h), Image.Resampling.LANCZOS)
-
-
-def _clamp_crop_box(img_w, img_h, x, y, w, h):
-    x = max(0, min(x, img_w - 1))
-    y = max(0, min(y, img_h - 1))
-    w = max(1, min(w, img_w - x))
-    h = max(1, min(h, img_h - y))
-    return x, y, w, h
-
-
-def _open_image_from_upload(file_obj):
-    image = Image.open(file_obj)
-    image = ImageOps.exif_transpose(image)
-    if image.mode in ("RGBA", "LA", "P"):
-        bg = Image.new("RGB", image.size, (255, 255, 255))
-        if image.mode == "P":
-            image = image.convert("RGBA")
-        if image.mode in ("RGBA", "LA"):
-            alpha = image.getchannel("A")
-            bg.paste(image.convert("RGB"), mask=alpha)
-        else:
-            bg.paste(image.convert("RGB"))
-        return bg
-    if image.mode != "RGB":
-        return image.convert("RGB")
-    return image
+def _int_param(request, name, default=0):
+    try:
+        return int(request.POST.get(name, str(default)) or str(default))
+    except ValueError:
+        return default
+
+
+def _converter_http_response(result):
+    response = HttpResponse(result["body"], content_type=result["content_type"])
+    for header, value in result["headers"].items():
+        response[header] = value
+    return response
+
+
+def _converter_error_response(exc):
+    if isinstance(exc, JobQueueFull):
+        return JsonResponse({"error": "Converter abhi busy hai, thodi der baad try karo."}, status=503)
+    if isinstance(exc, ConverterError):
+        return JsonResponse({"error": exc.message}, status=exc.status)
+    if isinstance(exc, FuturesTimeoutError):
+        return JsonResponse({"error": "Conversion me zyada time lag gaya."}, status=504)
+    return JsonResponse({"error": "Converter job fail ho gaya."}, status=500)
+
+
+def _run_converter(request, kind, task, *args, cache_key=None):
+    # async=1: job pool me daal kar turant 202; warna pool me chala kar wait (purane clients ke liye).
+    try:
+        if request.POST.get("async") == "1":
+            job_id = submit_job(request.user.id, kind, task, *args, cache_key=cache_key)
+            return JsonResponse(
+                {
+                    "job_id": job_id,
+                    "status": "pending",
+                    "status_url": reverse("document_converter_job_status", args=[job_id]),
+                    "result_url": reverse("document_converter_job_result", args=[job_id]),
+                    "timeout_ms": JOB_PENDING_DEADLINE_SECONDS * 1000,
+                },
+                status=202,
+            )
+        result = run_job(task, *args, cache_key=cache_key)
+    except Exception as exc:
+        return _converter_error_response(exc)
+    return _converter_http_response(result)
+
+
+def _ocr_all_pages(data, lang, cache_key):
+    cached = cached_result(cache_key)
+    if cached is not None:
+        return cached
+    # Pages pool workers me chunks me bante hain; bade PDF sync me nahi, async job se.
+    spool_path = spool_input(data, "pdf")
+    try:
+        page_count = run_job(pdf_page_count, str(spool_path))
+        check_sync_page_count(page_count)
+        chunks = [
+            (str(spool_path), range(start, min(start + PDF_RENDER_CHUNK_PAGES, page_count)), lang)
+            for start in range(0, page_count, PDF_RENDER_CHUNK_PAGES)
+        ]
+        result = ocr_result([text for batch in map_jobs(ocr_pdf_pages, chunks) for text in batch])
+    finally:
+        spool_path.unlink(missing_ok=True)
+    store_cached_result(cache_key, result)
+    return result
+
+
+class _PdfPageStream:
+    # Response close() par cleanup hota hai, chahe stream shuru hi na hua ho (client pehle hi chala gaya).
+    def __init__(self, spool_path, first_batch, batches):
+        self.spool_path = spool_path
+        self.first_batch = first_batch
+        self.batches = batches
+
+    def __iter__(self):
+        batches = chain([self.first_batch], self.batches)
+        return stream_zip_members(member for batch in batches for member in batch)
+
+    def close(self):
+        self.batches.close()
+        self.spool_path.unlink(missing_ok=True)
 
 
 @login_required
@@ -662,35 +664,19 @@ def document_converter_process_view(request):
         target_kb = max(int(request.POST.get("target_kb", "200")), 10)
     except ValueError:
         target_kb = 200
-    target_bytes = max((target_kb - 1) * 1024, 1024)
     out_type = request.POST.get("out_type", "keep")
-    quality_lock = request.POST.get("quality_lock", "1") == "1"
-    strict_kb = request.POST.get("strict_kb", "1") == "1"
-    try:
-        req_w = int(request.POST.get("width", "0") or "0")
-    except ValueError:
-        req_w = 0
-    try:
-        req_h = int(request.POST.get("height", "0") or "0")
-    except ValueError:
-        req_h = 0
-    crop_mode = request.POST.get("crop_mode", "none")
-    try:
-        crop_x = int(request.POST.get("crop_x", "0") or "0")
-    except ValueError:
-        crop_x = 0
-    try:
-        crop_y = int(request.POST.get("crop_y", "0") or "0")
-    except ValueError:
-        crop_y = 0
-    try:
-        crop_w = int(request.POST.get("crop_w", "0") or "0")
-    except ValueError:
-        crop_w = 0
-    try:
-        crop_h = int(request.POST.get("crop_h", "0") or "0")
-    except ValueError:
-        crop_h = 0
+    options = {
+        "target_kb": target_kb,
+        "quality_lock": request.POST.get("quality_lock", "1") == "1",
+        "strict_kb": request.POST.get("strict_kb", "1") == "1",
+        "req_w": _int_param(request, "width"),
+        "req_h": _int_param(request, "height"),
+        "crop_mode": request.POST.get("crop_mode", "none"),
+        "crop_x": _int_param(request, "crop_x"),
+        "crop_y": _int_param(request, "crop_y"),
+        "crop_w": _int_param(request, "crop_w"),
+        "crop_h": _int_param(request, "crop_h"),
+    }
 
     mime_type = out_type
     if out_type == "keep":
@@ -698,109 +684,7 @@ def document_converter_process_view(request):
     if mime_type not in {"image/jpeg", "image/png", "image/webp"}:
         mime_type = "image/jpeg"
 
-    image = Image.open(file_obj)
-    image = ImageOps.exif_transpose(image)
-    if mime_type in {"image/jpeg", "image/webp"}:
-        image = _flatten_on_white(image)
-    if mime_type == "image/png" and image.mode not in ("RGB", "RGBA", "L", "LA"):
-        image = image.convert("RGBA")
-
-    # Optional crop before resize/compress to preserve quality better.
-    if crop_mode in {"center", "custom"}:
-        img_w, img_h = image.size
-        if crop_mode == "center":
-            target_ratio = 1.0
-            if crop_w > 0 and crop_h > 0:
-                target_ratio = crop_w / max(crop_h, 1)
-            src_ratio = img_w / max(img_h, 1)
-            if src_ratio > target_ratio:
-                new_w = int(img_h * target_ratio)
-                new_h = img_h
-            else:
-                new_w = img_w
-                new_h = int(img_w / max(target_ratio, 0.01))
-            start_x = max((img_w - new_w) // 2, 0)
-            start_y = max((img_h - new_h) // 2, 0)
-            image = image.crop((start_x, start_y, start_x + new_w, start_y + new_h))
-        else:
-            if crop_w > 0 and crop_h > 0:
-                x, y, w, h = _clamp_crop_box(img_w, img_h, crop_x, crop_y, crop_w, crop_h)
-                image = image.crop((x, y, x + w, y + h))
-
-    image = _resize_no_stretch(image, req_w, req_h)
-
-    best_bytes = b""
-    best_size = None
-    work_image = image
-
-    if quality_lock:
-        # Keep visual quality high and avoid aggressive re-compression/downscale.
-        if mime_type == "image/png":
-            best_bytes = _encode_with_pillow(work_image, mime_type, 100)
-            best_size = len(best_bytes)
-        else:
-            for q in (98, 96, 94):
-                encoded = _encode_with_pillow(work_image, mime_type, q)
-                if best_size is None or len(encoded) < best_size:
-                    best_bytes = encoded
-                    best_size = len(encoded)
-                if len(encoded) <= target_bytes:
-                    best_bytes = encoded
-                    best_size = len(encoded)
-                    break
-    else:
-        min_quality = 62
-        for _ in range(10):
-            local_best = None
-            if mime_type == "image/png":
-                png_bytes = _encode_with_pillow(work_image, mime_type, 100)
-                local_best = png_bytes
-            else:
-                for q in range(96, min_quality - 1, -2):
-                    encoded = _encode_with_pillow(work_image, mime_type, q)
-                    if local_best is None or len(encoded) < len(local_best):
-                        local_best = encoded
-                    if len(encoded) <= target_bytes:
-                        local_best = encoded
-                        break
-
-            current_size = len(local_best or b"")
-            if best_size is None or (current_size and current_size < best_size):
-                best_size = current_size
-                best_bytes = local_best or b""
-            if current_size and current_size <= target_bytes:
-                best_bytes = local_best or b""
-                best_size = current_size
-                break
-            if not strict_kb and best_bytes:
-                break
-
-            w, h = work_image.size
-            next_w = max(int(w * 0.95), 120)
-            next_h = max(int(h * 0.95), 120)
-            if (next_w, next_h) == (w, h):
-                break
-            work_image = work_image.resize((next_w, next_h), Image.Resampling.LANCZOS)
-
-    if not best_bytes:
-        return JsonResponse({"error": "Unable to convert image."}, status=500)
-
-    ext = "jpg"
-    if mime_type == "image/png":
-        ext = "png"
-    elif mime_type == "image/webp":
-        ext = "webp"
-    base_name = (file_obj.name or "image").rsplit(".", 1)[0]
-    download_name = f"{base_name}_converted.{ext}"
-
-    response = HttpResponse(best_bytes, content_type=mime_type)
-    response["Content-Disposition"] = f'attachment; filename="{download_name}"'
-    response["X-Original-Size"] = str(file_obj.size)
-    response["X-Converted-Size"] = str(len(best_bytes))
-    response["X-Output-Width"] = str(work_image.size[0])
-    response["X-Output-Height"] = str(work_image.size[1])
-    response["X-Output-Name"] = download_name
-    return response
+    return _run_converter(request, "image", convert_image, file_obj.read(), file_obj.name, mime_type, options)
 
 
 @login_required
@@ -810,33 +694,15 @@ def document_converter_images_to_pdf_view(request):
     if not image_files:
         return JsonResponse({"error": "Kam se kam 1 image select karo."}, status=400)
 
-    opened = []
+    files = []
     for f in image_files:
         if not (f.content_type or "").startswith("image/"):
             return JsonResponse({"error": f"{f.name}: sirf image files allowed hain."}, status=400)
-        try:
-            opened.append(_open_image_from_upload(f))
-        except Exception:
-            return JsonResponse({"error": f"{f.name}: image read nahi hui."}, status=400)
+        files.append((f.name, f.read()))
 
-    if not opened:
-        return JsonResponse({"error": "Valid images nahi mili."}, status=400)
-
-    pdf_buffer = io.BytesIO()
-    first, rest = opened[0], opened[1:]
-    first.save(pdf_buffer, format="PDF", save_all=True, append_images=rest)
-    pdf_bytes = pdf_buffer.getvalue()
-    for im in opened:
-        try:
-            im.close()
-        except Exception:
-            pass
-
-    response = HttpResponse(pdf_bytes, content_type="application/pdf")
-    response["Content-Disposition"] = 'attachment; filename="merged_documents.pdf"'
-    response["X-Output-Name"] = "merged_documents.pdf"
-    response["X-Output-Size"] = str(len(pdf_bytes))
-    return response
+    dpi = min(max(_int_param(request, "dpi", PDF_DEFAULT_DPI), 72), 300)
+    page_size = "a4" if request.POST.get("page_size") == "a4" else "fit"
+    return _run_converter(request, "images_to_pdf", images_to_pdf, files, dpi, page_size)
 
 
 @login_required
@@ -848,47 +714,39 @@ def document_converter_pdf_to_images_view(request):
     if (pdf_file.content_type or "").lower() != "application/pdf":
         return JsonResponse({"error": "Sirf PDF file upload karo."}, status=400)
 
-    try:
-        import fitz  # PyMuPDF
-    except Exception:
-        return JsonResponse(
-            {
-                "error": "PDF to image ke liye server dependency missing hai (PyMuPDF). Install hone ke baad ye feature chalega."
-            },
-            status=400,
-        )
-
-    try:
-        data = pdf_file.read()
-        doc = fitz.open(stream=data, filetype="pdf")
-    except Exception:
-        return JsonResponse({"error": "PDF read nahi ho payi."}, status=400)
-
-    if doc.page_count == 0:
-        return JsonResponse({"error": "PDF me pages nahi mile."}, status=400)
-
     image_format = request.POST.get("format", "jpg").strip().lower()
     if image_format not in {"jpg", "png"}:
         image_format = "jpg"
     ext = "jpg" if image_format == "jpg" else "png"
+    pages = request.POST.get("pages", "").strip()
+    dpi = min(max(_int_param(request, "dpi", PDF_RENDER_DEFAULT_DPI), PDF_RENDER_MIN_DPI), PDF_RENDER_MAX_DPI)
 
-    zip_buffer = io.BytesIO()
-    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zf:
-        for idx in range(doc.page_count):
-            page = doc.load_page(idx)
-            pix = page.get_pixmap(alpha=False)
-            if ext == "jpg":
-                img_bytes = pix.tobytes("jpeg")
-            else:
-                img_bytes = pix.tobytes("png")
-            zf.writestr(f"page_{idx + 1}.{ext}", img_bytes)
-    doc.close()
+    if request.POST.get("async") == "1":
+        return _run_converter(request, "pdf_to_images", pdf_to_images, pdf_file.read(), ext, pages, dpi)
 
-    zip_bytes = zip_buffer.getvalue()
-    response = HttpResponse(zip_bytes, content_type="application/zip")
+    # Sync path: page chunks pool workers me parallel render hote hain aur ZIP order me stream hota hai.
+    spool_path = spool_input(pdf_file.read(), "pdf")
+    try:
+        page_indexes = parse_page_range(pages, run_job(pdf_page_count, str(spool_path)))
+        check_sync_page_count(len(page_indexes))
+        chunks = [
+            (str(spool_path), page_indexes[i:i + PDF_RENDER_CHUNK_PAGES], ext, dpi)
+            for i in range(0, len(page_indexes), PDF_RENDER_CHUNK_PAGES)
+        ]
+        batches = map_jobs(render_pdf_pages, chunks)
+        # Pehla batch yahin lete hain taaki shuru ki errors JSON me jayein, aadhi ZIP me nahi.
+        first_batch = next(batches)
+    except Exception as exc:
+        spool_path.unlink(missing_ok=True)
+        return _converter_error_response(exc)
+
+    response = StreamingHttpResponse(
+        _PdfPageStream(spool_path, first_batch, batches),
+        content_type="application/zip",
+    )
     response["Content-Disposition"] = 'attachment; filename="pdf_pages_images.zip"'
     response["X-Output-Name"] = "pdf_pages_images.zip"
-    response["X-Output-Size"] = str(len(zip_bytes))
+    response["X-Output-Pages"] = str(len(page_indexes))
     return response
 
 
@@ -899,45 +757,110 @@ def document_converter_ocr_view(request):
     if not src_file:
         return JsonResponse({"error": "File missing."}, status=400)
 
-    try:
-        import pytesseract
-    except Exception:
-        return JsonResponse(
-            {"error": "OCR dependency missing hai (pytesseract). Install hone ke baad OCR chalega."},
-            status=400,
-        )
+    content_type = (src_file.content_type or "").lower()
+    if not (content_type.startswith("image/") or content_type == "application/pdf"):
+        return JsonResponse({"error": "Image ya PDF upload karo."}, status=400)
 
-    image = None
-    if (src_file.content_type or "").startswith("image/"):
-        try:
-            image = _open_image_from_upload(src_file)
-        except Exception:
-            return JsonResponse({"error": "Image read nahi hui."}, status=400)
-    elif (src_file.content_type or "").lower() == "application/pdf":
-        try:
-            import fitz
-        except Exception:
-            return JsonResponse({"error": "PDF OCR ke liye PyMuPDF required hai."}, status=400)
+    lang = request.POST.get("lang", "eng").strip() or "eng"
+    all_pages = content_type == "application/pdf" and request.POST.get("pages", "").strip().lower() == "all"
+    data = src_file.read()
+    cache_key = result_cache_key("ocr", data, lang, "all" if all_pages else "first")
+
+    if all_pages and request.POST.get("async") != "1":
         try:
-            data = src_file.read()
-            doc = fitz.open(stream=data, filetype="pdf")
-            if doc.page_count == 0:
-                return JsonResponse({"error": "PDF me pages nahi mile."}, status=400)
-            pix = doc.load_page(0).get_pixmap(alpha=False)
-            image = Image.open(io.BytesIO(pix.tobytes("png"))).convert("RGB")
-            doc.close()
-        except Exception:
-            return JsonResponse({"error": "PDF read nahi hui."}, status=400)
-    else:
-        return JsonResponse({"error": "Image ya PDF upload karo."}, status=400)
+            return _converter_http_response(_ocr_all_pages(data, lang, cache_key))
+        except Exception as exc:
+            return _converter_error_response(exc)
+    return _run_converter(request, "ocr", ocr_text, data, content_type, lang, all_pages, cache_key=cache_key)
 
-    try:
-        lang = request.POST.get("lang", "eng").strip() or "eng"
-        text = pytesseract.image_to_string(image, lang=lang)
-    except Exception:
-        return JsonResponse({"error": "OCR process fail ho gaya."}, status=500)
 
-    return JsonResponse({"text": text or "", "chars": len(text or "")})
+@login_required
+def document_converter_job_status_view(request, job_id):
+    meta = job_status(job_id, request.user.id)
+    if not meta:
+        return JsonResponse({"error": "Job nahi mila."}, status=404)
+    payload = {"job_id": job_id, "status": meta["status"], "kind": meta.get("kind", "")}
+    if meta["status"] == "failed":
+        payload["error"] = meta.get("error", "")
+    if meta["status"] == "done":
+        payload["result_url"] = reverse("document_converter_job_result", args=[job_id])
+    return JsonResponse(payload)
+
+
+@login_required
+def document_converter_job_result_view(request, job_id):
+    meta, result = job_result(job_id, request.user.id)
+    if not meta:
+        return JsonResponse({"error": "Job nahi mila."}, status=404)
+    if meta["status"] == "failed":
+        return JsonResponse({"error": meta.get("error", "")}, status=meta.get("http_status", 500))
+    if result is None:
+        return JsonResponse({"status": meta["status"]}, status=409 if meta["status"] == "pending" else 410)
+    return _converter_http_response(result)
+
+
+def _can_access_media(user, name):
+    # chat_attachment_download jaisa rule: file jis profile ki hai uska user, ya staff. Blob ek se zyada
+    # rows share karte hain, isliye naam se rows dhoondte hain; user ki koi bhi row ho to access.
+    if user.is_staff or user.is_superuser:
+        return True
+    names = {name, derivative_source_name(name)}
+    if name.startswith(("profile_photos/", "profile_signatures/")):
+        return UserProfile.objects.filter(user=user).filter(Q(photo__in=names) | Q(signature__in=names)).exists()
+    return (
+        UserDocument.objects.filter(profile__user=user, file__in=names).exists()
+        or ChatMessage.objects.filter(profile__user=user, attachment__in=names).exists()
+    )
+
+
+def _media_access_denied(request, name):
+    if name.startswith("/") or ".." in name.split("/"):
+        raise Http404
+    if name.startswith(PUBLIC_MEDIA_PREFIXES):
+        return None
+    if not request.user.is_authenticated:
+        return redirect_to_login(request.get_full_path())
+    if not _can_access_media(request.user, name):
+        raise Http404
+    return None
+
+
+@require_safe
+def media_serve_view(request, path):
+    # DEBUG=False par /media/: transfer MEDIA_DELIVERY backend ko jata hai (nginx/apache ya ranged response).
+    denied = _media_access_denied(request, path)
+    if denied is not None:
+        return denied
+    return media_file_response(request, path)
+
+
+@login_required
+def media_derivative_view(request, size, name):
+    # Purane uploads ke liye: pehli request par thumb/preview banao, phir hamesha seedha storage URL.
+    if size not in DERIVATIVE_SIZES or not supports_derivatives(name):
+        raise Http404
+    denied = _media_access_denied(request, name)
+    if denied is not None:
+        return denied
+    target = derivative_name(name, size)
+    url = storage_url(target, missing_timeout=None)
+    if not url and default_storage.exists(target):
+        # Kisi aur worker ne bana diya par is cache me purana miss pada hai.
+        forget_media_url(target)
+        url = storage_url(target)
+    if not url:
+        original_url = storage_url(name)
+        if not original_url:
+            raise Http404
+        try:
+            with default_storage.open(name, "rb") as source:
+                build_derivatives(name, source)
+        except Exception:
+            return redirect(original_url)
+        url = storage_url(derivative_name(name, size)) or original_url
+    response = redirect(url)
+    response["Cache-Control"] = "private, max-age=86400"
+    return response
 
 
 @login_required
@@ -965,6 +888,7 @@ def master_data_personal_view(request):
         if _reject_if_masked_post(request, profile):
             return redirect("master_data_documents")
         p = request.POST
+        previous_mobile = profile.mobile
         profile.full_name = p.get("full_name", "")
         profile.father_name = p.get("father_name", "")
         profile.mother_name = p.get("mother_name", "")
@@ -975,6 +899,11 @@ def master_data_personal_view(request):
         profile.email = p.get("email", "")
         profile.aadhar = p.get("aadhar", "")
         profile.samagra_id = p.get("samagra_id", "")
+        # Sirf naya number check; 0028 ke baad duplicate number wale purane profile apna data save kar saken.
+        mobile_owner = _find_profile_by_mobile(profile.mobile) if profile.mobile != previous_mobile else None
+        if mobile_owner and mobile_owner.pk != profile.pk:
+            messages.error(request, "Ye mobile number kisi aur account se registered hai.")
+            return redirect("master_data_personal")
         profile.personal_extra_rows = _merge_admin_and_custom_rows(request, "personal", profile)
         profile.save()
         _mark_master_data_saved(profile)
@@ -1085,7 +1014,7 @@ def master_data_bank_view(request):
 @login_required
 def master_data_documents_view(request):
     profile, _ = UserProfile.objects.get_or_create(user=request.user)
-    rule_map = {_normalize_doc_name(r.name): r for r in DocumentRule.objects.filter(is_active=True)}
+    rule_map = DocumentRule.compiled()
     document_specs = _document_specs_for_profile(profile)
     if request.method == "POST":
         if request.POST.get("action") == "reveal_10min":
@@ -1,4 +1,11 @@
-from django.urls import Resolver404, resolve
+from functools import lru_cache
+
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.urls import Resolver404, get_urlconf, resolve
+
+
+BREADCRUMB_CACHE_SIZE = 512
 
 
 def _humanize_slug(text):
@@ -29,6 +36,27 @@ NAME_LABELS = {
 }
 
 
+@lru_cache(maxsize=BREADCRUMB_CACHE_SIZE)
+def _route_labels(key_parts, urlconf):
+    # Numeric segments None ban kar aate hain, so /news/123/ aur /news/456/ ek hi entry share karte hain.
+    labels = []
+    running = ""
+    for part in key_parts:
+        running += f"/{'1' if part is None else part}"
+        try:
+            match = resolve(f"{running}/", urlconf)
+            labels.append(NAME_LABELS.get(match.url_name))
+        except Resolver404:
+            labels.append(None)
+    return tuple(labels)
+
+
+@receiver(setting_changed)
+def _reset_route_labels(*, setting, **kwargs):
+    if setting == "ROOT_URLCONF":
+        _route_labels.cache_clear()
+
+
 def breadcrumbs(request):
     path = (getattr(request, "path", "") or "/").split("?", 1)[0]
     if not path.startswith("/"):
@@ -38,17 +66,12 @@ def breadcrumbs(request):
     if path == "/":
         return {"breadcrumbs": crumbs}
 
+    parts = [p for p in path.strip("/").split("/") if p]
+    key_parts = tuple(None if part.isdigit() else part for part in parts)
     running = ""
-    for part in [p for p in path.strip("/").split("/") if p]:
+    for part, label in zip(parts, _route_labels(key_parts, get_urlconf())):
         running += f"/{part}"
-        url = f"{running}/"
-        label = _humanize_slug(part)
-        try:
-            match = resolve(url)
-            label = NAME_LABELS.get(match.url_name, label)
-        except Resolver404:
-            pass
-        crumbs.append({"label": label, "url": url})
+        crumbs.append({"label": label or _humanize_slug(part), "url": f"{running}/"})
 
     # duplicate Home cleanup (when first route is already Home-labeled)
     deduped = [crumbs[0]]
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.views import DEFAULT_CATALOG, _seed_default_vacancies
+
+
+class Command(BaseCommand):
+    help = "Default government/student vacancy options create ya re-activate karta hai (deploy ke baad ek baar chalao)."
+
+    def handle(self, *args, **options):
+        _seed_default_vacancies()
+        self.stdout.write(self.style.SUCCESS(f"Default catalog seeded ({len(DEFAULT_CATALOG)} options)."))
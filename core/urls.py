@@ -9,6 +9,7 @@ urlpatterns = [
     path("send-to-admin/", views.confirm_send_to_admin, name="confirm_send_to_admin"),
     path("send-to-admin/profile/", views.apply_profile_preview, name="apply_profile_preview"),
     path("chat/", views.user_chat, name="user_chat"),
+    path("chat/poll/", views.user_chat_poll, name="user_chat_poll"),
     path("chat/clear/", views.user_chat_clear_thread, name="user_chat_clear_thread"),
     path("chat/delete-selected/", views.user_chat_delete_selected, name="user_chat_delete_selected"),
     path("chat/message/<int:message_id>/delete/", views.user_chat_delete_message, name="user_chat_delete_message"),
@@ -85,6 +86,11 @@ urlpatterns = [
     path("admin-panel/news/", views.admin_news, name="admin_news"),
     path("admin-panel/payment/", views.admin_payment, name="admin_payment"),
     path("admin-panel/chat/send/", views.admin_chat_send, name="admin_chat_send"),
+    path(
+        "admin-panel/chat/<int:profile_id>/poll/",
+        views.admin_chat_poll,
+        name="admin_chat_poll",
+    ),
     path(
         "admin-panel/chat/<int:profile_id>/toggle/",
         views.admin_chat_toggle,
@@ -1,26 +1,35 @@
+import asyncio
 import csv
-import io
 import json
+import time
 import zipfile
 import re
 from decimal import Decimal, InvalidOperation
-from urllib.parse import quote_plus
-from datetime import date, timedelta
+from functools import lru_cache
+from urllib.parse import quote_plus, unquote, urlencode
+from datetime import date, timedelta, timezone as dt_timezone
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.core.files.storage import default_storage
-from django.db import OperationalError, ProgrammingError
-from django.db.models import Q
-from django.http import FileResponse, HttpResponse, JsonResponse
+from django.db import OperationalError, ProgrammingError, connection
+from django.db.models import F, Q
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.utils import timezone
 
+from accounts.converters import ZipStreamBuffer
+from accounts.media import derivative_url, media_file_response
+from accounts.media import safe_media_url as _safe_file_url
 from accounts.models import (
+    VACANCY_CATALOG_SNAPSHOT,
     Application,
     ApplicationHistory,
     ChatMessage,
+    ChatThread,
     DocumentRule,
     MasterDataField,
     PaymentSetting,
@@ -28,8 +37,12 @@ from accounts.models import (
     UserDocument,
     UserProfile,
     Vacancy,
+    build_requirement_specs,
+    chat_snapshot_name,
+    stored_file_display_name,
 )
-from PIL import Image
+from accounts.search import matching_profiles, rank_profiles
+from accounts.snapshots import cached_snapshot, snapshot_version
 
 
 DEFAULT_CATALOG = [
@@ -94,11 +107,23 @@ PROFILE_DATA_STEPS = [
 
 IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp")
 DEFAULT_REQUIRED_DOCS = []
+DEFAULT_REQUIREMENT_SPECS = build_requirement_specs(DEFAULT_REQUIRED_DOCS)
 APPLY_PENDING_TIMEOUT_MINUTES = 30
 AUTOFILL_LOCK_HOURS = 24
 APPLY_PROFILE_DAILY_VIEW_LIMIT = 5
 APPLY_PROFILE_UNMASK_WINDOW_MINUTES = 10
 APPLY_PROFILE_UNMASK_DAILY_LIMIT = 2
+APPLICANTS_PAGE_SIZE = 50
+APPLICANTS_MAX_PAGE_SIZE = 200
+CHAT_INBOX_PAGE_SIZE = 50
+CHAT_POLL_TIMEOUT_SECONDS = 25
+CHAT_POLL_INTERVAL_SECONDS = 1.0
+CHAT_POLL_MAX_DB_INTERVAL_SECONDS = 8.0
+CHAT_POLL_BATCH_SIZE = 100
+CHAT_SHORT_POLL_INTERVAL_SECONDS = 5
+KEYSET_EPOCH = timezone.datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+PRECOMPRESSED_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif", ".webp", ".pdf", ".zip", ".heic", ".mp4")
+ZIP_STREAM_CHUNK_SIZE = 256 * 1024
 
 
 def _parse_multi_values(raw_text):
@@ -129,106 +154,108 @@ def _collect_multi_values(request, text_name, list_name):
     return merged
 
 
-def _parse_required_doc_name(raw_value):
-    value = str(raw_value or "").strip()
-    if value.startswith("DATA|"):
-        return "Data", value[5:].strip()
-    if value.startswith("PHOTO|"):
-        return "Photo", value[6:].strip()
-    if value.startswith("DOC|"):
-        return "Document", value[4:].strip()
-    return "Document", value
-
-
 def _norm_field_key(value):
     raw = str(value or "").strip().lower()
     return "".join(ch for ch in raw if ch.isalnum())
 
 
+# Requirement name me token mile to ye profile labels (normalized) try hote hain, isi order me.
+REQUIREMENT_ALIAS_RULES = (
+    (("studentname", "candidatename", "applicantname", "name"), ("fullname",)),
+    (("fathersname", "fathername", "guardianname"), ("fathername",)),
+    (("mothersname", "mothername"), ("mothername",)),
+    (("gender", "sex"), ("gender",)),
+    (("category", "caste"), ("category",)),
+    (("dateofbirth", "dob", "birth"), ("dob", "dateofbirth")),
+    (("contactinfo", "mobileno", "mobile"), ("mobile",)),
+    (("email", "mailid"), ("email",)),
+    (("nationality",), ("nationality",)),
+    (("state", "district"), ("presentstate", "presentdistrict")),
+    (("religion",), ("religion",)),
+    (("maritalstatus",), ("maritalstatus",)),
+    (("rationcard",), ("rationcard", "rationcardnumber")),
+    (("bloodgroup",), ("bloodgroup",)),
+    (("houseno", "wardno"), ("housewardno", "houseno", "wardno")),
+    (("village", "post"), ("presentcity", "villagepost")),
+    (("tehsil", "policest"), ("tehsilpolicest",)),
+    (("pincode", "postalcode"), ("presentpincode", "pincode")),
+    (("aadharnumber", "aadhaarnumber", "aadhar"), ("aadhaar", "aadhar")),
+    (("schoolname",), ("schoolname", "twelfthboard")),
+    (("groupstream", "stream"), ("groupstream",)),
+    (("subjects",), ("subjects",)),
+    (("boardname",), ("twelfthboard", "tenthboard")),
+    (("passingyear",), ("passingyear",)),
+    (("rollnumber",), ("twelfthrollnumber", "tenthrollnumber", "rollnumber")),
+    (("marks", "percentage"), ("twelfthpercentage", "tenthpercentage", "marks")),
+    (("collegename",), ("collegename",)),
+    (("subjectgroup",), ("subjectgroup", "course")),
+)
+REQUESTED_FIELD_CACHE_SIZE = 1024
+
+
+@lru_cache(maxsize=REQUESTED_FIELD_CACHE_SIZE)
+def _requirement_aliases(req_norm):
+    aliases = [req_norm]
+    for tokens, targets in REQUIREMENT_ALIAS_RULES:
+        if any(tok in req_norm for tok in tokens):
+            aliases.extend(targets)
+    return tuple(_merge_unique_casefold(aliases))
+
+
+@lru_cache(maxsize=REQUESTED_FIELD_CACHE_SIZE)
+def _resolve_requested_fields(requested_norms, candidate_norms):
+    # Vacancy ke required fields + profile labels ka mapping (candidate index ya None) ek hi baar banta hai;
+    # labels same rahe to agla render sirf values utha leta hai. Result sirf arguments par depend karta hai.
+    exact_index = {}
+    for idx, norm in enumerate(candidate_norms):
+        exact_index.setdefault(norm, []).append(idx)
+    used_idx = set()
+    resolved = []
+    for req_norm in requested_norms:
+        best_idx = None
+        for alias in _requirement_aliases(req_norm):
+            # "-" ya "/" jaisa requirement "" ban jata hai; "" har label ke andar hota hai, isliye skip.
+            if not alias:
+                continue
+            best_idx = next((idx for idx in exact_index.get(alias, ()) if idx not in used_idx), None)
+            if best_idx is None:
+                best_idx = next(
+                    (
+                        idx
+                        for idx, norm in enumerate(candidate_norms)
+                        if idx not in used_idx and (alias in norm or norm in alias)
+                    ),
+                    None,
+                )
+            if best_idx is not None:
+                break
+        if best_idx is not None:
+            used_idx.add(best_idx)
+        resolved.append(best_idx)
+    return tuple(resolved)
+
+
 def _build_requested_profile_rows(step_data, required_profile_fields):
     requested = [str(item or "").strip() for item in (required_profile_fields or []) if str(item or "").strip()]
     if not requested:
         return {}
 
-    all_candidates = []
+    candidates = []
     for step_key, _ in PROFILE_DATA_STEPS:
         if step_key == "documents":
             continue
         for label, value in step_data.get(step_key, []):
-            all_candidates.append(
-                {
-                    "step": step_key,
-                    "label": label,
-                    "value": value or "",
-                    "norm": _norm_field_key(label),
-                }
-            )
-
-    def _alias_norms(req_norm):
-        aliases = [req_norm]
-        alias_rules = [
-            (["studentname", "candidatename", "applicantname", "name"], ["fullname"]),
-            (["fathersname", "fathername", "guardianname"], ["fathername"]),
-            (["mothersname", "mothername"], ["mothername"]),
-            (["gender", "sex"], ["gender"]),
-            (["category", "caste"], ["category"]),
-            (["dateofbirth", "dob", "birth"], ["dob", "dateofbirth"]),
-            (["contactinfo", "mobileno", "mobile"], ["mobile"]),
-            (["email", "mailid"], ["email"]),
-            (["nationality"], ["nationality"]),
-            (["state", "district"], ["presentstate", "presentdistrict"]),
-            (["religion"], ["religion"]),
-            (["maritalstatus"], ["maritalstatus"]),
-            (["rationcard"], ["rationcard", "rationcardnumber"]),
-            (["bloodgroup"], ["bloodgroup"]),
-            (["houseno", "wardno"], ["housewardno", "houseno", "wardno"]),
-            (["village", "post"], ["presentcity", "villagepost"]),
-            (["tehsil", "policest"], ["tehsilpolicest"]),
-            (["pincode", "postalcode"], ["presentpincode", "pincode"]),
-            (["aadharnumber", "aadhaarnumber", "aadhar"], ["aadhaar", "aadhar"]),
-            (["schoolname"], ["schoolname", "twelfthboard"]),
-            (["groupstream", "stream"], ["groupstream"]),
-            (["subjects"], ["subjects"]),
-            (["boardname"], ["twelfthboard", "tenthboard"]),
-            (["passingyear"], ["passingyear"]),
-            (["rollnumber"], ["twelfthrollnumber", "tenthrollnumber", "rollnumber"]),
-            (["marks", "percentage"], ["twelfthpercentage", "tenthpercentage", "marks"]),
-            (["collegename"], ["collegename"]),
-            (["subjectgroup"], ["subjectgroup", "course"]),
-        ]
-        for tokens, targets in alias_rules:
-            if any(tok in req_norm for tok in tokens):
-                aliases.extend(targets)
-        return _merge_unique_casefold(aliases)
+            candidates.append((step_key, label, value or ""))
 
+    resolved = _resolve_requested_fields(
+        tuple(_norm_field_key(req) for req in requested),
+        tuple(_norm_field_key(label) for _, label, _ in candidates),
+    )
     grouped = {key: [] for key, _ in PROFILE_DATA_STEPS if key != "documents"}
-    used_idx = set()
-    for req in requested:
-        req_norm = _norm_field_key(req)
-        best_idx = None
-        for alias in _alias_norms(req_norm):
-            for idx, item in enumerate(all_candidates):
-                if idx in used_idx:
-                    continue
-                if alias and item["norm"] == alias:
-                    best_idx = idx
-                    break
-            if best_idx is not None:
-                break
-            if alias:
-                for idx, item in enumerate(all_candidates):
-                    if idx in used_idx:
-                        continue
-                    if alias in item["norm"] or item["norm"] in alias:
-                        best_idx = idx
-                        break
-            if best_idx is not None:
-                break
-
+    for req, best_idx in zip(requested, resolved):
         if best_idx is not None:
-            used_idx.add(best_idx)
-            match = all_candidates[best_idx]
-            grouped[match["step"]].append((req, match["value"]))
+            step_key, _, value = candidates[best_idx]
+            grouped[step_key].append((req, value))
         else:
             grouped["personal"].append((req, ""))
 
@@ -362,6 +389,18 @@ def _seed_default_vacancies():
             vacancy.save(update_fields=updates)
 
 
+def _load_vacancy_catalog():
+    catalog = {key: [] for key, _ in Vacancy.CATEGORY_CHOICES}
+    for vacancy in Vacancy.objects.filter(is_active=True).order_by("display_order", "last_date", "id"):
+        catalog.setdefault(vacancy.category, []).append(vacancy)
+    return {key: tuple(items) for key, items in catalog.items()}
+
+
+def _active_vacancies(category):
+    # Dashboard har refresh par catalog query na kare; Vacancy ke save/delete signal version bump karte hain.
+    return cached_snapshot(VACANCY_CATALOG_SNAPSHOT, _load_vacancy_catalog).get(category, ())
+
+
 def _status_label(value):
     return dict(Application.STATUS_CHOICES).get(value, value)
 
@@ -444,7 +483,86 @@ def _portal_news_queryset(portal_key="all"):
         return PortalNews.objects.none()
 
 
+class ProfileSnapshot:
+    # Apply flow ke liye ek request me profile + documents ek hi baar padhte hain; step rows,
+    # available documents aur label index saare helpers isi se lete hain.
+    def __init__(self, profile):
+        self.profile = profile
+        self.documents = list(profile.documents.all())
+        self._step_rows = None
+        self._label_index = None
+        self._available = None
+        self._doc_matches = {}
+
+    @classmethod
+    def for_user(cls, user):
+        profile = (
+            UserProfile.objects.select_related("user").prefetch_related("documents").filter(user=user).first()
+        )
+        if profile is None:
+            profile, _ = UserProfile.objects.get_or_create(user=user)
+        return cls(profile)
+
+    @classmethod
+    def of(cls, profile):
+        return profile if isinstance(profile, cls) else cls(profile)
+
+    def step_rows(self):
+        if self._step_rows is None:
+            self._step_rows = _build_step_rows(self.profile, self.documents)
+        # Callers rows ko mask/inject karte hain, isliye har baar nayi lists.
+        return {key: list(rows) for key, rows in self._step_rows.items()}
+
+    def label_index(self):
+        if self._label_index is None:
+            self._label_index = _master_label_index(self.step_rows())
+        return self._label_index
+
+    @property
+    def available_documents(self):
+        if self._available is None:
+            available = {}
+            if self.profile.photo:
+                available["passport photo"] = self.profile.photo.url
+            if self.profile.signature:
+                available["signature"] = self.profile.signature.url
+            for doc in self.documents:
+                title = (doc.title or "").strip().lower()
+                if title:
+                    available[title] = doc.file.url
+            self._available = available
+        return self._available
+
+    def find_document(self, name):
+        key = str(name or "").strip().lower()
+        if not key:
+            return ""
+        if key not in self._doc_matches:
+            available = self.available_documents
+            value = available.get(key, "")
+            if not value:
+                value = next((url for title, url in available.items() if key in title or title in key), "")
+            self._doc_matches[key] = value
+        return self._doc_matches[key]
+
+
+def _master_label_index(step_data):
+    index = set()
+    for rows in (step_data or {}).values():
+        if not isinstance(rows, list):
+            continue
+        for label, val in rows:
+            key = str(label or "").strip().lower()
+            if key and str(val or "").strip():
+                index.add(key)
+    return frozenset(index)
+
+
 def _profile_step_data(profile):
+    return ProfileSnapshot.of(profile).step_rows()
+
+
+def _build_step_rows(profile, documents):
     step_data = {
         "personal": [
             ("Full Name", profile.full_name),
@@ -496,7 +614,7 @@ def _profile_step_data(profile):
             [("Passport Photo", profile.photo.url)] if profile.photo else []
         )
         + ([("Signature", profile.signature.url)] if profile.signature else [])
-        + [(doc.title or "Document", doc.file.url) for doc in profile.documents.all()],
+        + [(doc.title or "Document", doc.file.url) for doc in documents],
     }
     _append_extra_rows(step_data["personal"], profile.personal_extra_rows)
     _append_extra_rows(step_data["address"], profile.address_extra_rows)
@@ -535,25 +653,6 @@ def _attachment_kind(file_name):
     return "file"
 
 
-def _file_download_name(file_field):
-    raw_name = (getattr(file_field, "name", "") or "").strip()
-    return raw_name.rsplit("/", 1)[-1] if raw_name else "attachment"
-
-
-def _safe_file_url(file_field):
-    if not file_field:
-        return ""
-    name = getattr(file_field, "name", "") or ""
-    if not name:
-        return ""
-    try:
-        if not default_storage.exists(name):
-            return ""
-        return file_field.url
-    except Exception:
-        return ""
-
-
 def _pending_started_at(pending):
     if not isinstance(pending, dict):
         return None
@@ -799,10 +898,12 @@ def _decorate_chat_messages(messages_qs):
     for item in decorated:
         if item.attachment:
             item.attachment_kind = _attachment_kind(item.attachment.name)
-            item.attachment_name = item.attachment.name.split("/")[-1]
+            item.attachment_name = stored_file_display_name(item, "attachment")
+            item.attachment_thumb_url = derivative_url(item.attachment.name, "thumb")
         else:
             item.attachment_kind = ""
             item.attachment_name = ""
+            item.attachment_thumb_url = ""
     return decorated
 
 
@@ -814,9 +915,10 @@ def _chat_message_payload(msg):
         "time": msg.created_at.strftime("%H:%M"),
         "attachment": {
             "url": msg.attachment.url if msg.attachment else "",
-            "name": _file_download_name(msg.attachment) if msg.attachment else "",
+            "name": stored_file_display_name(msg, "attachment") if msg.attachment else "",
             "kind": _attachment_kind(msg.attachment.name) if msg.attachment else "",
             "download_url": reverse("chat_attachment_download", args=[msg.id]) if msg.attachment else "",
+            "thumb_url": derivative_url(msg.attachment.name, "thumb") if msg.attachment else "",
         },
     }
 
@@ -825,21 +927,9 @@ def _is_ajax_request(request):
     return request.headers.get("x-requested-with") == "XMLHttpRequest"
 
 
-def _extract_payload_from_remarks(remarks_text):
-    if not remarks_text:
-        return {}
-    marker = "Payload JSON:"
-    idx = remarks_text.find(marker)
-    if idx == -1:
-        return {}
-    json_text = remarks_text[idx + len(marker):].strip()
-    if not json_text:
-        return {}
-    try:
-        parsed = json.loads(json_text)
-    except (TypeError, ValueError):
-        return {}
-    return parsed if isinstance(parsed, dict) else {}
+def _application_payload(application):
+    payload = getattr(application, "payload", None)
+    return payload if isinstance(payload, dict) else {}
 
 
 def _rows_from_payload(payload, key, fallback_rows):
@@ -867,107 +957,48 @@ def _selected_payload(profile, selected_steps):
     return payload
 
 
-def _inject_required_docs_rows(profile, vacancy, step_data):
-    required_docs = vacancy.required_documents or DEFAULT_REQUIRED_DOCS
+def _inject_required_docs_rows(profile, vacancy, step_data, label_index=None):
+    snapshot = ProfileSnapshot.of(profile)
+    # Vacancy save par parse ho chuki list; yahan sirf padhte hain.
+    required_specs = vacancy.required_document_specs or DEFAULT_REQUIREMENT_SPECS
     document_rows = list(step_data.get("documents", []))
     existing_labels = {str(label).strip().lower() for label, _ in document_rows}
+    existing_master = _master_label_index(step_data) if label_index is None else label_index
 
-    available = {}
-    if profile.photo:
-        available["passport photo"] = profile.photo.url
-    if profile.signature:
-        available["signature"] = profile.signature.url
-    for doc in profile.documents.all():
-        title = (doc.title or "").strip().lower()
-        if title:
-            available[title] = doc.file.url
-
-    existing_master = {}
-    for rows in step_data.values():
-        if not isinstance(rows, list):
-            continue
-        for label, val in rows:
-            key = str(label or "").strip().lower()
-            if key and str(val or "").strip():
-                existing_master[key] = str(val).strip()
-
-    def _find_doc_value(doc_name):
-        _, clean_doc_name = _parse_required_doc_name(doc_name)
-        key = clean_doc_name.lower()
-        if not key:
-            return ""
-        if key in available:
-            return available[key]
-        for title, url in available.items():
-            if key in title or title in key:
-                return url
-        return "Not uploaded yet"
-
-    for doc_name in required_docs:
-        doc_kind, clean_name = _parse_required_doc_name(doc_name)
-        if not clean_name:
-            continue
-        clean_key = clean_name.lower()
+    for spec in required_specs:
+        doc_kind, clean_name, clean_key = spec["kind"], spec["name"], spec["key"]
         has_data_duplicate = clean_key in existing_master or any(
-            clean_key in k or k in clean_key for k in existing_master.keys()
+            clean_key in k or k in clean_key for k in existing_master
         )
         if doc_kind == "Data" and has_data_duplicate:
             continue
-        if doc_kind in {"Document", "Photo"} and _find_doc_value(doc_name) not in {"", "Not uploaded yet"}:
+        doc_value = snapshot.find_document(clean_key)
+        if doc_kind in {"Document", "Photo"} and doc_value:
             continue
         row_label = f"Required ({doc_kind}): {clean_name}"
         if row_label.strip().lower() in existing_labels:
             continue
-        document_rows.append((row_label, _find_doc_value(clean_name)))
+        document_rows.append((row_label, doc_value or "Not uploaded yet"))
 
     step_data["documents"] = document_rows
-    return required_docs
-
-
-def _build_required_doc_rows(profile, required_docs, step_data=None, required_profile_fields=None):
-    available = {}
-    if profile.photo:
-        available["passport photo"] = profile.photo.url
-    if profile.signature:
-        available["signature"] = profile.signature.url
-    for doc in profile.documents.all():
-        title = (doc.title or "").strip().lower()
-        if title:
-            available[title] = doc.file.url
+    return required_specs
 
-    existing_master = {}
-    for rows_in_step in (step_data or {}).values():
-        if not isinstance(rows_in_step, list):
-            continue
-        for label, val in rows_in_step:
-            key = str(label or "").strip().lower()
-            if key and str(val or "").strip():
-                existing_master[key] = str(val).strip()
 
+def _build_required_doc_rows(profile, required_specs, step_data=None, required_profile_fields=None):
+    snapshot = ProfileSnapshot.of(profile)
     rows = []
-    merged_items = list(required_docs or [])
 
-    for idx, doc_name in enumerate(merged_items):
-        doc_kind, clean_name = _parse_required_doc_name(doc_name)
-        if not clean_name:
-            continue
+    for spec in required_specs or []:
         # Apply page ke document section me sirf document/photo fields dikhane hain.
-        if doc_kind == "Data":
+        if spec["kind"] == "Data":
             continue
-        key = clean_name.lower()
-        value = available.get(key, "")
-        if not value:
-            for title, url in available.items():
-                if key in title or title in key:
-                    value = url
-                    break
-        if not value:
-            value = "Not uploaded yet"
+        idx = spec["idx"]
+        value = snapshot.find_document(spec["key"]) or "Not uploaded yet"
         rows.append(
             {
                 "idx": idx,
-                "label": clean_name,
-                "kind": doc_kind,
+                "label": spec["name"],
+                "kind": spec["kind"],
                 "value": value,
                 "input_name": f"vacdoc__{idx}",
                 "checkbox_name": f"vacdoc_select__{idx}",
@@ -995,11 +1026,11 @@ def _demo_document_links(application):
 def _collect_document_links(application):
     profile = application.profile
     docs = []
-    if profile.photo:
-        docs.append({"title": "Passport Photo", "url": profile.photo.url})
-    if profile.signature:
-        docs.append({"title": "Signature", "url": profile.signature.url})
-    docs.extend([{"title": d.title or "Document", "url": d.file.url} for d in profile.documents.all()])
+    files = [("Passport Photo", profile.photo), ("Signature", profile.signature)]
+    files.extend((d.title or "Document", d.file) for d in profile.documents.all())
+    for title, file_field in files:
+        if file_field:
+            docs.append({"title": title, "url": file_field.url, "thumb_url": derivative_url(file_field.name, "thumb")})
     return docs or _demo_document_links(application)
 
 
@@ -1028,128 +1059,270 @@ def _save_profile_document(profile, title, file_obj):
     return doc.file.url if doc.file else ""
 
 
-def _file_meta(title, file_field):
-    try:
-        size_bytes = int(file_field.size)
-    except Exception:
-        size_bytes = 0
-    size_kb = round(size_bytes / 1024, 2) if size_bytes else 0
-    dims = "N/A"
-    mime = "file"
-    try:
-        file_field.open("rb")
-        with Image.open(file_field) as img:
-            dims = f"{img.width} x {img.height}"
-            mime = "image"
-    except Exception:
-        name = (getattr(file_field, "name", "") or "").lower()
-        if name.endswith(".pdf"):
-            mime = "pdf"
-    finally:
-        try:
-            file_field.close()
-        except Exception:
-            pass
+def _file_meta(title, instance, field_name):
+    # Upload ke waqt save hua metadata; yahan storage se kuch nahi padhte (Cloudinary par har open ek download tha).
+    size_bytes = getattr(instance, f"{field_name}_size") or 0
+    width = getattr(instance, f"{field_name}_width")
+    height = getattr(instance, f"{field_name}_height")
+    mime = getattr(instance, f"{field_name}_mime") or ""
+    name = (getattr(instance, field_name).name or "").lower()
+    if width and height:
+        dims, kind = f"{width} x {height}", "image"
+    elif mime == "application/pdf" or name.endswith(".pdf"):
+        dims, kind = "N/A", "pdf"
+    else:
+        dims, kind = "N/A", "file"
     return {
         "title": title,
-        "size_kb": size_kb,
+        "size_kb": round(size_bytes / 1024, 2) if size_bytes else 0,
         "dimensions": dims,
-        "kind": mime,
+        "kind": kind,
     }
 
 
 def _profile_document_meta(profile):
     rows = []
     if profile.photo:
-        rows.append(_file_meta("Passport Photo", profile.photo))
+        rows.append(_file_meta("Passport Photo", profile, "photo"))
     if profile.signature:
-        rows.append(_file_meta("Signature", profile.signature))
+        rows.append(_file_meta("Signature", profile, "signature"))
     for d in profile.documents.all():
-        rows.append(_file_meta(d.title or "Document", d.file))
+        rows.append(_file_meta(d.title or "Document", d, "file"))
     return rows
 
 
-def _flatten_application_row(application):
-    profile = application.profile
+EXPORT_VALUE_FIELDS = (
+    "id",
+    "status",
+    "applied_at",
+    "profile_id",
+    "profile__user__username",
+    "profile__full_name",
+    "vacancy__title",
+    "vacancy__organization",
+    "profile__dob",
+    "profile__gender",
+    "profile__category",
+    "profile__mobile",
+    "profile__email",
+    "profile__aadhar",
+    "profile__father_name",
+    "profile__mother_name",
+    "profile__present_address",
+    "profile__present_city",
+    "profile__present_district",
+    "profile__present_state",
+    "profile__present_pincode",
+    "profile__permanent_full_address",
+    "profile__permanent_address",
+    "profile__permanent_district",
+    "profile__permanent_state",
+    "profile__permanent_pincode",
+    "profile__tenth_board",
+    "profile__tenth_roll_number",
+    "profile__tenth_percentage",
+    "profile__twelfth_board",
+    "profile__twelfth_roll_number",
+    "profile__twelfth_percentage",
+    "profile__graduation",
+    "profile__college_name",
+    "profile__university_name",
+    "profile__course",
+    "profile__year_semester",
+    "profile__enrollment_number",
+    "profile__bank_name",
+    "profile__account_holder_name",
+    "profile__account_number",
+    "profile__ifsc_code",
+    "profile__branch_name",
+    "profile__personal_extra_rows",
+    "profile__address_extra_rows",
+    "profile__academic_extra_rows",
+    "profile__college_extra_rows",
+    "profile__bank_extra_rows",
+)
+EXPORT_CHUNK_SIZE = 2000
+GENDER_LABELS = dict(UserProfile.GENDER_CHOICES)
+
+
+def _application_export_values(application):
+    # Model instance ko wahi dict shape do jo `.values(*EXPORT_VALUE_FIELDS)` deta hai.
+    row = {}
+    for key in EXPORT_VALUE_FIELDS:
+        value = application
+        for part in key.split("__"):
+            value = getattr(value, part, None) if value is not None else None
+        row[key] = value
+    return row
+
+
+def _flatten_application_values(row):
+    dob = row["profile__dob"]
     return {
-        "Application ID": application.id,
-        "Applicant ID": profile.id,
-        "Username": profile.user.username,
-        "Full Name": profile.full_name,
-        "Vacancy": application.vacancy.title,
-        "Organization": application.vacancy.organization,
-        "Status": _status_label(application.status),
-        "Applied At": application.applied_at.strftime("%Y-%m-%d %H:%M"),
-        "DOB": profile.dob.strftime("%Y-%m-%d") if profile.dob else "",
-        "Gender": profile.get_gender_display() if profile.gender else "",
-        "Category": profile.category,
-        "Mobile": profile.mobile,
-        "Email": profile.email,
-        "Aadhaar": profile.aadhar,
-        "Father Name": profile.father_name,
-        "Mother Name": profile.mother_name,
-        "Present Address": profile.present_address,
-        "Present City": profile.present_city,
-        "Present District": profile.present_district,
-        "Present State": profile.present_state,
-        "Present Pincode": profile.present_pincode,
-        "Permanent Address": profile.permanent_full_address or profile.permanent_address,
-        "Permanent District": profile.permanent_district,
-        "Permanent State": profile.permanent_state,
-        "Permanent Pincode": profile.permanent_pincode,
-        "10th Board": profile.tenth_board,
-        "10th Roll Number": profile.tenth_roll_number,
-        "10th Percentage": profile.tenth_percentage,
-        "12th Board": profile.twelfth_board,
-        "12th Roll Number": profile.twelfth_roll_number,
-        "12th Percentage": profile.twelfth_percentage,
-        "Graduation": profile.graduation,
-        "College Name": profile.college_name,
-        "University": profile.university_name,
-        "Course": profile.course,
-        "Year/Semester": profile.year_semester,
-        "Enrollment Number": profile.enrollment_number,
-        "Bank Name": profile.bank_name,
-        "Account Holder": profile.account_holder_name,
-        "Account Number": profile.account_number,
-        "IFSC": profile.ifsc_code,
-        "Branch": profile.branch_name,
-        "Personal Extra Rows": _extra_rows_as_text(profile.personal_extra_rows),
-        "Address Extra Rows": _extra_rows_as_text(profile.address_extra_rows),
-        "Academic Extra Rows": _extra_rows_as_text(profile.academic_extra_rows),
-        "College Extra Rows": _extra_rows_as_text(profile.college_extra_rows),
-        "Bank Extra Rows": _extra_rows_as_text(profile.bank_extra_rows),
+        "Application ID": row["id"],
+        "Applicant ID": row["profile_id"],
+        "Username": row["profile__user__username"],
+        "Full Name": row["profile__full_name"],
+        "Vacancy": row["vacancy__title"],
+        "Organization": row["vacancy__organization"],
+        "Status": _status_label(row["status"]),
+        "Applied At": row["applied_at"].strftime("%Y-%m-%d %H:%M"),
+        "DOB": dob.strftime("%Y-%m-%d") if dob else "",
+        "Gender": GENDER_LABELS.get(row["profile__gender"], row["profile__gender"]) if row["profile__gender"] else "",
+        "Category": row["profile__category"],
+        "Mobile": row["profile__mobile"],
+        "Email": row["profile__email"],
+        "Aadhaar": row["profile__aadhar"],
+        "Father Name": row["profile__father_name"],
+        "Mother Name": row["profile__mother_name"],
+        "Present Address": row["profile__present_address"],
+        "Present City": row["profile__present_city"],
+        "Present District": row["profile__present_district"],
+        "Present State": row["profile__present_state"],
+        "Present Pincode": row["profile__present_pincode"],
+        "Permanent Address": row["profile__permanent_full_address"] or row["profile__permanent_address"],
+        "Permanent District": row["profile__permanent_district"],
+        "Permanent State": row["profile__permanent_state"],
+        "Permanent Pincode": row["profile__permanent_pincode"],
+        "10th Board": row["profile__tenth_board"],
+        "10th Roll Number": row["profile__tenth_roll_number"],
+        "10th Percentage": row["profile__tenth_percentage"],
+        "12th Board": row["profile__twelfth_board"],
+        "12th Roll Number": row["profile__twelfth_roll_number"],
+        "12th Percentage": row["profile__twelfth_percentage"],
+        "Graduation": row["profile__graduation"],
+        "College Name": row["profile__college_name"],
+        "University": row["profile__university_name"],
+        "Course": row["profile__course"],
+        "Year/Semester": row["profile__year_semester"],
+        "Enrollment Number": row["profile__enrollment_number"],
+        "Bank Name": row["profile__bank_name"],
+        "Account Holder": row["profile__account_holder_name"],
+        "Account Number": row["profile__account_number"],
+        "IFSC": row["profile__ifsc_code"],
+        "Branch": row["profile__branch_name"],
+        "Personal Extra Rows": _extra_rows_as_text(row["profile__personal_extra_rows"]),
+        "Address Extra Rows": _extra_rows_as_text(row["profile__address_extra_rows"]),
+        "Academic Extra Rows": _extra_rows_as_text(row["profile__academic_extra_rows"]),
+        "College Extra Rows": _extra_rows_as_text(row["profile__college_extra_rows"]),
+        "Bank Extra Rows": _extra_rows_as_text(row["profile__bank_extra_rows"]),
     }
 
 
+def _flatten_application_row(application):
+    return _flatten_application_values(_application_export_values(application))
+
+
 def _application_base_queryset():
     return Application.objects.select_related("profile__user", "vacancy").prefetch_related("profile__documents")
 
 
-def _filtered_applications(q, status):
-    qs = _application_base_queryset()
+def _application_list_queryset():
+    # List page documents/profile detail `admin_applicant_detail_json` se on-demand load karta hai.
+    return Application.objects.select_related("profile__user", "vacancy")
+
+
+PAYLOAD_ROW_KEYS = tuple(key for key, _ in PROFILE_DATA_STEPS) + ("vacancy_required_documents",)
+
+
+def _payload_field_q(label, value):
+    row = {key: text for key, text in (("label", label), ("value", value)) if text}
+    if not row:
+        return Q()
+    if connection.vendor == "postgresql":
+        # `@>` containment; 0025 wala GIN (jsonb_path_ops) index isi ko serve karta hai.
+        filters = Q()
+        for key in PAYLOAD_ROW_KEYS:
+            filters |= Q(payload__contains={key: [row]})
+        return filters
+    # SQLite/MySQL par JSON containment nahi hai: JSON text se candidates chhaant kar Python me wahi
+    # same-row, exact (case-sensitive) match karte hain jo `@>` karta hai, taaki dono backend ek result dein.
+    candidates = Q()
+    for text in row.values():
+        candidates &= Q(payload__icontains=json.dumps(text)[1:-1])
+    matched_ids = [
+        pk
+        for pk, payload in Application.objects.filter(candidates).values_list("id", "payload").iterator(chunk_size=500)
+        if _payload_has_row(payload, row)
+    ]
+    return Q(id__in=matched_ids)
+
+
+def _payload_has_row(payload, row):
+    if not isinstance(payload, dict):
+        return False
+    for key in PAYLOAD_ROW_KEYS:
+        for item in payload.get(key) or []:
+            if isinstance(item, dict) and all(item.get(name) == text for name, text in row.items()):
+                return True
+    return False
+
+
+def _filtered_applications(q, status, queryset=None, field_label="", field_value=""):
+    qs = _application_base_queryset() if queryset is None else queryset
     if status and status != "all":
         qs = qs.filter(status=status)
+    if field_label or field_value:
+        qs = qs.filter(_payload_field_q(field_label, field_value))
     if q:
         q = q.strip()
-        filters = (
-            Q(profile__full_name__icontains=q)
-            | Q(profile__user__username__icontains=q)
-            | Q(profile__mobile__icontains=q)
-        )
+        filters = Q(profile__in=matching_profiles(q).values("pk"))
         if q.isdigit():
             filters |= Q(id=int(q)) | Q(profile__id=int(q))
         qs = qs.filter(filters)
     return qs.order_by("applied_at", "id")
 
 
+def _encode_keyset_cursor(applied_at, pk):
+    delta = applied_at - KEYSET_EPOCH
+    micros = (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+    return f"{micros}_{pk}"
+
+
+def _decode_keyset_cursor(raw_value):
+    try:
+        micros_raw, pk_raw = str(raw_value or "").split("_", 1)
+        return KEYSET_EPOCH + timedelta(microseconds=int(micros_raw)), int(pk_raw)
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def _parse_page_size(raw_value):
+    try:
+        size = int(raw_value or APPLICANTS_PAGE_SIZE)
+    except (TypeError, ValueError):
+        size = APPLICANTS_PAGE_SIZE
+    return min(max(size, 10), APPLICANTS_MAX_PAGE_SIZE)
+
+
+def _keyset_application_page(qs, page_size, after=None, before=None):
+    # (applied_at, id) par seek karte hain, OFFSET nahi, taaki deep pages bhi index se turant aayein.
+    if before:
+        applied_at, pk = before
+        rows = list(
+            qs.filter(Q(applied_at__lt=applied_at) | Q(applied_at=applied_at, id__lt=pk))
+            .order_by("-applied_at", "-id")[: page_size + 1]
+        )
+        has_prev = len(rows) > page_size
+        rows = rows[:page_size][::-1]
+        has_next = True
+    else:
+        if after:
+            applied_at, pk = after
+            qs = qs.filter(Q(applied_at__gt=applied_at) | Q(applied_at=applied_at, id__gt=pk))
+        rows = list(qs.order_by("applied_at", "id")[: page_size + 1])
+        has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        has_prev = after is not None
+    next_cursor = _encode_keyset_cursor(rows[-1].applied_at, rows[-1].id) if rows and has_next else ""
+    prev_cursor = _encode_keyset_cursor(rows[0].applied_at, rows[0].id) if rows and has_prev else ""
+    return rows, next_cursor, prev_cursor
+
+
 @login_required
 def student_services_dashboard(request):
     profile, _ = UserProfile.objects.get_or_create(user=request.user)
-    _seed_default_vacancies()
-    services = Vacancy.objects.filter(is_active=True, category=Vacancy.CATEGORY_STUDENT).order_by(
-        "display_order", "last_date", "id"
-    )
+    services = _active_vacancies(Vacancy.CATEGORY_STUDENT)
     user_apps = Application.objects.filter(profile=profile).select_related("vacancy")
     application_map = {app.vacancy_id: app for app in user_apps}
     service_cards = []
@@ -1209,10 +1382,7 @@ def apply_student_service(request, vacancy_id):
 def dashboard(request):
     profile, _ = UserProfile.objects.get_or_create(user=request.user)
 
-    _seed_default_vacancies()
-    vacancies = Vacancy.objects.filter(is_active=True, category=Vacancy.CATEGORY_GOVERNMENT).order_by(
-        "display_order", "last_date", "id"
-    )
+    vacancies = _active_vacancies(Vacancy.CATEGORY_GOVERNMENT)
     user_apps = Application.objects.filter(profile=profile).select_related("vacancy")
     application_map = {app.vacancy_id: app for app in user_apps}
     vacancy_cards = []
@@ -1311,7 +1481,8 @@ def apply_vacancy(request, vacancy_id):
 
 @login_required
 def confirm_send_to_admin(request):
-    profile, _ = UserProfile.objects.get_or_create(user=request.user)
+    snapshot = ProfileSnapshot.for_user(request.user)
+    profile = snapshot.profile
     pending = request.session.get("pending_form_apply")
     if not pending:
         messages.info(request, "Pehle koi form select karke Apply click karo.")
@@ -1360,13 +1531,13 @@ def confirm_send_to_admin(request):
                 messages.error(request, "Form send karne se pehle dono disclaimer tick karna zaroori hai.")
                 return redirect("confirm_send_to_admin")
 
-        step_data = _profile_step_data(profile)
+        step_data = snapshot.step_rows()
         if timed_out_active or lock_active:
             step_data = _mask_step_rows(step_data)
-        required_docs = _inject_required_docs_rows(profile, vacancy, step_data)
+        required_specs = _inject_required_docs_rows(snapshot, vacancy, step_data, snapshot.label_index())
         required_doc_rows = _build_required_doc_rows(
-            profile,
-            required_docs,
+            snapshot,
+            required_specs,
             step_data=step_data,
             required_profile_fields=vacancy.required_profile_fields,
         )
@@ -1440,13 +1611,13 @@ def confirm_send_to_admin(request):
         summary_line = "Selected Data: " + ", ".join(selected_labels)
         if selected_vac_docs:
             summary_line += " | Vacancy Docs: " + ", ".join([x["label"] for x in selected_vac_docs])
-        payload_line = "Payload JSON: " + json.dumps(payload, ensure_ascii=True)
 
         app, created = Application.objects.get_or_create(profile=profile, vacancy=vacancy)
         if app.status == Application.STATUS_CANCELLED:
             app.status = Application.STATUS_PENDING
             app.cancelled_at = None
-        app.remarks = (summary_line + "\n" + payload_line)[:4000]
+        app.remarks = summary_line[:4000]
+        app.payload = payload
         app.save()
 
         _clear_profile_draft(profile, vacancy.id)
@@ -1470,13 +1641,14 @@ def confirm_send_to_admin(request):
                 messages.success(request, "Government form request update karke admin ko resend kar diya gaya.")
         return redirect("dashboard")
 
-    step_data = _profile_step_data(profile)
+    step_data = snapshot.step_rows()
     if timed_out_active or lock_active:
         step_data = _mask_step_rows(step_data)
-    required_docs = _inject_required_docs_rows(profile, vacancy, step_data)
+    # Masking se khali/bhari values nahi badalti, isliye snapshot ka label index hi chalega.
+    required_specs = _inject_required_docs_rows(snapshot, vacancy, step_data, snapshot.label_index())
     required_doc_rows = _build_required_doc_rows(
-        profile,
-        required_docs,
+        snapshot,
+        required_specs,
         step_data=step_data,
         required_profile_fields=vacancy.required_profile_fields,
     )
@@ -1555,7 +1727,8 @@ def confirm_send_to_admin(request):
 
 @login_required
 def apply_profile_preview(request):
-    profile, _ = UserProfile.objects.get_or_create(user=request.user)
+    snapshot = ProfileSnapshot.for_user(request.user)
+    profile = snapshot.profile
     pending = request.session.get("pending_form_apply") or {}
     vacancy = None
     if pending.get("vacancy_id"):
@@ -1584,20 +1757,21 @@ def apply_profile_preview(request):
         messages.error(request, "Aaj ka apply profile view limit (5) complete ho gaya.")
         return redirect("confirm_send_to_admin")
 
-    all_step_data = _profile_step_data(profile)
+    all_step_data = snapshot.step_rows()
 
     payload = {}
     draft_payload = pending.get("draft_payload") if isinstance(pending, dict) else {}
     if not isinstance(draft_payload, dict):
         draft_payload = {}
     if vacancy:
-        existing_app = (
+        existing_payload = (
             Application.objects.filter(profile=profile, vacancy=vacancy)
             .order_by("-updated_at", "-id")
+            .values_list("payload", flat=True)
             .first()
         )
-        if existing_app:
-            payload = _extract_payload_from_remarks(existing_app.remarks)
+        if isinstance(existing_payload, dict):
+            payload = existing_payload
 
     step_data = dict(all_step_data)
     if draft_payload:
@@ -1614,10 +1788,10 @@ def apply_profile_preview(request):
     required_doc_rows = []
     if vacancy:
         base_step_data = dict(step_data)
-        required_docs = _inject_required_docs_rows(profile, vacancy, base_step_data)
+        required_specs = _inject_required_docs_rows(snapshot, vacancy, base_step_data)
         required_doc_rows = _build_required_doc_rows(
-            profile,
-            required_docs,
+            snapshot,
+            required_specs,
             step_data=base_step_data,
             required_profile_fields=vacancy.required_profile_fields,
         )
@@ -1645,7 +1819,7 @@ def apply_profile_preview(request):
     document_links = []
     seen_urls = set()
 
-    def _push(title, url):
+    def _push(title, url, name=""):
         if not url:
             return
         if url in seen_urls:
@@ -1653,11 +1827,14 @@ def apply_profile_preview(request):
         seen_urls.add(url)
         lower_url = url.lower()
         kind = "image" if any(lower_url.endswith(ext) for ext in IMAGE_EXTENSIONS) else "file"
+        if not name and url.startswith(settings.MEDIA_URL):
+            name = unquote(url[len(settings.MEDIA_URL):])
         document_links.append(
             {
                 "title": title,
                 "url": url,
                 "kind": kind,
+                "preview_url": derivative_url(name, "preview") if kind == "image" else "",
             }
         )
 
@@ -1688,13 +1865,13 @@ def apply_profile_preview(request):
         if not document_links:
             photo_url = _safe_file_url(profile.photo)
             sign_url = _safe_file_url(profile.signature)
-            _push("Passport Photo", photo_url)
-            _push("Signature", sign_url)
-            for doc in profile.documents.all():
+            _push("Passport Photo", photo_url, profile.photo.name if profile.photo else "")
+            _push("Signature", sign_url, profile.signature.name if profile.signature else "")
+            for doc in snapshot.documents:
                 url = _safe_file_url(doc.file)
                 if not url:
                     continue
-                _push(doc.title or "Document", url)
+                _push(doc.title or "Document", url, doc.file.name)
 
     return render(
         request,
@@ -1794,16 +1971,34 @@ def admin_applicants(request):
 
     query = request.GET.get("q", "").strip()
     status = request.GET.get("status", "all").strip() or "all"
-    applications = _filtered_applications(query, status)
-    for app in applications:
-        app.document_links = _collect_document_links(app)
+    field_label = request.GET.get("field", "").strip()
+    field_value = request.GET.get("value", "").strip()
+    page_size = _parse_page_size(request.GET.get("per_page"))
+    after = _decode_keyset_cursor(request.GET.get("after"))
+    before = None if after else _decode_keyset_cursor(request.GET.get("before"))
+    applications, next_cursor, prev_cursor = _keyset_application_page(
+        _filtered_applications(
+            query, status, queryset=_application_list_queryset(), field_label=field_label, field_value=field_value
+        ),
+        page_size,
+        after=after,
+        before=before,
+    )
     history_rows = list(ApplicationHistory.objects.all()[:120])
 
+    base_params = {"q": query, "status": status, "field": field_label, "value": field_value, "per_page": page_size}
+    list_url = reverse("admin_applicants")
     context = {
         "applications": applications,
         "history_rows": history_rows,
         "query": query,
         "status": status,
+        "field_label": field_label,
+        "field_value": field_value,
+        "filter_params": urlencode({"q": query, "field": field_label, "value": field_value}),
+        "per_page": page_size,
+        "next_page_url": f"{list_url}?{urlencode({**base_params, 'after': next_cursor})}" if next_cursor else "",
+        "prev_page_url": f"{list_url}?{urlencode({**base_params, 'before': prev_cursor})}" if prev_cursor else "",
         "status_choices": [("all", "All")] + list(Application.STATUS_CHOICES),
         "is_admin_user": True,
     }
@@ -2162,6 +2357,45 @@ def user_chat(request):
     )
 
 
+def _chat_thread_summary(profile):
+    try:
+        return profile.chat_thread
+    except ChatThread.DoesNotExist:
+        return None
+
+
+def _encode_inbox_cursor(profile):
+    thread = _chat_thread_summary(profile)
+    if thread is None or thread.last_message_at is None:
+        return f"n_{profile.id}"
+    return _encode_keyset_cursor(thread.last_message_at, profile.id)
+
+
+def _decode_inbox_cursor(raw_value):
+    # (last_message_at, profile_id); bina message wale profiles list ke end me hote hain ("n_<id>").
+    raw_value = str(raw_value or "")
+    if raw_value.startswith("n_"):
+        return (None, int(raw_value[2:])) if raw_value[2:].isdigit() else None
+    return _decode_keyset_cursor(raw_value)
+
+
+def _chat_inbox_page(profiles_qs, before=None):
+    # Latest message wala thread upar (naya/unread message purane profile ka bhi page 1 par aaye);
+    # (last_message_at, id) keyset par seek, OFFSET nahi.
+    if before:
+        last_at, pk = before
+        if last_at is None:
+            profiles_qs = profiles_qs.filter(chat_thread__last_message_at__isnull=True, id__lt=pk)
+        else:
+            profiles_qs = profiles_qs.filter(
+                Q(chat_thread__last_message_at__lt=last_at)
+                | Q(chat_thread__last_message_at=last_at, id__lt=pk)
+                | Q(chat_thread__last_message_at__isnull=True)
+            )
+    ordered = profiles_qs.order_by(F("chat_thread__last_message_at").desc(nulls_last=True), "-id")
+    return list(ordered[: CHAT_INBOX_PAGE_SIZE + 1])
+
+
 @login_required
 def admin_chat(request):
     if not _can_access_admin(request):
@@ -2170,37 +2404,54 @@ def admin_chat(request):
 
     profile_id = request.GET.get("profile_id", "").strip()
     search = request.GET.get("q", "").strip()
-    profiles = list(
-        UserProfile.objects.select_related("user").prefetch_related("chat_messages").order_by("-id")
-    )
+    before = request.GET.get("before", "").strip()
+    raw_offset = request.GET.get("offset", "").strip()
+    offset = int(raw_offset) if raw_offset.isdigit() else 0
+    profiles_qs = UserProfile.objects.select_related("user", "chat_thread__last_message")
     if search:
-        search_lower = search.lower()
-        profiles = [
-            p
-            for p in profiles
-            if search_lower in (p.full_name or "").lower()
-            or search_lower in p.user.username.lower()
-            or search_lower in (p.mobile or "").lower()
-            or (search.isdigit() and p.id == int(search))
-        ]
+        filters = Q(pk__in=matching_profiles(search).values("pk"))
+        if search.isdigit():
+            filters |= Q(id=int(search))
+        profiles_qs = profiles_qs.filter(filters)
+        # Search me best match upar chahiye, isliye rank order + offset paging (result set chhota hota hai).
+        profiles = list(rank_profiles(profiles_qs, search)[offset : offset + CHAT_INBOX_PAGE_SIZE + 1])
+    else:
+        profiles = _chat_inbox_page(profiles_qs, _decode_inbox_cursor(before))
+    has_more = len(profiles) > CHAT_INBOX_PAGE_SIZE
+    profiles = profiles[:CHAT_INBOX_PAGE_SIZE]
+
     selected_profile = None
     if profile_id.isdigit():
         selected_profile = next((p for p in profiles if p.id == int(profile_id)), None)
+        if selected_profile is None:
+            selected_profile = profiles_qs.filter(id=int(profile_id)).first()
     if not selected_profile:
         selected_profile = profiles[0] if profiles else None
+    if selected_profile:
+        ChatThread.mark_read(selected_profile.id)
 
     thread_items = []
     for p in profiles:
-        all_msgs = list(p.chat_messages.all())
-        last_message = all_msgs[-1] if all_msgs else None
+        thread = _chat_thread_summary(p)
         thread_items.append(
             {
                 "profile": p,
-                "last_message": last_message,
-                "message_count": len(all_msgs),
+                "last_message": thread.last_message if thread else None,
+                "message_count": thread.message_count if thread else 0,
+                "unread_count": 0 if (not thread or p == selected_profile) else thread.unread_count,
             }
         )
 
+    next_page_url = ""
+    if has_more and profiles:
+        if search:
+            params = {"q": search, "offset": offset + CHAT_INBOX_PAGE_SIZE}
+        else:
+            params = {"before": _encode_inbox_cursor(profiles[-1])}
+        if selected_profile:
+            params["profile_id"] = selected_profile.id
+        next_page_url = f"{reverse('admin_chat')}?{urlencode(params)}"
+
     chat_messages_qs = (
         _decorate_chat_messages(selected_profile.chat_messages.all())
         if selected_profile
@@ -2215,6 +2466,7 @@ def admin_chat(request):
             "selected_profile": selected_profile,
             "chat_messages": chat_messages_qs,
             "query": search,
+            "next_page_url": next_page_url,
         },
     )
 
@@ -2367,8 +2619,90 @@ def chat_attachment_download(request, message_id):
     is_admin = _can_access_admin(request)
     if not (is_owner or is_admin):
         return redirect("dashboard")
-    download_name = _file_download_name(msg.attachment)
-    return FileResponse(msg.attachment.open("rb"), as_attachment=True, filename=download_name)
+    download_name = stored_file_display_name(msg, "attachment")
+    return media_file_response(request, msg.attachment.name, download_name, as_attachment=True)
+
+
+def _parse_since_id(raw_value):
+    try:
+        return max(int(raw_value), 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _long_poll_enabled(request):
+    # Request hold karna sirf ASGI worker par sasta hai (event loop, koi thread nahi rukta).
+    # WSGI (gunicorn sync) par hold karne se poora worker 25s atakta; wahan turant jawab do,
+    # client next_poll_ms ruk kar dobara poochta hai.
+    return isinstance(request, ASGIRequest)
+
+
+def _release_poll_connection():
+    # Wait ke dauran DB connection pakad ke na baithein (conn_max_age par har waiting poll ek connection rokta).
+    if not connection.in_atomic_block:
+        connection.close()
+
+
+async def _wait_for_chat_messages(profile_id, since_id, wait=True):
+    # Long-poll: har tick sirf cache ka chat version dekhte hain; DB query tabhi jab version badle.
+    # Per-process cache (LocMem) doosre worker ka bump nahi dekhta, isliye DB probe backoff ke saath fallback hai.
+    deadline = time.monotonic() + CHAT_POLL_TIMEOUT_SECONDS
+    qs = ChatMessage.objects.filter(profile_id=profile_id, id__gt=since_id).order_by("id")
+    name = chat_snapshot_name(profile_id)
+    db_interval = CHAT_POLL_INTERVAL_SECONDS
+    version = await sync_to_async(snapshot_version)(name)
+    while True:
+        rows = [msg async for msg in qs[:CHAT_POLL_BATCH_SIZE]]
+        if rows or not wait:
+            return rows
+        await sync_to_async(_release_poll_connection)()
+        next_probe = time.monotonic() + db_interval
+        db_interval = min(db_interval * 2, CHAT_POLL_MAX_DB_INTERVAL_SECONDS)
+        while True:
+            if time.monotonic() >= deadline:
+                return []
+            await asyncio.sleep(CHAT_POLL_INTERVAL_SECONDS)
+            current = await sync_to_async(snapshot_version)(name)
+            if current != version or time.monotonic() >= next_probe:
+                version = current
+                break
+
+
+async def _chat_poll_response(request, profile_id, since_id, mark_read=False):
+    long_poll = _long_poll_enabled(request)
+    rows = await _wait_for_chat_messages(profile_id, since_id, wait=long_poll)
+    if rows and mark_read:
+        await sync_to_async(ChatThread.mark_read)(profile_id)
+    payload = await sync_to_async(lambda: [_chat_message_payload(msg) for msg in rows])()
+    return JsonResponse(
+        {
+            "ok": True,
+            "messages": payload,
+            "last_id": rows[-1].id if rows else since_id,
+            "next_poll_ms": 0 if long_poll else CHAT_SHORT_POLL_INTERVAL_SECONDS * 1000,
+        }
+    )
+
+
+@login_required
+async def user_chat_poll(request):
+    user = await request.auser()
+    profile = await UserProfile.objects.filter(user=user).only("id", "chat_enabled").afirst()
+    if profile is None:
+        return JsonResponse({"ok": False, "error": "Profile nahi mila."}, status=404)
+    if not profile.chat_enabled:
+        return JsonResponse({"ok": False, "error": "Admin ne abhi chat enable nahi kiya hai."}, status=403)
+    return await _chat_poll_response(request, profile.id, _parse_since_id(request.GET.get("since_id")))
+
+
+@login_required
+async def admin_chat_poll(request, profile_id):
+    user = await request.auser()
+    if not _is_admin_user(user):
+        return JsonResponse({"ok": False, "error": "Admin panel access allowed nahi hai."}, status=403)
+    return await _chat_poll_response(
+        request, profile_id, _parse_since_id(request.GET.get("since_id")), mark_read=True
+    )
 
 
 @login_required
@@ -2611,7 +2945,7 @@ def admin_applicant_detail_json(request, application_id):
     profile = app.profile
     docs = _collect_document_links(app)
     step_data = _profile_step_data(profile)
-    payload = _extract_payload_from_remarks(app.remarks)
+    payload = _application_payload(app)
     vacancy_extra = []
     for item in payload.get("vacancy_required_documents", []):
         if not isinstance(item, dict):
@@ -2672,8 +3006,18 @@ def admin_export_csv(request):
 
     query = request.GET.get("q", "").strip()
     status = request.GET.get("status", "all").strip() or "all"
-    applications = _filtered_applications(query, status)
-    return _csv_response(applications, "applicants_export.csv")
+    applications = _filtered_applications(
+        query,
+        status,
+        queryset=Application.objects.all(),
+        field_label=request.GET.get("field", "").strip(),
+        field_value=request.GET.get("value", "").strip(),
+    )
+    rows = (
+        _flatten_application_values(row)
+        for row in applications.values(*EXPORT_VALUE_FIELDS).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    return _csv_response(rows, "applicants_export.csv")
 
 
 @login_required
@@ -2681,19 +3025,32 @@ def admin_export_single_csv(request, application_id):
     if not _can_access_admin(request):
         return redirect("dashboard")
     app = get_object_or_404(_application_base_queryset(), id=application_id)
-    return _csv_response([app], f"applicant_{app.id}.csv")
+    return _csv_response([_flatten_application_row(app)], f"applicant_{app.id}.csv")
 
 
-def _csv_response(applications, filename):
-    rows = [_flatten_application_row(app) for app in applications]
-    response = HttpResponse(content_type="text/csv")
+class _EchoBuffer:
+    def write(self, value):
+        return value
+
+
+def _csv_response(rows, filename):
+    # Rows generator se aate hain; poora export memory me hold nahi hota.
+    rows = iter(rows)
+    first = next(rows, None)
+    fieldnames = list(first.keys()) if first else ["No Data"]
+    writer = csv.DictWriter(_EchoBuffer(), fieldnames=fieldnames)
+
+    def _stream():
+        yield writer.writeheader()
+        if first is None:
+            yield writer.writerow({"No Data": "No matching records"})
+            return
+        yield writer.writerow(first)
+        for row in rows:
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(_stream(), content_type="text/csv")
     response["Content-Disposition"] = f'attachment; filename="{filename}"'
-    writer = csv.DictWriter(response, fieldnames=list(rows[0].keys()) if rows else ["No Data"])
-    writer.writeheader()
-    if rows:
-        writer.writerows(rows)
-    else:
-        writer.writerow({"No Data": "No matching records"})
     return response
 
 
@@ -2735,6 +3092,54 @@ def admin_applicant_extension_file(request, application_id):
     return response
 
 
+def _stream_zip_entries(entries):
+    buffer = ZipStreamBuffer()
+    stamp = timezone.localtime().timetuple()[:6]
+    with zipfile.ZipFile(buffer, "w") as zf:
+        for arcname, file_field in entries:
+            try:
+                file_field.open("rb")
+            except Exception:
+                continue
+            info = zipfile.ZipInfo(arcname, date_time=stamp)
+            # JPEG/PNG/PDF already compressed hote hain; dobara deflate karna sirf CPU waste hai.
+            info.compress_type = (
+                zipfile.ZIP_STORED if arcname.lower().endswith(PRECOMPRESSED_EXTENSIONS) else zipfile.ZIP_DEFLATED
+            )
+            try:
+                with zf.open(info, "w") as dest:
+                    for chunk in file_field.chunks(ZIP_STREAM_CHUNK_SIZE):
+                        dest.write(chunk)
+                        data = buffer.drain()
+                        if data:
+                            yield data
+            finally:
+                file_field.close()
+            data = buffer.drain()
+            if data:
+                yield data
+    data = buffer.drain()
+    if data:
+        yield data
+
+
+def _profile_zip_entries(profile):
+    idx = 1
+    if profile.photo:
+        ext = (profile.photo.name.rsplit(".", 1)[-1] if "." in profile.photo.name else "jpg")
+        yield f"{idx:02d}_passport_photo.{ext}", profile.photo
+        idx += 1
+    if profile.signature:
+        ext = (profile.signature.name.rsplit(".", 1)[-1] if "." in profile.signature.name else "png")
+        yield f"{idx:02d}_signature.{ext}", profile.signature
+        idx += 1
+    for doc in profile.documents.all():
+        file_name = stored_file_display_name(doc, "file")
+        safe_title = _slug_name(doc.title or "document")
+        yield f"{idx:02d}_{safe_title}_{file_name}", doc.file
+        idx += 1
+
+
 @login_required
 def admin_download_all_documents(request, application_id):
     if not _can_access_admin(request):
@@ -2744,31 +3149,7 @@ def admin_download_all_documents(request, application_id):
 
     applicant_name = _slug_name(profile.full_name or profile.user.username)
     zip_name = f"{applicant_name}_documents.zip"
-    buffer = io.BytesIO()
-    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
-        idx = 1
-        if profile.photo:
-            ext = (profile.photo.name.rsplit(".", 1)[-1] if "." in profile.photo.name else "jpg")
-            profile.photo.open("rb")
-            zf.writestr(f"{idx:02d}_passport_photo.{ext}", profile.photo.read())
-            profile.photo.close()
-            idx += 1
-        if profile.signature:
-            ext = (profile.signature.name.rsplit(".", 1)[-1] if "." in profile.signature.name else "png")
-            profile.signature.open("rb")
-            zf.writestr(f"{idx:02d}_signature.{ext}", profile.signature.read())
-            profile.signature.close()
-            idx += 1
-        for doc in profile.documents.all():
-            file_name = doc.file.name.rsplit("/", 1)[-1]
-            safe_title = _slug_name(doc.title or "document")
-            doc.file.open("rb")
-            zf.writestr(f"{idx:02d}_{safe_title}_{file_name}", doc.file.read())
-            doc.file.close()
-            idx += 1
-
-    buffer.seek(0)
-    response = HttpResponse(buffer.getvalue(), content_type="application/zip")
+    response = StreamingHttpResponse(_stream_zip_entries(_profile_zip_entries(profile)), content_type="application/zip")
     response["Content-Disposition"] = f'attachment; filename="{zip_name}"'
     return response
 
@@ -5,6 +5,10 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
+
+Chat long-poll (25s hold) sirf isi entrypoint par chalta hai, jaise:
+    gunicorn portal_main.asgi:application -k uvicorn_worker.UvicornWorker
+wsgi.py (gunicorn sync workers) par chat endpoints short-poll me reply karte hain.
 """
 
 import os
@@ -1,5 +1,6 @@
 ﻿from pathlib import Path
 import os
+import tempfile
 
 try:
     import dj_database_url
@@ -47,6 +48,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'accounts.middleware.AdminAccessMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'accounts.middleware.MobileConflictMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -91,6 +93,21 @@ else:
             'NAME': BASE_DIR / 'db.sqlite3',
         }
     }
+
+# â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•
+# CACHE
+# Vacancy catalog, DocumentRule aur MasterDataField snapshots ka version key aur media URLs yahi cache me hain.
+# Ek se zyada gunicorn worker ho to REDIS_URL do (redis package chahiye): admin ka change sab workers me turant
+# dikhega. Bina iske har worker ka apna LocMem cache hai aur baaki workers TTL (5 min) tak purana data dikhate hain.
+# â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•
+_redis_url = os.getenv('REDIS_URL', '').strip()
+if _redis_url:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': _redis_url,
+        }
+    }
 # PASSWORD VALIDATION
 # â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•
 AUTH_PASSWORD_VALIDATORS = [
@@ -157,3 +174,23 @@ USE_TZ        = True
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+
+# Document converter jobs (process pool)
+# Job results ek shared folder me rehte hain, taaki status/result kisi bhi gunicorn worker se mil sake.
+# Har web worker apna pool banata hai: kul converter processes = WEB_CONCURRENCY x CONVERTER_POOL_WORKERS.
+# Default me CPUs ko gunicorn workers (WEB_CONCURRENCY) me baant dete hain, taaki machine oversubscribe na ho.
+_WEB_WORKERS = max(int(os.getenv('WEB_CONCURRENCY', '1')), 1)
+CONVERTER_POOL_WORKERS = int(os.getenv('CONVERTER_POOL_WORKERS', str(max(min((os.cpu_count() or 1) // _WEB_WORKERS, 4), 1))))
+CONVERTER_MAX_PENDING_JOBS = int(os.getenv('CONVERTER_MAX_PENDING_JOBS', '16'))
+CONVERTER_JOB_DIR = os.getenv('CONVERTER_JOB_DIR', os.path.join(tempfile.gettempdir(), 'portal_converter_jobs'))
+# OCR jaise repeat results ka LRU cache (job dir ke andar); total size is limit se upar gaya to purane hatenge.
+CONVERTER_RESULT_CACHE_MAX_BYTES = int(os.getenv('CONVERTER_RESULT_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+
+
+# Media delivery: "django" (Range/304 support ke saath Python se), "x-accel" (nginx) ya "x-sendfile" (apache).
+# x-accel ke liye nginx me internal location chahiye, jaise:
+#   location /protected-media/ { internal; alias /path/to/media/; }
+MEDIA_DELIVERY = os.getenv('MEDIA_DELIVERY', 'django').strip().lower()
+if MEDIA_DELIVERY not in {'django', 'x-accel', 'x-sendfile'}:
+    MEDIA_DELIVERY = 'django'
+MEDIA_ACCEL_PREFIX = os.getenv('MEDIA_ACCEL_PREFIX', '/protected-media/')
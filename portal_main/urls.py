@@ -2,7 +2,8 @@ from django.contrib import admin
 from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
-from django.views.static import serve
+
+from accounts.views import media_serve_view
 
 urlpatterns = [
     path('admin/',    admin.site.urls),
@@ -13,5 +14,5 @@ urlpatterns = [
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 else:
-    # Fallback media serving when DEBUG=False (use web server mapping in production for best performance).
-    urlpatterns += [re_path(r"^media/(?P<path>.*)$", serve, {"document_root": settings.MEDIA_ROOT})]
+    # DEBUG=False: MEDIA_DELIVERY=x-accel/x-sendfile par transfer front server karta hai, worker block nahi hota.
+    urlpatterns += [re_path(r"^media/(?P<path>.*)$", media_serve_view)]
@@ -0,0 +1,82 @@
+// User aur admin chat dono pages ka shared code: message bubble render + poll loop.
+(function () {
+  function escapeHtml(text) {
+    return String(text || '').replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;').replace(/"/g, '&quot;');
+  }
+
+  function attachmentHtml(a) {
+    if (!a || !a.url) return '';
+    const name = escapeHtml(a.name);
+    const links = `<div class="mt-2 text-xs font-bold text-blue-600"><a href="${a.download_url}" class="underline">DOWNLOAD</a><a href="${a.url}" target="_blank" class="ml-3 underline">OPEN</a></div>`;
+    if (a.kind === 'image') {
+      return `<div class="mt-2"><img src="${a.thumb_url || a.url}" alt="${name}" class="att-image" loading="lazy">${links}</div>`;
+    }
+    const heading = a.kind === 'pdf'
+      ? '<div class="text-xs font-semibold text-rose-500">PDF DOCUMENT</div>'
+      : '<div class="text-xs font-semibold text-slate-500">Attachment</div>';
+    return `<div class="mt-2"><div class="att-box">${heading}<div class="text-sm font-bold text-slate-900">${name}</div></div>${links}</div>`;
+  }
+
+  function sleep(ms) {
+    return new Promise((resolve) => setTimeout(resolve, ms));
+  }
+
+  function create(options) {
+    const list = options.list;
+    const scrollBox = options.scrollBox || list;
+    const selfLabel = options.selfLabel || 'You';
+    let lastMessageId = 0;
+    document.querySelectorAll('[data-message-row]').forEach((row) => {
+      lastMessageId = Math.max(lastMessageId, parseInt(row.getAttribute('data-message-id'), 10) || 0);
+    });
+
+    function scrollToBottom() {
+      if (scrollBox) scrollBox.scrollTop = scrollBox.scrollHeight;
+    }
+
+    function append(m) {
+      if (!m || !m.id) return;
+      lastMessageId = Math.max(lastMessageId, m.id);
+      if (!list || list.querySelector(`[data-message-id="${m.id}"]`)) return;
+      const row = document.createElement('div');
+      row.className = m.from_admin ? 'bubble bubble-admin' : 'bubble bubble-user';
+      row.setAttribute('data-message-row', '');
+      row.setAttribute('data-message-id', m.id || '');
+      const safeMsg = escapeHtml(m.message).replace(/\n/g, '<br>');
+      row.innerHTML = `<div class="flex items-center justify-between gap-2"><div class="font-semibold text-sm">${m.from_admin ? 'Admin' : selfLabel}</div><input type="checkbox" class="select-box message-select-box"></div>${safeMsg ? `<div class="mt-1 text-sm">${safeMsg}</div>` : ''}${attachmentHtml(m.attachment)}<div class="msg-line">${m.time || ''}</div>`;
+      list.appendChild(row);
+      scrollToBottom();
+    }
+
+    async function poll() {
+      // ASGI par server request hold karta hai (next_poll_ms 0); WSGI par turant jawab aata hai
+      // aur server batata hai kitna ruk kar dobara poochna hai. Chat band ho to loop ruk jata hai.
+      let failures = 0;
+      while (options.pollUrl) {
+        if (document.hidden) {
+          await sleep(2000);
+          continue;
+        }
+        try {
+          const resp = await fetch(`${options.pollUrl}?since_id=${lastMessageId}`, {
+            headers: { 'X-Requested-With': 'XMLHttpRequest' },
+          });
+          if (resp.status === 403 || resp.status === 404) return;
+          if (!resp.ok) throw new Error('Poll failed');
+          const data = await resp.json();
+          (data.messages || []).forEach(append);
+          failures = 0;
+          if (data.next_poll_ms) await sleep(data.next_poll_ms);
+        } catch (err) {
+          failures += 1;
+          await sleep(Math.min(5000 * failures, 60000));
+        }
+      }
+    }
+
+    scrollToBottom();
+    return { append, poll, scrollToBottom };
+  }
+
+  window.PortalChat = { create };
+})();